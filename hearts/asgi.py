@@ -10,18 +10,24 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 import os
 
 from channels.auth import AuthMiddlewareStack
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 from django.core.asgi import get_asgi_application
-
-import hearts.routing
+from django.urls import re_path
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hearts.settings')
 
+# Initialize Django before importing anything that uses the models.
 django_asgi_app = get_asgi_application()
 
+import hearts.routing  # noqa: E402
+
 application = ProtocolTypeRouter({
-    'http': django_asgi_app,
+    'http': URLRouter(
+        hearts.routing.http_urlpatterns + [
+            re_path(r'', django_asgi_app),
+        ]
+    ),
     'websocket': AllowedHostsOriginValidator(
         AuthMiddlewareStack(
             URLRouter(
@@ -29,4 +35,5 @@ application = ProtocolTypeRouter({
             )
         )
     ),
+    'channel': ChannelNameRouter(hearts.routing.channel_name_routes),
 })
@@ -0,0 +1,27 @@
+"""
+Settings for running the benchmarks locally.
+
+Everything runs in-process against an in-memory SQLite database and an
+in-memory channel layer so neither Postgres nor Redis are needed:
+
+    python manage.py benchmark --settings=hearts.benchmarks.settings
+"""
+from hearts.settings import *  # noqa: F401,F403
+
+# Keep the game manager's logging out of the timings.
+DEBUG = False
+LOG_QUERY_STATS = False
+METRICS_WORKER_PORT = None
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
@@ -0,0 +1,234 @@
+"""
+Benchmarks of the game manager's hot paths.
+
+Each benchmark times a single call of one path, e.g. a step of
+`GameManager.play`, over many runs and records how many queries the call made.
+Anything a run needs is prepared beforehand so only the call itself is timed.
+Run them with the `benchmark` management command.
+"""
+import random
+import statistics
+import time
+from typing import Any, Callable, NamedTuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from hearts.engine import rules
+from hearts.game.manager import GameManager
+from hearts.game.scheduler import advance_game
+from hearts.models import Game, Player
+
+
+class BenchmarkResult(NamedTuple):
+    """Timings of a single benchmark in milliseconds."""
+
+    name: str
+    runs: int
+    mean_ms: float
+    median_ms: float
+    min_ms: float
+    p95_ms: float
+
+    # Median number of queries made by a single run.
+    queries: int
+
+
+def create_game() -> Game:
+    """Create a bot-only game with the first deal dealt."""
+    bots = [
+        Player.objects.create(
+            name=f'Benchmark Bot {seat + 1}',
+            bot=True,
+            bot_strategy=strategy,
+        )
+        for seat, strategy in enumerate(['random', 'lowest'] * 2)
+    ]
+    game = Game.objects.create(
+        player_1=bots[0],
+        player_2=bots[1],
+        player_3=bots[2],
+        player_4=bots[3],
+    )
+    game_manager = GameManager(game)
+    game_manager.new_deal()
+    game_manager.new_trick()
+    return game
+
+
+def create_game_in_play(cards_played: int = 20) -> Game:
+    """Create a game part way through its first deal."""
+    game = create_game()
+    while True:
+        state = GameManager(game).load_state()
+        if state.has_passed and rules.current_turn(state) is not None and (
+            state.tricks_played * 4 + len(state.trick) >= cards_played
+        ):
+            return game
+        advance_game(game.id)
+
+
+def measure(
+        name: str,
+        setup: Callable[[], Any],
+        run: Callable[[Any], Any],
+        runs: int,
+        warmup: int = 3,
+) -> BenchmarkResult:
+    """
+    Time a benchmark.
+
+    Args:
+        name (str): Name of the benchmark.
+        setup: Called before every run. Not timed.
+        run: Called with whatever `setup` returned. Timed.
+        runs (int): Number of timed runs.
+        warmup (int): Number of untimed runs made first.
+    """
+    for _ in range(warmup):
+        run(setup())
+
+    timings = []
+    queries = []
+    for _ in range(runs):
+        context = setup()
+        with CaptureQueriesContext(connection) as captured:
+            started_at = time.perf_counter()
+            run(context)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        queries.append(len(captured))
+
+    timings.sort()
+    return BenchmarkResult(
+        name=name,
+        runs=runs,
+        mean_ms=statistics.fmean(timings),
+        median_ms=statistics.median(timings),
+        min_ms=timings[0],
+        p95_ms=timings[min(int(runs * 0.95), runs - 1)],
+        queries=int(statistics.median(queries)),
+    )
+
+
+def benchmark_new_deal(runs: int) -> BenchmarkResult:
+    """Deal a new hand, including broadcasting it to players."""
+    game = create_game()
+
+    def run(game_manager: GameManager) -> None:
+        game_manager.new_deal()
+        game_manager.new_trick()
+        game_manager.send_game_state_to_client()
+
+    return measure('new_deal', lambda: GameManager(game), run, runs)
+
+
+def benchmark_play(runs: int) -> BenchmarkResult:
+    """Advance a bot-only game by one step the way the game worker does."""
+    games = [create_game()]
+
+    def setup() -> Game:
+        # Start a new game whenever the current one is over.
+        if games[-1].winning_player_id is not None:
+            games.append(create_game())
+        return games[-1]
+
+    def run(game: Game) -> None:
+        if advance_game(game.id) is None:
+            game.refresh_from_db()
+
+    return measure('play', setup, run, runs)
+
+
+def benchmark_is_valid_move(runs: int) -> BenchmarkResult:
+    """Validate a move with a freshly loaded manager, as an action does."""
+    game = create_game_in_play()
+    game_manager = GameManager(game)
+    state = game_manager.load_state()
+    seat = rules.current_turn(state)
+    code = random.choice(list(
+        code for code in game_manager.cards
+        if rules.is_valid_move(state, seat, code)
+    ))
+
+    def setup() -> tuple[GameManager, Any]:
+        return GameManager(game), game_manager.cards[code]
+
+    def run(context: tuple[GameManager, Any]) -> None:
+        fresh_manager, card = context
+        fresh_manager.is_valid_move(card)
+
+    return measure('is_valid_move', setup, run, runs)
+
+
+def benchmark_get_game_state(runs: int) -> BenchmarkResult:
+    """Build the game state of a single player."""
+    game = create_game_in_play()
+
+    def run(game_manager: GameManager) -> None:
+        game_manager.get_game_state(game.player_1, False)
+
+    return measure(
+        'get_game_state',
+        lambda: GameManager(game, lock=False),
+        run,
+        runs,
+    )
+
+
+def benchmark_send_game_state_to_client(runs: int) -> BenchmarkResult:
+    """Build and broadcast the game state of every player."""
+    game = create_game_in_play()
+
+    def run(game_manager: GameManager) -> None:
+        game_manager.send_game_state_to_client()
+
+    return measure(
+        'send_game_state_to_client',
+        lambda: GameManager(game),
+        run,
+        runs,
+    )
+
+
+BENCHMARKS = {
+    'new_deal': benchmark_new_deal,
+    'play': benchmark_play,
+    'is_valid_move': benchmark_is_valid_move,
+    'get_game_state': benchmark_get_game_state,
+    'send_game_state_to_client': benchmark_send_game_state_to_client,
+}
+
+
+def compare(
+        results: dict[str, dict],
+        baseline: dict[str, dict],
+        threshold: float,
+) -> list[str]:
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        results (dict): Benchmark results keyed by name.
+        baseline (dict): Earlier benchmark results keyed by name.
+        threshold (float): Allowed slowdown of the median, e.g. 0.2 for 20%.
+
+    Returns:
+        Description of every regression. Empty if nothing regressed.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        limit = before['median_ms'] * (1 + threshold)
+        if result['median_ms'] > limit:
+            regressions.append(
+                f'{name}: median {result["median_ms"]:.3f}ms is slower than '
+                f'{before["median_ms"]:.3f}ms by more than {threshold:.0%}',
+            )
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} queries, '
+                f'up from {before["queries"]}',
+            )
+    return regressions
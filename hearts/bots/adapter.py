@@ -0,0 +1,61 @@
+from typing import Hashable, Type
+
+from hearts.bots.base import BaseBot
+from hearts.bots.observation import ObservationBot
+from hearts.models import Card
+
+
+class ObservationBotAdapter(BaseBot):
+    """
+    Runs an `ObservationBot` wherever a `BaseBot` is expected.
+
+    The observation is built once per decision from the state the bot was
+    given and the chosen card codes are turned back into the Card objects of
+    the deal, so the wrapped bot never sees the Player, Game or Cards.
+    """
+
+    # Class of the wrapped bot, set by `adapt`.
+    bot_class: Type[ObservationBot]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bot = self.bot_class()
+
+    @classmethod
+    def warm_up(cls) -> None:
+        cls.bot_class.warm_up()
+
+    @property
+    def deterministic(self) -> bool:
+        return self.bot.deterministic
+
+    def get_cards_to_pass(self) -> list[Card]:
+        """Determine which cards should be passed at the start of the game."""
+        codes = self.bot.choose_pass(self.observation)
+        return [self.get_card(code) for code in codes]
+
+    def get_card_to_play(self) -> Card:
+        """Determine which card should be played next."""
+        return self.get_card(self.bot.choose_play(self.observation))
+
+    def pass_key(self) -> Hashable:
+        return self.bot.pass_key(self.observation)
+
+    def play_key(self) -> Hashable:
+        return self.bot.play_key(self.observation)
+
+
+def adapt(bot_class: Type[ObservationBot]) -> Type[BaseBot]:
+    """
+    Wrap an `ObservationBot` class so it can be created and used like a
+    `BaseBot`. The wrapper keeps the bot's name for logs and metrics.
+    """
+    return type(
+        bot_class.__name__,
+        (ObservationBotAdapter,),
+        {
+            'bot_class': bot_class,
+            '__doc__': bot_class.__doc__,
+            '__module__': bot_class.__module__,
+        },
+    )
@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar
+from typing import Hashable, TypeVar
 
-from django.db.models import QuerySet
-
-from hearts.models import Card, Deal, Game, Player, Trick
+from hearts.bots.observation import Observation
+from hearts.engine import HeartsState, rules
+from hearts.engine.cards import CardSet
+from hearts.engine.tracker import CardTracker
+from hearts.models import Card, Game, Player
 
 Bot = TypeVar('Bot', bound='BaseBot')
 
@@ -11,9 +13,54 @@ Bot = TypeVar('Bot', bound='BaseBot')
 class BaseBot(ABC):
     """Abstract Base Class for all bots."""
 
-    def __init__(self, player: Player, game: Game):
+    # Whether the bot always makes the same decision from the same
+    # situation. Decisions of deterministic bots are cached, see
+    # `hearts.bots.cache`.
+    deterministic = False
+
+    def __init__(
+            self,
+            player: Player,
+            game: Game,
+            state: HeartsState,
+            cards: dict[int, Card],
+    ):
+        """
+        Initialize the bot.
+
+        Args:
+            player (Player): The player the bot is playing as.
+            game (Game): The game being played.
+            state (HeartsState): State of the current deal.
+            cards (dict): Card objects of the current deal keyed by card code.
+        """
         self.player = player
         self.game = game
+        self.state = state
+        self.cards = cards
+        self.seat = game.get_player_index(player.id) - 1
+
+    @property
+    def state(self) -> HeartsState:
+        """State of the current deal."""
+        return self._state
+
+    @state.setter
+    def state(self, state: HeartsState) -> None:
+        # The observation is built from the state on first use.
+        self._state = state
+        self._observation = None
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """
+        Prepare anything the bot needs before its first decision, e.g. load
+        data files or start worker processes.
+
+        Called once per process when the strategy is first loaded if
+        `BOT_WARM_UP` is on, see `hearts.bots.registry`.
+        """
+        pass
 
     @abstractmethod
     def get_cards_to_pass(self) -> list[Card]:
@@ -25,23 +72,59 @@ class BaseBot(ABC):
         """Determine which card should be played next."""
         pass
 
-    def get_cards(self) -> QuerySet:
-        """Get QuerySet of bot's cards this deal."""
-        return Card.objects.filter(
-            player=self.player,
-            deal=self.current_deal,
-        )
+    @property
+    def hand(self) -> CardSet:
+        """Get the cards the bot is holding."""
+        return self.state.hands[self.seat]
+
+    @property
+    def observation(self) -> Observation:
+        """
+        Get what the bot can see of the deal.
+
+        Built once per state, so looking up a cached decision and making it
+        share one observation.
+        """
+        if self._observation is None:
+            self._observation = Observation.from_state(self.state, self.seat)
+        return self._observation
+
+    @property
+    def tracker(self) -> CardTracker:
+        """Get what every seat knows about the cards of the deal."""
+        return CardTracker.from_state(self.state)
 
     @property
-    def current_deal(self) -> Deal:
-        """Get the current deal."""
-        return Deal.objects.filter(
-            game=self.game,
-        ).latest('created_at')
+    def unseen(self) -> CardSet:
+        """Get the cards the bot can't see: everything the others hold."""
+        return self.tracker.unseen(self.hand)
 
     @property
-    def current_trick(self) -> Trick:
-        """Get the current trick."""
-        return Trick.objects.filter(
-            deal=self.current_deal,
-        ).latest('created_at')
+    def legal_moves(self) -> CardSet:
+        """Get the cards the bot is allowed to play right now."""
+        return rules.legal_moves(self.state, self.seat)
+
+    def pass_key(self) -> Hashable:
+        """
+        Get a key of everything the bot's pass depends on.
+
+        Bots whose pass depends on more than their hand and the direction,
+        e.g. the game scores, must override this so cached passes aren't
+        reused in different situations.
+        """
+        return self.hand, self.state.pass_direction
+
+    def play_key(self) -> Hashable:
+        """
+        Get a key of everything the bot's next card depends on.
+
+        Covers everything the bot can see of the deal from its own seat apart
+        from the game scores, see `Observation.key`. Bots that look at
+        anything else must override this, and bots that look at less can
+        override it so more situations share a key.
+        """
+        return self.observation.key()
+
+    def get_card(self, code: int) -> Card:
+        """Get the Card object for a card code."""
+        return self.cards[code]
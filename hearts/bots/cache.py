@@ -0,0 +1,165 @@
+"""
+Process-wide cache of bot decisions.
+
+Bots are created afresh for every decision, so the same situation coming up
+again, e.g. the same hand and trick in another game, would otherwise be worked
+out again from scratch. Every bot can describe what its decision depends on
+with `BaseBot.pass_key` and `BaseBot.play_key`, and the card codes it chose are
+kept in a bounded LRU cache under that key and the strategy played, so
+strategies sharing a bot class never share decisions.
+
+Decisions of bots marked `deterministic` are cached by default. Other
+strategies can opt in with `BOT_DECISION_CACHE_STRATEGIES`, at the cost of
+always making the same choice from the same situation for the life of the
+process. `BOT_DECISION_CACHE_SIZE` sets the most decisions kept; 0 turns the
+cache off. Both settings are read once, when the cache is first used.
+"""
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+
+from hearts.bots.base import BaseBot
+from hearts.metrics import (
+    BOT_CACHE_EVICTIONS,
+    BOT_CACHE_HITS,
+    BOT_CACHE_MISSES,
+)
+from hearts.models import Card
+
+_cache: Optional['DecisionCache'] = None
+
+
+class CacheStats(NamedTuple):
+    """Counts of a cache's lookups since it was created or cleared."""
+
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class DecisionCache:
+    """A bounded map of decisions that forgets the least recently used."""
+
+    def __init__(self, max_size: int, strategies: Iterable[str] = ()):
+        """
+        Args:
+            max_size (int): Most decisions to keep. 0 or less keeps none.
+            strategies: Strategies to cache even if their bots aren't
+                deterministic.
+        """
+        self.max_size = max_size
+        self.strategies = frozenset(strategies)
+        # Whether each bot class playing each strategy is cached, worked out
+        # on first use.
+        self._cached: dict[tuple[type, str], bool] = {}
+        self._decisions: OrderedDict[Hashable, tuple[int, ...]] = (
+            OrderedDict()
+        )
+        # The game worker plays games in threads sharing the cache.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_cached(self, bot: BaseBot, strategy: str) -> bool:
+        """Check if the decisions of a bot playing a strategy are cached."""
+        bot_key = (type(bot), strategy)
+        if (cached := self._cached.get(bot_key)) is None:
+            cached = self.max_size > 0 and (
+                bot.deterministic or strategy in self.strategies
+            )
+            self._cached[bot_key] = cached
+        return cached
+
+    def get(self, key: Hashable) -> Optional[tuple[int, ...]]:
+        """Get the card codes decided for a key, or None if not cached."""
+        with self._lock:
+            codes = self._decisions.get(key)
+            if codes is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._decisions.move_to_end(key)
+            return codes
+
+    def put(self, key: Hashable, codes: tuple[int, ...]) -> None:
+        """Store the card codes decided for a key."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._decisions[key] = codes
+            self._decisions.move_to_end(key)
+            while len(self._decisions) > self.max_size:
+                self._decisions.popitem(last=False)
+                self.evictions += 1
+                BOT_CACHE_EVICTIONS.inc()
+
+    def clear(self) -> None:
+        """Forget every decision and reset the counts."""
+        with self._lock:
+            self._decisions.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        """Get the size of the cache and counts of its lookups."""
+        return CacheStats(
+            size=len(self._decisions),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+
+def get_decision_cache() -> DecisionCache:
+    """Get the cache shared by the process, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = DecisionCache(
+            settings.BOT_DECISION_CACHE_SIZE,
+            settings.BOT_DECISION_CACHE_STRATEGIES,
+        )
+    return _cache
+
+
+def get_cards_to_pass(bot: BaseBot, strategy: str) -> list[Card]:
+    """Get a bot's pass, looking it up in the cache when possible."""
+    cache = get_decision_cache()
+    if not cache.is_cached(bot, strategy):
+        return bot.get_cards_to_pass()
+
+    key = (strategy, 'pass', bot.pass_key())
+    if (codes := cache.get(key)) is not None:
+        BOT_CACHE_HITS.inc(strategy=strategy)
+        return [bot.get_card(code) for code in codes]
+
+    BOT_CACHE_MISSES.inc(strategy=strategy)
+    cards = bot.get_cards_to_pass()
+    cache.put(key, tuple(card.code for card in cards))
+    return cards
+
+
+def get_card_to_play(bot: BaseBot, strategy: str) -> Card:
+    """Get a bot's next card, looking it up in the cache when possible."""
+    cache = get_decision_cache()
+    if not cache.is_cached(bot, strategy):
+        return bot.get_card_to_play()
+
+    key = (strategy, 'play', bot.play_key())
+    if (codes := cache.get(key)) is not None:
+        BOT_CACHE_HITS.inc(strategy=strategy)
+        return bot.get_card(codes[0])
+
+    BOT_CACHE_MISSES.inc(strategy=strategy)
+    card = bot.get_card_to_play()
+    cache.put(key, (card.code,))
+    return card
@@ -0,0 +1,58 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+from hearts.bots.montecarlo import MonteCarloBot
+from hearts.bots.observation import Observation
+from hearts.engine import ismcts
+from hearts.engine.cards import count, lowest
+from hearts.metrics import SEARCH_ITERATIONS, SEARCH_VISIT_SHARE
+
+logger = logging.getLogger('django')
+
+
+class ISMCTSBot(MonteCarloBot):
+    """
+    Bot that searches a tree of moves over guesses of the other hands.
+
+    See `hearts.engine.ismcts` for how the search works. It runs for
+    `ISMCTS_ITERATIONS` iterations or `ISMCTS_TIME_BUDGET` seconds, whichever
+    comes first, split across `ISMCTS_WORKERS` processes. Passing is the same
+    as `MonteCarloBot`.
+    """
+
+    # Statistics of the bot's last search.
+    last_search = None
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """Start the search worker processes."""
+        if settings.ISMCTS_WORKERS > 1:
+            ismcts.get_pool(settings.ISMCTS_WORKERS)
+
+    def choose_play(self, observation: Observation) -> int:
+        """Determine which card should be played next."""
+        moves = observation.legal_moves
+        if count(moves) == 1:
+            return lowest(moves)
+
+        move, stats = ismcts.search(
+            observation.to_state(),
+            observation.seat,
+            iterations=settings.ISMCTS_ITERATIONS,
+            time_budget=settings.ISMCTS_TIME_BUDGET,
+            workers=settings.ISMCTS_WORKERS,
+            seed=random.getrandbits(64),
+            exploration=settings.ISMCTS_EXPLORATION,
+        )
+
+        self.last_search = stats
+        SEARCH_ITERATIONS.observe(stats.iterations, strategy='ismcts')
+        SEARCH_VISIT_SHARE.observe(stats.visit_share, strategy='ismcts')
+        data = stats._asdict()
+        logger.debug(f'Search stats: {json.dumps(data)}', extra={
+            'search_stats': data,
+        })
+        return move
@@ -1,65 +1,54 @@
-from hearts.bots.base import BaseBot
-from hearts.models import Card
+from typing import Hashable
 
+from hearts.bots.observation import Observation, ObservationBot
+from hearts.engine.cards import SUIT_MASKS, SUIT_SIZE, rank_of, to_list
 
-class LowestBot(BaseBot):
+
+class LowestBot(ObservationBot):
     """Bot that trys to play the lowest cards."""
 
-    def get_cards_to_pass(self) -> list[Card]:
+    deterministic = True
+
+    def pass_key(self, observation: Observation) -> Hashable:
+        """The pass only depends on the hand."""
+        return observation.hand
+
+    def play_key(self, observation: Observation) -> Hashable:
+        """
+        Only the suit led, the first trick and hearts being broken matter on
+        top of the hand.
+        """
+        return (
+            observation.hand,
+            observation.trick[:1],
+            observation.tricks_played == 0,
+            observation.hearts_broken,
+        )
+
+    def choose_pass(self, observation: Observation) -> list[int]:
         """
         Determine which cards should be passed at the start of the game.
 
         Tries to get rid of the 3 highest cards.
         """
-        cards = self.get_cards()
-        return list(cards.filter(
-            trick__isnull=True,
-            to_pass=False,
-        ).order_by('-value')[:3])
+        return sorted(to_list(observation.hand), key=rank_of, reverse=True)[:3]
 
-    def get_card_to_play(self) -> Card:
+    def choose_play(self, observation: Observation) -> int:
         """
         Determine which card should be played next.
 
         Will try to play the lowest card unless the bot can't follow suit. In
         that case the bot will play it's highest card.
         """
-        cards = self.get_cards()
-        eligible_cards = list(cards.filter(trick__isnull=True).order_by('value'))
-        eligible_cards.sort(key=lambda x: x.value if x.value > 1 else 99)
-
-        # If the bot has a card in the correct suit, play the lowest one.
-        if first_card_of_trick := self.current_trick.first_card:
-            eligible_cards_in_suit = [
-                c for c in eligible_cards
-                if c.suit == first_card_of_trick.suit
-            ]
-            if eligible_cards_in_suit:
-                eligible_cards = eligible_cards_in_suit
-            else:
-                # If the bot does not have a card in the correct suit, play
-                # the highest one.
-                eligible_cards.sort(
-                    key=lambda x: x.value if x.value > 1 else 99,
-                    reverse=True,
-                )
-
-        else:
-            # If the bot has the two of clubs, they should play it.
-            for card in eligible_cards:
-                if card.suit == Card.Suit.CLUBS and card.value == 2:
-                    return card
+        moves = observation.legal_moves
+        eligible_cards = sorted(to_list(moves), key=rank_of)
 
-            # Only pick hearts to start trick if hearts are broken.
-            is_hearts_broken = Card.objects.filter(
-                deal=self.current_deal,
-                trick__isnull=False,
-                suit=Card.Suit.HEARTS,
-            ).exists()
-            if not is_hearts_broken:
-                eligible_cards = [
-                    e for e in eligible_cards
-                    if e.suit != Card.Suit.HEARTS
-                ]
+        # If the bot does not have a card in the correct suit, play the
+        # highest one.
+        trick = observation.trick
+        if trick and not moves & SUIT_MASKS[trick[0] // SUIT_SIZE]:
+            return eligible_cards[-1]
 
+        # Otherwise play the lowest card the rules allow. This takes care of
+        # leading with the 2 of clubs and not leading hearts until broken.
         return eligible_cards[0]
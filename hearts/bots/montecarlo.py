@@ -0,0 +1,112 @@
+import random
+import time
+
+from django.conf import settings
+
+from hearts.bots.observation import Observation, ObservationBot
+from hearts.engine.cards import (
+    HEARTS_MASK,
+    QUEEN_OF_SPADES,
+    SPADES_MASK,
+    bit,
+    rank_of,
+    to_list,
+)
+from hearts.engine.playout import playout, sample_hands
+
+try:
+    from hearts.engine import batch
+except ImportError:
+    # Without NumPy every deal is played out on its own.
+    batch = None
+
+# Spades that risk taking the queen of spades, or are the queen.
+_DANGEROUS_SPADES = SPADES_MASK & ~(bit(QUEEN_OF_SPADES) - 1)
+
+
+class MonteCarloBot(ObservationBot):
+    """
+    Bot that plays out the rest of the deal many times for every move.
+
+    Each round of the search deals the cards the bot can't see to the other
+    seats, keeping to the suits they are known to be out of, then plays the
+    deal out once per legal move using the fast policy in
+    `hearts.engine.playout`. The move that took the fewest points on average
+    is played.
+
+    When NumPy is installed the deals are played out `MONTE_CARLO_BATCH_SIZE`
+    guesses at a time with `hearts.engine.batch`, which is many times faster.
+    The search stops after `MONTE_CARLO_ROLLOUTS` playouts or once
+    `MONTE_CARLO_TIME_BUDGET` seconds have passed, whichever comes first.
+    Without a time budget the bot plays the same way every time for a given
+    random seed.
+
+    The search is run from `Observation.to_state`, so the bot never sees the
+    other seats' real hands.
+    """
+
+    def choose_pass(self, observation: Observation) -> list[int]:
+        """
+        Determine which cards should be passed at the start of the game.
+
+        Gets rid of the queen of spades and the spades above it, then the
+        highest hearts, then the highest of the other cards.
+        """
+        def danger(code: int) -> tuple[int, int]:
+            if bit(code) & _DANGEROUS_SPADES:
+                return 2, rank_of(code)
+            if bit(code) & HEARTS_MASK:
+                return 1, rank_of(code)
+            return 0, rank_of(code)
+
+        return sorted(to_list(observation.hand), key=danger, reverse=True)[:3]
+
+    def choose_play(self, observation: Observation) -> int:
+        """Determine which card should be played next."""
+        moves = to_list(observation.legal_moves)
+        if len(moves) == 1:
+            return moves[0]
+
+        state = observation.to_state()
+        seat = observation.seat
+
+        time_budget = settings.MONTE_CARLO_TIME_BUDGET
+        deadline = None
+        if time_budget is not None:
+            deadline = time.perf_counter() + time_budget
+
+        if batch is not None:
+            rng = batch.random_generator(random.getrandbits(64))
+
+        points = [0] * len(moves)
+        rollouts = 0
+        while rollouts < settings.MONTE_CARLO_ROLLOUTS:
+            # Every move is played out against the same guesses of the other
+            # hands so they are compared on equal terms.
+            if batch is None:
+                guesses = 1
+                guess = state._replace(
+                    hands=sample_hands(state, seat, random),
+                )
+                totals = [playout(guess, move)[seat] for move in moves]
+            else:
+                remaining = settings.MONTE_CARLO_ROLLOUTS - rollouts
+                guesses = min(
+                    settings.MONTE_CARLO_BATCH_SIZE,
+                    -(-remaining // len(moves)),
+                )
+                totals = batch.evaluate_moves(
+                    state,
+                    seat,
+                    moves,
+                    guesses,
+                    rng,
+                )
+            points = [total + new for total, new in zip(points, totals)]
+            rollouts += guesses * len(moves)
+
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        best = min(range(len(moves)), key=lambda index: points[index])
+        return moves[best]
@@ -0,0 +1,190 @@
+from abc import ABC, abstractmethod
+from typing import Hashable, NamedTuple, Optional
+
+from hearts.engine import HeartsState, rules
+from hearts.engine.cards import CardSet, to_list, to_set, total_points
+from hearts.engine.state import SEATS, TRICKS_PER_DEAL
+from hearts.engine.tracker import CardTracker
+
+
+def _hand_sizes(state: HeartsState) -> tuple[int, ...]:
+    """Get the number of cards each seat holds from the tricks played."""
+    left = TRICKS_PER_DEAL - state.tricks_played
+    if not state.trick:
+        return (left,) * SEATS
+    sizes = [left] * SEATS
+    for position in range(len(state.trick)):
+        sizes[(state.leader + position) % SEATS] -= 1
+    return tuple(sizes)
+
+
+class Observation(NamedTuple):
+    """
+    Everything a seat can see of a deal when it has to make a decision.
+
+    Built once per decision from the deal's state by `from_state` and handed
+    to `ObservationBot.choose_pass` or `ObservationBot.choose_play`. Other
+    seats' hands are only given as their sizes, so a bot can't see more than
+    a player at the table could.
+    """
+
+    # Seat deciding, 0-3.
+    seat: int
+
+    # Cards the seat holds and the ones it may play right now.
+    hand: CardSet
+    legal_moves: CardSet
+
+    # Direction cards get passed this deal, or None when there is no passing.
+    pass_direction: Optional[str]
+
+    # Seat that led the current trick and the cards played to it so far.
+    leader: Optional[int]
+    trick: tuple[int, ...]
+
+    # Number of tricks already resolved this deal.
+    tricks_played: int
+
+    # Every card played this deal, including the current trick.
+    played: CardSet
+
+    # True once a heart has been played in any trick this deal.
+    hearts_broken: bool
+
+    # Suits each seat has shown to be out of, as CardSets.
+    voids: tuple[CardSet, ...]
+
+    # Cards taken in tricks by each seat this deal.
+    taken: tuple[CardSet, ...]
+
+    # Points scored by each seat in previous deals of the game.
+    scores: tuple[int, ...]
+
+    # Number of cards each seat holds.
+    hand_sizes: tuple[int, ...]
+
+    @classmethod
+    def from_state(cls, state: HeartsState, seat: int) -> 'Observation':
+        """Get what a seat can see of a deal."""
+        return cls(
+            seat=seat,
+            hand=state.hands[seat],
+            legal_moves=rules.legal_moves(state, seat),
+            pass_direction=state.pass_direction,
+            leader=state.leader,
+            trick=state.trick,
+            tricks_played=state.tricks_played,
+            played=state.played,
+            hearts_broken=state.hearts_broken,
+            voids=state.voids,
+            taken=state.taken,
+            scores=state.scores,
+            hand_sizes=_hand_sizes(state),
+        )
+
+    @property
+    def tracker(self) -> CardTracker:
+        """Get what every seat knows about the cards of the deal."""
+        return CardTracker(self.played, self.hearts_broken, self.voids)
+
+    @property
+    def unseen(self) -> CardSet:
+        """Get the cards the seat can't see: everything the others hold."""
+        return self.tracker.unseen(self.hand)
+
+    def to_state(self) -> HeartsState:
+        """
+        Get a state of the deal as the seat sees it, e.g. to search from.
+
+        The seat can't see the other hands, so each other seat is given as
+        many of the unseen cards as it holds, in card order. The engine's
+        searches only keep the sizes of the other hands and deal the unseen
+        cards afresh, see `hearts.engine.playout.sample_hands`. Passing is
+        taken to be over, so this is only meant for choosing a card to play.
+        """
+        unseen = to_list(self.unseen)
+        hands = []
+        for seat, size in enumerate(self.hand_sizes):
+            if seat == self.seat:
+                hands.append(self.hand)
+            else:
+                hands.append(to_set(unseen[:size]))
+                unseen = unseen[size:]
+        return HeartsState(
+            hands=tuple(hands),
+            passing=(0,) * SEATS,
+            pass_direction=self.pass_direction,
+            has_passed=True,
+            leader=self.leader,
+            trick=self.trick,
+            taken=self.taken,
+            tricks_played=self.tricks_played,
+            played=self.played,
+            hearts_broken=self.hearts_broken,
+            scores=self.scores,
+            voids=self.voids,
+        )
+
+    def key(self) -> Hashable:
+        """
+        Get a canonical encoding of the observation apart from the scores.
+
+        Other seats are listed in turn from the observing seat, so the same
+        situation seen from different seats gets the same key. Points taken
+        are kept rather than the cards taken, and the leader is left out
+        since it follows from the trick once it's the seat's turn.
+        """
+        seat = self.seat
+        return (
+            self.hand,
+            self.trick,
+            self.tricks_played,
+            self.played,
+            self.hearts_broken,
+            tuple(
+                total_points(self.taken[(seat + offset) % SEATS])
+                for offset in range(SEATS)
+            ),
+            self.voids[seat:] + self.voids[:seat],
+        )
+
+
+class ObservationBot(ABC):
+    """
+    Abstract Base Class for bots deciding from an `Observation` alone.
+
+    Unlike `BaseBot` these bots are never given a Player, Game or Card
+    objects, so they can't touch the database and work the same in games and
+    offline simulations, where they can be used without Django. Decisions are
+    made with card codes. Strategies registered in `BOT_CLASS_MAP` are
+    wrapped with `hearts.bots.adapter.adapt` when loaded so the game manager
+    can use them like any other bot.
+    """
+
+    # Whether the bot always makes the same decision from the same
+    # observation. Decisions of deterministic bots are cached, see
+    # `hearts.bots.cache`.
+    deterministic = False
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """Prepare anything the bot needs, see `BaseBot.warm_up`."""
+        pass
+
+    @abstractmethod
+    def choose_pass(self, observation: Observation) -> list[int]:
+        """Choose the codes of the three cards to pass."""
+        pass
+
+    @abstractmethod
+    def choose_play(self, observation: Observation) -> int:
+        """Choose the code of the card to play, one of its legal moves."""
+        pass
+
+    def pass_key(self, observation: Observation) -> Hashable:
+        """Get a key of everything the bot's pass depends on."""
+        return observation.hand, observation.pass_direction
+
+    def play_key(self, observation: Observation) -> Hashable:
+        """Get a key of everything the bot's next card depends on."""
+        return observation.key()
@@ -0,0 +1,52 @@
+import logging
+from typing import Optional
+
+from django.conf import settings
+
+from hearts.bots.montecarlo import MonteCarloBot
+from hearts.bots.observation import Observation
+from hearts.engine.passing import PassTable
+
+logger = logging.getLogger('django')
+
+# Table shared by every bot in the process, loaded on first use. False once
+# loading has failed so it isn't retried for every deal.
+_table: Optional[PassTable] = None
+_table_failed = False
+
+
+def get_pass_table() -> Optional[PassTable]:
+    """Get the table at `PASS_TABLE_PATH`, or None if it can't be loaded."""
+    global _table, _table_failed
+    if _table is None and not _table_failed:
+        try:
+            _table = PassTable(settings.PASS_TABLE_PATH)
+        except (OSError, ValueError) as e:
+            logger.warning(
+                f'Could not load pass table {settings.PASS_TABLE_PATH}: {e}; '
+                f'Passing like the Monte Carlo bot'
+            )
+            _table_failed = True
+    return _table
+
+
+class PassTableBot(MonteCarloBot):
+    """
+    Bot that looks its pass up in a precomputed table.
+
+    The table at `PASS_TABLE_PATH` is built offline by the `build_pass_table`
+    command (see `hearts.engine.passing`). Cards are played the same way as
+    `MonteCarloBot`, which it also passes like if the table is missing.
+    """
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """Map the pass table."""
+        get_pass_table()
+
+    def choose_pass(self, observation: Observation) -> list[int]:
+        """Determine which cards should be passed at the start of the game."""
+        table = get_pass_table()
+        if table is None:
+            return super().choose_pass(observation)
+        return table.choose_pass(observation.hand, observation.pass_direction)
@@ -0,0 +1,145 @@
+"""
+Registry of bot strategies that imports each one on first use.
+
+Strategies are registered by name with the import path of their bot class
+(`module:ClassName`), so a process only pays for importing a strategy, and
+whatever it depends on, once a bot actually plays it. Strategies from other
+packages are discovered through the `hearts.bots` entry point group, e.g. in
+their pyproject.toml:
+
+    [project.entry-points."hearts.bots"]
+    mybot = "mypackage.bots:MyBot"
+
+The first time a strategy is used its class is imported, wrapped with `adapt`
+if it's an `ObservationBot`, and warmed up with its `warm_up` method when
+`BOT_WARM_UP` is on. The time this took is logged, kept in `load_times` and
+recorded on `/metrics`.
+"""
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Iterator, Type
+
+from django.conf import settings
+
+from hearts.bots.adapter import adapt
+from hearts.bots.base import Bot
+from hearts.bots.observation import ObservationBot
+from hearts.metrics import BOT_STRATEGY_LOAD_SECONDS
+
+logger = logging.getLogger('django')
+
+ENTRY_POINT_GROUP = 'hearts.bots'
+
+
+def import_bot(path: str) -> Type[Bot]:
+    """
+    Import a bot class from a `module:ClassName` path.
+
+    Raises:
+        ImportError: If the module or class can't be imported.
+    """
+    module_name, _, class_name = path.partition(':')
+    module = import_module(module_name)
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ImportError(f'{module_name} has no bot class {class_name}')
+
+
+class StrategyRegistry(Mapping):
+    """
+    Map of strategy names to bot classes, imported when first looked up.
+
+    Listing or checking the names never imports anything.
+    """
+
+    def __init__(self, paths: dict[str, str]):
+        """
+        Args:
+            paths (dict): Import path of the bot class of every built in
+                strategy, keyed by strategy name.
+        """
+        self._paths = dict(paths)
+        self._classes: dict[str, Type[Bot]] = {}
+        self._load_times: dict[str, float] = {}
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str) -> None:
+        """Register a strategy by the import path of its bot class."""
+        self._paths[name] = path
+        self._classes.pop(name, None)
+
+    def discover(self) -> None:
+        """Register the strategies of installed packages' entry points."""
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name in self._paths:
+                logger.warning(
+                    f'Bot strategy {entry_point.name} from {entry_point.value} '
+                    f'shadows {self._paths[entry_point.name]}; Ignoring it'
+                )
+                continue
+            self._paths[entry_point.name] = entry_point.value
+        self._discovered = True
+
+    def load(self, name: str) -> Type[Bot]:
+        """
+        Import, adapt and warm up a strategy if it hasn't been yet.
+
+        Raises:
+            KeyError: If the strategy isn't registered.
+            ImportError: If its bot class can't be imported.
+        """
+        if name in self._classes:
+            return self._classes[name]
+
+        paths = self._get_paths()
+        with self._lock:
+            # Another thread may have loaded it while we waited.
+            if name in self._classes:
+                return self._classes[name]
+
+            started_at = time.perf_counter()
+            bot_class = import_bot(paths[name])
+            if issubclass(bot_class, ObservationBot):
+                bot_class = adapt(bot_class)
+            if settings.BOT_WARM_UP:
+                bot_class.warm_up()
+            elapsed = time.perf_counter() - started_at
+
+            self._classes[name] = bot_class
+            self._load_times[name] = elapsed
+            BOT_STRATEGY_LOAD_SECONDS.set(elapsed, strategy=name)
+            logger.info(f'Loaded bot strategy {name} in {elapsed:.3f}s')
+            return bot_class
+
+    def is_loaded(self, name: str) -> bool:
+        """Check if a strategy has been imported yet."""
+        return name in self._classes
+
+    def load_times(self) -> dict[str, float]:
+        """Get the seconds it took to load each strategy loaded so far."""
+        return dict(self._load_times)
+
+    def _get_paths(self) -> dict[str, str]:
+        if not self._discovered:
+            with self._lock:
+                if not self._discovered:
+                    self.discover()
+        return self._paths
+
+    def __getitem__(self, name: str) -> Type[Bot]:
+        return self.load(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._get_paths()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._get_paths()))
+
+    def __len__(self) -> int:
+        return len(self._get_paths())
@@ -3,8 +3,7 @@ import random
 from typing import Type
 
 from hearts.bots.base import Bot
-from hearts.bots.random import RandomBot
-from hearts.bots.lowest import LowestBot
+from hearts.bots.registry import StrategyRegistry
 
 logger = logging.getLogger('django')
 
@@ -17,12 +16,25 @@ class BotStrategy:
     """
     RANDOM = 'random'
     LOWEST = 'lowest'
+    MONTE_CARLO = 'montecarlo'
+    ISMCTS = 'ismcts'
+    PASS_TABLE = 'passtable'
 
 
-BOT_CLASS_MAP = {
-    BotStrategy.RANDOM: RandomBot,
-    BotStrategy.LOWEST: LowestBot,
-}
+# Bot classes are only imported once a strategy is first played, see
+# `hearts.bots.registry`. Strategies from other packages are added through
+# entry points.
+BOT_CLASS_MAP = StrategyRegistry({
+    BotStrategy.RANDOM: 'hearts.bots.random:RandomBot',
+    BotStrategy.LOWEST: 'hearts.bots.lowest:LowestBot',
+    BotStrategy.MONTE_CARLO: 'hearts.bots.montecarlo:MonteCarloBot',
+    BotStrategy.ISMCTS: 'hearts.bots.ismcts:ISMCTSBot',
+    BotStrategy.PASS_TABLE: 'hearts.bots.passtable:PassTableBot',
+})
+
+# Strategies whose bots failed to load or be created, which are played with the
+# random strategy instead.
+_failed_strategies: set[str] = set()
 
 
 def get_bot_from_strategy(strategy: str) -> Type[Bot]:
@@ -30,13 +42,55 @@ def get_bot_from_strategy(strategy: str) -> Type[Bot]:
     Given a strategy, return the Bot class to be used in game.
 
     If a bot strategy is missing or invalid, a random strategy will be chosen.
+    If the strategy fails to load, the random strategy is used instead, and
+    the failed strategy isn't tried again for the life of the process.
     """
     if strategy not in BOT_CLASS_MAP:
-        random_strategy = random.choice(list(BOT_CLASS_MAP.keys()))
+        random_strategy = random.choice([
+            name for name in BOT_CLASS_MAP if name not in _failed_strategies
+        ])
         logger.error(
             f'Bot strategy not defined: {strategy}; '
             f'Using strategy: {random_strategy}'
         )
         strategy = random_strategy
 
-    return BOT_CLASS_MAP[strategy]
+    if strategy in _failed_strategies:
+        return BOT_CLASS_MAP[BotStrategy.RANDOM]
+
+    try:
+        return BOT_CLASS_MAP[strategy]
+    except Exception:
+        # Plugins can fail in any way while being imported or warmed up.
+        _failed_strategies.add(strategy)
+        logger.exception(
+            f'Could not load bot strategy: {strategy}; '
+            f'Using strategy: {BotStrategy.RANDOM}'
+        )
+        return BOT_CLASS_MAP[BotStrategy.RANDOM]
+
+
+def create_bot(strategy: str, *args, **kwargs) -> Bot:
+    """
+    Create a bot playing a strategy.
+
+    If the strategy's bot can't be created, a bot playing the random strategy
+    is created instead, see `get_bot_from_strategy`.
+
+    Args:
+        strategy (str): Strategy the bot plays.
+        args: Arguments of the bot class, e.g. those of `BaseBot`.
+        kwargs: Keyword arguments of the bot class.
+    """
+    BotImplementation = get_bot_from_strategy(strategy)
+    try:
+        return BotImplementation(*args, **kwargs)
+    except Exception:
+        if BotImplementation is BOT_CLASS_MAP[BotStrategy.RANDOM]:
+            raise
+        _failed_strategies.add(strategy)
+        logger.exception(
+            f'Could not create bot for strategy: {strategy}; '
+            f'Using strategy: {BotStrategy.RANDOM}'
+        )
+        return BOT_CLASS_MAP[BotStrategy.RANDOM](*args, **kwargs)
@@ -1,3 +1,7 @@
 
 # Key used to store player id in browser cookie.
 PLAYER_ID_COOKIE_KEY = 'hearts_player_id'
+
+# Channel layer channel consumed by the background worker that plays bot turns.
+# Run the worker with `python manage.py runworker game-worker`.
+GAME_WORKER_CHANNEL = 'game-worker'
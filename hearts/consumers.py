@@ -1,8 +1,29 @@
+import asyncio
+import hashlib
 import json
 import logging
+from typing import Optional
 
-from asgiref.sync import async_to_sync
+from channels.consumer import AsyncConsumer
+from channels.db import database_sync_to_async
+from channels.exceptions import StopConsumer
+from channels.generic.http import AsyncHttpConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from hearts.constants import PLAYER_ID_COOKIE_KEY
+from hearts.game.actions import ActionError, perform_action
+from hearts.game.manager import GameManager
+from hearts.game.scheduler import advance_game, schedule_play_async
+from hearts.metrics import (
+    WEBSOCKET_CONNECTIONS,
+    WEBSOCKET_CONNECTS,
+    WORKER_RUNNING_GAMES,
+    WORKER_STEP_FAILURES,
+    serve_metrics,
+)
+from hearts.models import Game, Player
 
 logger = logging.getLogger('django')
 
@@ -35,6 +56,8 @@ class GameConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
+        WEBSOCKET_CONNECTIONS.inc()
+        WEBSOCKET_CONNECTS.inc()
 
     async def disconnect(self, close_code):
         """
@@ -44,6 +67,7 @@ class GameConsumer(AsyncWebsocketConsumer):
         kind of clean up.
         """
         # Remove connection from groups.
+        WEBSOCKET_CONNECTIONS.dec()
         await self.channel_layer.group_discard(
             self.game_group_name,
             self.channel_name,
@@ -57,11 +81,58 @@ class GameConsumer(AsyncWebsocketConsumer):
         """
         Handle an incoming websocket message from the client.
 
-        We aren't using this right now. We will use this to handle any game
-        interactions in the future.
+        Clients send the same game actions as the HTTP endpoint, e.g.
+        `{"action_type": "play-card", "card_id": "..."}`. An optional
+        `request_id` is echoed back so the client can match the reply, which
+        is either an `action-ack` or an `action-error` message.
         """
-        text_data_json = json.loads(text_data)
-        logger.info(f'Received websocket event: {text_data_json=}')
+        try:
+            request_data = json.loads(text_data)
+            action_type = request_data['action_type']
+        except (json.JSONDecodeError, KeyError, TypeError):
+            await self.send_action_response(None, {}, error='Invalid message')
+            return
+        logger.info(f'Received websocket action: {action_type}')
+
+        try:
+            await database_sync_to_async(self.perform_action)(
+                action_type,
+                request_data,
+            )
+        except ActionError as e:
+            await self.send_action_response(action_type, request_data, str(e))
+            return
+
+        # Bots take their turns on the game worker.
+        await schedule_play_async(self.game_id)
+        await self.send_action_response(action_type, request_data)
+
+    def perform_action(self, action_type: str, request_data: dict) -> None:
+        """Apply an action from the connected player to the game."""
+        try:
+            game = Game.objects.get(id=self.game_id)
+            player = Player.objects.get(id=self.player_id)
+        except (Game.DoesNotExist, Player.DoesNotExist, ValidationError):
+            raise ActionError('Game or player not found')
+        perform_action(game, player, action_type, request_data)
+
+    async def send_action_response(
+            self,
+            action_type: Optional[str],
+            request_data: dict,
+            error: Optional[str] = None,
+    ) -> None:
+        """Acknowledge an action from the client or tell it why it failed."""
+        payload = {
+            'request_id': request_data.get('request_id'),
+            'action_type': action_type,
+        }
+        if error is not None:
+            payload['error'] = error
+        await self.send(text_data=json.dumps({
+            'action': 'action-error' if error is not None else 'action-ack',
+            'payload': payload,
+        }))
 
     async def send_payload(self, event: dict) -> None:
         """
@@ -70,3 +141,218 @@ class GameConsumer(AsyncWebsocketConsumer):
         This method is currently used to send the game state to the front end.
         """
         await self.send(text_data=json.dumps(event))
+
+
+class GameStateStreamConsumer(AsyncHttpConsumer):
+    """
+    Stream a player's game state to the browser with server-sent events.
+
+    This is the fallback for browsers without websockets. The stream subscribes
+    to the same channel layer group as the player's websocket, so instead of
+    polling the database it only sends something when the game changes. Idle
+    connections get a heartbeat comment every `HEARTBEAT_INTERVAL` seconds.
+    """
+
+    # Seconds between heartbeat comments sent to keep the connection alive.
+    HEARTBEAT_INTERVAL = 15
+
+    async def http_request(self, message: dict) -> None:
+        """
+        Start the stream once the request has been received.
+
+        Unlike the base class, the consumer keeps running after `handle` so it
+        can push events until the client disconnects.
+        """
+        if not message.get('more_body'):
+            await self.handle(b''.join(self.body))
+
+    async def handle(self, body: bytes) -> None:
+        """Send the current game state and subscribe to game updates."""
+        self.game_id = self.scope['url_route']['kwargs']['game_id']
+        self.last_version = None
+        self.heartbeat_task = None
+        self.player_group_name = None
+
+        player_id = self.scope['cookies'].get(PLAYER_ID_COOKIE_KEY)
+        try:
+            game_state = await database_sync_to_async(self.get_game_state)(
+                player_id,
+            )
+        except (Game.DoesNotExist, Player.DoesNotExist, ValidationError):
+            await self.send_response(404, b'Game not found')
+            raise StopConsumer()
+
+        await self.send_headers(headers=[
+            (b'Content-Type', b'text/event-stream'),
+            (b'Cache-Control', b'no-cache'),
+        ])
+
+        # Subscribe to the game state updates sent to the player's websocket.
+        # Observers see the game from player 1's perspective.
+        self.is_observer = game_state['is_observer']
+        self.player_group_name = (
+            f'game_{self.game_id}_player_{game_state["player_id"]}'
+        )
+        await self.channel_layer.group_add(
+            self.player_group_name,
+            self.channel_name,
+        )
+
+        await self.send_game_state(game_state)
+        self.heartbeat_task = asyncio.create_task(self.send_heartbeats())
+
+    def get_game_state(self, player_id: Optional[str]) -> dict:
+        """Get the current game state for the requesting player."""
+        game = Game.objects.get(id=self.game_id)
+        player = Player.objects.get(id=player_id)
+        is_observer = False
+        if player.id not in [p.id for p in game.players]:
+            player = game.player_1
+            is_observer = True
+        return GameManager(game, lock=False).get_game_state(
+            player,
+            is_observer,
+        )
+
+    async def disconnect(self) -> None:
+        """Stop the heartbeat and unsubscribe from game updates."""
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+        if self.player_group_name is not None:
+            await self.channel_layer.group_discard(
+                self.player_group_name,
+                self.channel_name,
+            )
+
+    async def send_payload(self, event: dict) -> None:
+        """Handle a message sent to the player's group."""
+        if event['action'] != 'update-game-state':
+            return
+        game_state = event['payload']
+        if self.is_observer:
+            game_state = {**game_state, 'is_observer': True}
+        await self.send_game_state(game_state)
+
+    async def send_game_state(self, game_state: dict) -> None:
+        """Send the game state as an event unless it hasn't changed."""
+        data = json.dumps(game_state, sort_keys=True)
+        version = hashlib.sha1(data.encode()).hexdigest()
+        if version == self.last_version:
+            return
+        self.last_version = version
+        await self.send_body(
+            f'id: {version}\ndata: {data}\n\n'.encode(),
+            more_body=True,
+        )
+
+    async def send_heartbeats(self) -> None:
+        """Periodically send a comment so idle connections stay open."""
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+            await self.send_body(b': heartbeat\n\n', more_body=True)
+
+
+class GameWorkerConsumer(AsyncConsumer):
+    """
+    Background worker that plays the bot turns of every game.
+
+    Run with `python manage.py runworker game-worker`. Each game being played
+    gets a single asyncio task that runs one step of the game at a time and
+    sleeps in between, so a worker can pace many games concurrently without
+    blocking a thread per game.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Ids of games that currently have a task running.
+        self.running_games: set[str] = set()
+        # Ids of games that were asked to play while their task was running.
+        # These get another step even if the task was about to stop.
+        self.rerun_games: set[str] = set()
+        # Keep references to tasks so they don't get garbage collected.
+        self.tasks: set[asyncio.Task] = set()
+
+        # The worker doesn't serve Django, so it serves its own metrics.
+        if settings.METRICS_WORKER_PORT:
+            serve_metrics(settings.METRICS_WORKER_PORT)
+
+    async def play_game(self, message: dict) -> None:
+        """Start playing a game unless it's already being played."""
+        game_id = message['game_id']
+        if game_id in self.running_games:
+            self.rerun_games.add(game_id)
+            return
+
+        self.running_games.add(game_id)
+        WORKER_RUNNING_GAMES.set(len(self.running_games))
+        task = asyncio.create_task(self.run_game(game_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_game(self, game_id: str) -> None:
+        """
+        Step through a game until it waits on a human player or is over.
+
+        A step that fails is retried up to `GAME_WORKER_MAX_RETRIES` times,
+        waiting longer before each retry. If it still fails the players are
+        told, and the game is played again once someone takes an action or
+        reloads the game.
+        """
+        delay = 0
+        failures = 0
+        try:
+            while delay is not None:
+                await asyncio.sleep(delay)
+                self.rerun_games.discard(game_id)
+                try:
+                    delay = await database_sync_to_async(advance_game)(game_id)
+                except Exception:
+                    WORKER_STEP_FAILURES.inc()
+                    failures += 1
+                    if failures > settings.GAME_WORKER_MAX_RETRIES:
+                        raise
+                    delay = (
+                        settings.GAME_WORKER_RETRY_DELAY * 2 ** (failures - 1)
+                    )
+                    logger.exception(
+                        f'Failed to play game {game_id}; '
+                        f'Retrying in {delay:.1f}s'
+                    )
+                    continue
+                failures = 0
+                if delay is None and game_id in self.rerun_games:
+                    delay = 0
+        except Exception:
+            logger.exception(f'Failed to play game {game_id}; Giving up')
+            await self.notify_failure(game_id)
+        finally:
+            self.running_games.discard(game_id)
+            self.rerun_games.discard(game_id)
+            WORKER_RUNNING_GAMES.set(len(self.running_games))
+
+    async def notify_failure(self, game_id: str) -> None:
+        """Tell the players of a game that it couldn't be played."""
+        try:
+            game = await database_sync_to_async(Game.objects.get)(id=game_id)
+            player_ids = [
+                game.player_1_id,
+                game.player_2_id,
+                game.player_3_id,
+                game.player_4_id,
+            ]
+            for player_id in player_ids:
+                await self.channel_layer.group_send(
+                    f'game_{game_id}_player_{player_id}',
+                    {
+                        'type': 'send_payload',
+                        'action': 'notify-user',
+                        'payload': {
+                            'text': (
+                                'Something went wrong playing the bots. '
+                                'Reload the game to try again.'
+                            ),
+                        },
+                    },
+                )
+        except Exception:
+            logger.exception(f'Failed to notify the players of game {game_id}')
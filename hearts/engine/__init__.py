@@ -0,0 +1,7 @@
+"""
+In-memory rules engine for Hearts.
+
+This package has no dependencies on Django so it can be used by the game
+manager, by bots and by offline tooling alike.
+"""
+from hearts.engine.state import HeartsState
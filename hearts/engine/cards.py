@@ -0,0 +1,137 @@
+"""
+Compact card encoding used by the rules engine.
+
+Every card in the deck is represented by a single integer from 0 to 51. Cards
+are grouped by suit and ordered by rank within the suit so that a higher code
+always beats a lower code of the same suit:
+
+    code = suit_index * 13 + rank
+
+Where `rank` is 0 for a two and 12 for an ace. The suit letters match the ones
+stored on the `Card` model so converting between the two is trivial.
+
+Collections of cards (hands, tricks, cards taken, ...) are stored as a
+`CardSet`: a plain int with bit `code` set for every card in the collection.
+This makes questions like "does this hand hold any clubs" a single AND.
+"""
+from typing import Iterable, Iterator
+
+# A set of cards stored as a 52-bit integer.
+CardSet = int
+
+# Suit letters in code order. These match `Card.Suit` values.
+CLUBS = 'c'
+DIAMONDS = 'd'
+SPADES = 's'
+HEARTS = 'h'
+SUITS = (CLUBS, DIAMONDS, SPADES, HEARTS)
+
+# Number of cards in a single suit and in the entire deck.
+SUIT_SIZE = 13
+DECK_SIZE = 52
+
+
+def encode(suit: str, value: int) -> int:
+    """
+    Convert a suit and value into a card code.
+
+    Values follow the `Card` model where an ace is 1 and a king is 13.
+    """
+    rank = (value - 2) % SUIT_SIZE
+    return SUITS.index(suit) * SUIT_SIZE + rank
+
+
+def decode(code: int) -> tuple[str, int]:
+    """Convert a card code back into a suit and value."""
+    suit_index, rank = divmod(code, SUIT_SIZE)
+    value = rank + 2 if rank < 12 else 1
+    return SUITS[suit_index], value
+
+
+def suit_of(code: int) -> str:
+    """Get the suit letter of a card code."""
+    return SUITS[code // SUIT_SIZE]
+
+
+def rank_of(code: int) -> int:
+    """Get the rank of a card code within its suit, from 0 (two) to 12 (ace)."""
+    return code % SUIT_SIZE
+
+
+def bit(code: int) -> CardSet:
+    """Get the CardSet holding a single card."""
+    return 1 << code
+
+
+def to_set(codes: Iterable[int]) -> CardSet:
+    """Build a CardSet from card codes."""
+    cards = 0
+    for code in codes:
+        cards |= 1 << code
+    return cards
+
+
+def iter_cards(cards: CardSet) -> Iterator[int]:
+    """Iterate over the codes in a CardSet from lowest to highest."""
+    while cards:
+        lowest = cards & -cards
+        yield lowest.bit_length() - 1
+        cards ^= lowest
+
+
+def to_list(cards: CardSet) -> list[int]:
+    """Get the codes in a CardSet from lowest to highest."""
+    return list(iter_cards(cards))
+
+
+def count(cards: CardSet) -> int:
+    """Get the number of cards in a CardSet."""
+    return bin(cards).count('1')
+
+
+def lowest(cards: CardSet) -> int:
+    """Get the lowest code in a non-empty CardSet."""
+    return (cards & -cards).bit_length() - 1
+
+
+def highest(cards: CardSet) -> int:
+    """Get the highest code in a non-empty CardSet."""
+    return cards.bit_length() - 1
+
+
+def suit_set(suit: str) -> CardSet:
+    """Get the CardSet holding every card of a suit."""
+    return SUIT_MASKS[SUITS.index(suit)]
+
+
+# Every card of each suit, indexed in the same order as `SUITS`.
+SUIT_MASKS = tuple(
+    ((1 << SUIT_SIZE) - 1) << (index * SUIT_SIZE)
+    for index in range(len(SUITS))
+)
+CLUBS_MASK, DIAMONDS_MASK, SPADES_MASK, HEARTS_MASK = SUIT_MASKS
+FULL_DECK = (1 << DECK_SIZE) - 1
+
+# Cards with special rules.
+TWO_OF_CLUBS = encode(CLUBS, 2)
+QUEEN_OF_SPADES = encode(SPADES, 12)
+
+# Every card worth points when taken.
+POINTS_MASK = HEARTS_MASK | bit(QUEEN_OF_SPADES)
+
+
+def points(code: int) -> int:
+    """Get the number of points a card is worth when taken in a trick."""
+    if code == QUEEN_OF_SPADES:
+        return 13
+    if suit_of(code) == HEARTS:
+        return 1
+    return 0
+
+
+def total_points(cards: CardSet) -> int:
+    """Get the number of points the cards in a CardSet are worth."""
+    total = count(cards & HEARTS_MASK)
+    if cards & bit(QUEEN_OF_SPADES):
+        total += 13
+    return total
@@ -0,0 +1,387 @@
+"""
+Information set Monte Carlo tree search.
+
+A single tree is grown over the moves of every seat from the point of view of
+the seat searching (single observer ISMCTS). Each iteration:
+
+1. Guesses the hands the searching seat can't see with `sample_hands`.
+2. Walks down the tree choosing moves with UCB1, only considering moves that
+   are legal with the guessed hands.
+3. Adds one untried move to the tree.
+4. Plays the rest of the deal out with the policy from `hearts.engine.playout`.
+5. Rewards every move on the way back up by how few points the seat that made
+   it took.
+
+Iterations never build a `HeartsState`. The deal is copied once per iteration
+into a handful of small lists on a reusable `_Deal`, which moves are then
+played on in place.
+
+Searches can be split across processes with root parallelization: every
+process grows its own tree with a different seed and the visits to the root
+moves are added up. This module doesn't depend on Django, so worker processes
+only have to import the engine.
+"""
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from hearts.engine.cards import (
+    HEARTS_MASK,
+    POINTS_MASK,
+    SUIT_MASKS,
+    SUIT_SIZE,
+    TWO_OF_CLUBS,
+    CardSet,
+    bit,
+    count,
+    lowest,
+    total_points,
+)
+from hearts.engine.playout import (
+    finish,
+    sample_hands,
+    trick_points,
+    trick_taker,
+)
+from hearts.engine.state import SEATS, TRICKS_PER_DEAL, HeartsState
+
+# Weight of the exploration term of UCB1. Rewards are between 0 and 1.
+DEFAULT_EXPLORATION = 0.7
+
+# Most points a seat can take in a deal, used to scale rewards to 0-1.
+DEAL_POINTS = total_points(POINTS_MASK)
+
+_TWO_OF_CLUBS_BIT = bit(TWO_OF_CLUBS)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+class SearchResult(NamedTuple):
+    """Visits to the root moves of one or more merged searches."""
+
+    # Number of visits and total reward of every root move, keyed by card.
+    visits: dict[int, int]
+    rewards: dict[int, float]
+
+    iterations: int
+    nodes: int
+    seconds: float
+
+
+class SearchStats(NamedTuple):
+    """Statistics of a finished search, used to tune the budgets."""
+
+    move: int
+    iterations: int
+    iterations_per_second: float
+    nodes: int
+    workers: int
+
+    # Fraction of the root visits that went to the chosen move. Close to 1
+    # means the search was confident.
+    visit_share: float
+
+
+class _Node:
+    """A move in the search tree."""
+
+    __slots__ = (
+        'move',
+        'seat',
+        'parent',
+        'children',
+        'tried',
+        'visits',
+        'availability',
+        'reward',
+    )
+
+    def __init__(
+            self,
+            move: Optional[int] = None,
+            seat: Optional[int] = None,
+            parent: Optional['_Node'] = None,
+    ):
+        self.move = move
+        self.seat = seat
+        self.parent = parent
+        self.children: list['_Node'] = []
+        # CardSet of the moves with a child.
+        self.tried = 0
+        self.visits = 0
+        # Number of times the move was legal when its parent was visited.
+        self.availability = 1
+        self.reward = 0.0
+
+
+class _Deal:
+    """A deal with known hands as plain values that moves are played on."""
+
+    __slots__ = (
+        'hands',
+        'points',
+        'leader',
+        'trick',
+        'tricks_played',
+        'hearts_broken',
+    )
+
+    def reset(self, state: HeartsState, hands: tuple[CardSet, ...]) -> None:
+        """Start the deal over from a state with the given hands."""
+        self.hands = list(hands)
+        self.points = [total_points(taken) for taken in state.taken]
+        self.leader = state.leader
+        self.trick = list(state.trick)
+        self.tricks_played = state.tricks_played
+        self.hearts_broken = state.hearts_broken
+
+    def turn(self) -> int:
+        """Get the seat whose turn it is."""
+        return (self.leader + len(self.trick)) % SEATS
+
+    def legal_moves(self, seat: int) -> CardSet:
+        """Get the cards a seat may play. Same rules as `rules.legal_moves`."""
+        hand = self.hands[seat]
+        if self.trick:
+            moves = hand & SUIT_MASKS[self.trick[0] // SUIT_SIZE] or hand
+        elif self.tricks_played == 0:
+            return hand & _TWO_OF_CLUBS_BIT
+        elif self.hearts_broken:
+            moves = hand
+        else:
+            moves = hand & ~HEARTS_MASK or hand
+
+        if self.tricks_played == 0:
+            moves = moves & ~POINTS_MASK or moves
+        return moves
+
+    def play(self, seat: int, card: int) -> None:
+        """Play a card, taking the trick if it's complete."""
+        self.hands[seat] &= ~(1 << card)
+        self.trick.append(card)
+        if (1 << card) & HEARTS_MASK:
+            self.hearts_broken = True
+        if len(self.trick) == SEATS:
+            self.leader = trick_taker(self.leader, self.trick)
+            self.points[self.leader] += trick_points(self.trick)
+            self.trick = []
+            self.tricks_played += 1
+
+    def is_over(self) -> bool:
+        """Check if every trick has been played."""
+        return self.tricks_played == TRICKS_PER_DEAL
+
+
+def _random_card(cards: CardSet, rng: random.Random) -> int:
+    """Pick a card from a non-empty CardSet at random."""
+    index = rng.randrange(count(cards))
+    for _ in range(index):
+        cards &= cards - 1
+    return lowest(cards)
+
+
+def _select(
+        node: _Node,
+        moves: CardSet,
+        exploration: float,
+) -> _Node:
+    """Choose the child with the best UCB1 score among the legal moves."""
+    best = None
+    best_score = -1.0
+    for child in node.children:
+        if not (1 << child.move) & moves:
+            continue
+        child.availability += 1
+        score = child.reward / child.visits + exploration * math.sqrt(
+            math.log(child.availability) / child.visits,
+        )
+        if score > best_score:
+            best = child
+            best_score = score
+    return best
+
+
+def run_search(
+        state: HeartsState,
+        seat: int,
+        iterations: int,
+        time_budget: Optional[float] = None,
+        seed: Optional[int] = None,
+        exploration: float = DEFAULT_EXPLORATION,
+) -> SearchResult:
+    """
+    Grow a single search tree in this process.
+
+    Args:
+        state (HeartsState): Deal to search. It must be `seat`'s turn.
+        seat (int): Seat searching for a move.
+        iterations (int): Most iterations to run.
+        time_budget (float): Most seconds to search for, if any.
+        seed (int): Seed of the random guesses and moves.
+        exploration (float): Weight of the exploration term of UCB1.
+    """
+    rng = random.Random(seed)
+    started_at = time.perf_counter()
+    deadline = None
+    if time_budget is not None:
+        deadline = started_at + time_budget
+
+    root = _Node()
+    nodes = 1
+    deal = _Deal()
+    completed = 0
+    while completed < iterations:
+        deal.reset(state, sample_hands(state, seat, rng))
+
+        # Walk down the tree while every legal move has been tried.
+        node = root
+        while not deal.is_over():
+            turn = deal.turn()
+            moves = deal.legal_moves(turn)
+            untried = moves & ~node.tried
+            if untried:
+                card = _random_card(untried, rng)
+                child = _Node(card, turn, node)
+                node.children.append(child)
+                node.tried |= 1 << card
+                nodes += 1
+                deal.play(turn, card)
+                node = child
+                break
+            node = _select(node, moves, exploration)
+            deal.play(turn, node.move)
+
+        points = finish(
+            deal.hands,
+            deal.points,
+            deal.leader,
+            deal.trick,
+            deal.tricks_played,
+            deal.hearts_broken,
+        )
+
+        while node is not None:
+            node.visits += 1
+            if node.seat is not None:
+                node.reward += 1 - points[node.seat] / DEAL_POINTS
+            node = node.parent
+
+        completed += 1
+        # Checking the clock every iteration would cost more than it saves.
+        if deadline is not None and not completed % 16:
+            if time.perf_counter() > deadline:
+                break
+
+    return SearchResult(
+        visits={child.move: child.visits for child in root.children},
+        rewards={child.move: child.reward for child in root.children},
+        iterations=completed,
+        nodes=nodes,
+        seconds=time.perf_counter() - started_at,
+    )
+
+
+def merge(results: list[SearchResult]) -> SearchResult:
+    """Add up the root visits of searches run in parallel."""
+    visits: dict[int, int] = {}
+    rewards: dict[int, float] = {}
+    for result in results:
+        for move, move_visits in result.visits.items():
+            visits[move] = visits.get(move, 0) + move_visits
+            rewards[move] = rewards.get(move, 0.0) + result.rewards[move]
+    return SearchResult(
+        visits=visits,
+        rewards=rewards,
+        iterations=sum(result.iterations for result in results),
+        nodes=sum(result.nodes for result in results),
+        seconds=max(result.seconds for result in results),
+    )
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the process pool searches are split across.
+
+    The pool is created on first use and kept for the life of the process.
+    Workers are spawned rather than forked since the game worker runs threads.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        _pool_workers = workers
+    return _pool
+
+
+def search(
+        state: HeartsState,
+        seat: int,
+        iterations: int,
+        time_budget: Optional[float] = None,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        exploration: float = DEFAULT_EXPLORATION,
+) -> tuple[int, SearchStats]:
+    """
+    Search for the best move of a seat.
+
+    Args:
+        state (HeartsState): Deal to search. It must be `seat`'s turn.
+        seat (int): Seat searching for a move.
+        iterations (int): Most iterations to run across every worker.
+        time_budget (float): Most seconds to search for, if any. The search
+            can be stopped at any time and still give its best move so far.
+        workers (int): Number of processes to split the search across. With
+            one worker the search runs in this process.
+        seed (int): Seed of the search. Each worker gets its own seed derived
+            from it.
+        exploration (float): Weight of the exploration term of UCB1.
+
+    Returns:
+        The most visited move and statistics of the search.
+    """
+    rng = random.Random(seed)
+    if workers <= 1:
+        result = run_search(
+            state,
+            seat,
+            iterations,
+            time_budget,
+            rng.getrandbits(64),
+            exploration,
+        )
+    else:
+        pool = get_pool(workers)
+        futures = [
+            pool.submit(
+                run_search,
+                state,
+                seat,
+                -(-iterations // workers),
+                time_budget,
+                rng.getrandbits(64),
+                exploration,
+            )
+            for _ in range(workers)
+        ]
+        result = merge([future.result() for future in futures])
+
+    move = max(result.visits, key=lambda card: result.visits[card])
+    total_visits = sum(result.visits.values())
+    stats = SearchStats(
+        move=move,
+        iterations=result.iterations,
+        iterations_per_second=result.iterations / max(result.seconds, 1e-9),
+        nodes=result.nodes,
+        workers=max(workers, 1),
+        visit_share=result.visits[move] / total_visits,
+    )
+    return move, stats
@@ -0,0 +1,143 @@
+"""
+Compact byte encoding of a whole deal.
+
+A deal can be stored in three short byte strings instead of 52 `Card` rows:
+
+- hands: the four hands as they were dealt, before passing. Each hand is a
+  52-bit `CardSet` packed into `HAND_BYTES` little-endian bytes.
+- passes: three card codes per seat with the cards the seat selected to pass,
+  or `NO_CARD` while the seat hasn't selected yet.
+- plays: card codes in the order they were played. `TRICK_END` is appended
+  once a complete trick has been resolved.
+
+Everything else about the deal (who holds what, who won each trick, the
+points taken) is derived by replaying these through `hearts.engine.rules`.
+"""
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+from hearts.engine import rules
+from hearts.engine.cards import CardSet, iter_cards, to_set
+from hearts.engine.state import SEATS, HeartsState
+
+# Bytes needed to hold a 52-bit CardSet.
+HAND_BYTES = 7
+
+# Number of cards each seat passes.
+PASS_SIZE = 3
+
+# Byte marking a missing pass selection in `passes`.
+NO_CARD = 0xFF
+
+# Byte marking the end of a resolved trick in `plays`.
+TRICK_END = 0xFF
+
+EMPTY_PASSES = bytes([NO_CARD]) * (PASS_SIZE * SEATS)
+
+
+class PackedTrick(NamedTuple):
+    """A trick recovered from a packed play sequence."""
+
+    # Seat that led the trick.
+    leader: int
+
+    # Cards played to the trick, in the order they were played.
+    cards: tuple[int, ...]
+
+    # Seat that took the trick, or None while it hasn't been resolved.
+    winner: Optional[int]
+
+
+def pack_hands(hands: Sequence[CardSet]) -> bytes:
+    """Pack the hands dealt to each seat."""
+    return b''.join(hand.to_bytes(HAND_BYTES, 'little') for hand in hands)
+
+
+def unpack_hands(data: bytes) -> tuple[CardSet, ...]:
+    """Unpack hands packed with `pack_hands`."""
+    return tuple(
+        int.from_bytes(data[seat * HAND_BYTES:(seat + 1) * HAND_BYTES], 'little')
+        for seat in range(SEATS)
+    )
+
+
+def set_pass(passes: bytes, seat: int, cards: Iterable[int]) -> bytes:
+    """Record the cards a seat selected to pass."""
+    cards = sorted(cards)
+    if len(cards) != PASS_SIZE:
+        raise ValueError(f'{len(cards)} cards given; expected {PASS_SIZE}')
+    data = bytearray(passes or EMPTY_PASSES)
+    data[seat * PASS_SIZE:(seat + 1) * PASS_SIZE] = bytes(cards)
+    return bytes(data)
+
+
+def unpack_passes(passes: bytes) -> tuple[Optional[CardSet], ...]:
+    """
+    Unpack the pass selection of each seat.
+
+    Returns:
+        The selected cards of each seat, or None for seats that haven't
+        selected yet.
+    """
+    passes = passes or EMPTY_PASSES
+    selections = []
+    for seat in range(SEATS):
+        codes = passes[seat * PASS_SIZE:(seat + 1) * PASS_SIZE]
+        selections.append(None if NO_CARD in codes else to_set(codes))
+    return tuple(selections)
+
+
+def replay(
+        hands: bytes,
+        passes: bytes,
+        plays: bytes,
+        pass_direction: Optional[str],
+        has_passed: bool,
+        scores: Sequence[int] = (0,) * SEATS,
+) -> tuple[HeartsState, list[PackedTrick]]:
+    """
+    Rebuild the state of a deal from its packed form.
+
+    Args:
+        hands: Hands packed with `pack_hands`.
+        passes: Pass selections built with `set_pass`.
+        plays: Card codes in play order with a `TRICK_END` after every
+            resolved trick.
+        pass_direction: Direction cards get passed this deal, if any.
+        has_passed: Whether the passed cards have been exchanged.
+        scores: Points each seat scored in previous deals.
+
+    Returns:
+        The state of the deal and every trick that has been started.
+
+    Raises:
+        ValueError: If the packed data doesn't describe a legal deal.
+    """
+    state = rules.new_deal(unpack_hands(hands), pass_direction, scores)
+    if not has_passed:
+        # A deal without passing still waits for the manager to start play.
+        state = state._replace(has_passed=False, leader=None)
+    if pass_direction is not None:
+        for seat, selection in enumerate(unpack_passes(passes)):
+            if selection is not None:
+                state = rules.select_pass(state, seat, iter_cards(selection))
+    if has_passed:
+        state = rules.apply_passes(state)
+
+    tricks = []
+    for code in plays or b'':
+        if code == TRICK_END:
+            leader = state.leader
+            trick = state.trick
+            state, winner = rules.resolve_trick(state)
+            tricks[-1] = PackedTrick(leader, trick, winner)
+            continue
+
+        if not state.trick:
+            tricks.append(PackedTrick(state.leader, (), None))
+        seat = rules.current_turn(state)
+        if seat is None:
+            raise ValueError('Card played out of turn')
+        state = rules.play_card(state, seat, code)
+        tricks[-1] = tricks[-1]._replace(cards=state.trick)
+    return state, tricks
+
@@ -0,0 +1,235 @@
+"""
+Lookup table of how good each card is to pass.
+
+A card's value as a pass depends on its suit and rank, how many cards of its
+suit the hand holds, whether the hand holds the queen of spades and enough
+lower spades to hide it behind, and which way the cards are going. Every such
+combination is a cell of the table, holding how many points fewer a hand took
+on average when the card was passed rather than kept.
+
+Values are additive, so the best three card pass by the table is simply the
+three cards with the highest values; no combinations have to be searched.
+
+Tables are built offline by `collect` from many simulated deals in which
+every seat passes three random cards, then stored as a small file of float32s
+by `write_table`. `PassTable` memory maps the file, so every process shares one
+copy and loading it costs nothing.
+"""
+import mmap
+import random
+import struct
+from array import array
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from hearts.engine import rules
+from hearts.engine.cards import (
+    DECK_SIZE,
+    QUEEN_OF_SPADES,
+    SPADES_MASK,
+    SUIT_MASKS,
+    SUIT_SIZE,
+    CardSet,
+    bit,
+    count,
+    iter_cards,
+    rank_of,
+    to_list,
+)
+from hearts.engine.playout import finish
+from hearts.engine.state import PASS_DIRECTIONS, SEATS
+
+# Dimensions of the table, in order.
+DIRECTIONS = tuple(direction for direction in PASS_DIRECTIONS if direction)
+SUIT_LENGTHS = 6
+SPADE_STATES = 3
+SHAPE = (len(DIRECTIONS), len(SUIT_MASKS), SUIT_SIZE, SUIT_LENGTHS, SPADE_STATES)
+SIZE = len(DIRECTIONS) * len(SUIT_MASKS) * SUIT_SIZE * SUIT_LENGTHS * SPADE_STATES
+
+# Spade states.
+NO_QUEEN = 0
+QUEEN_UNPROTECTED = 1
+QUEEN_PROTECTED = 2
+
+# Lower spades needed for the queen of spades to count as protected.
+PROTECTING_SPADES = 3
+
+# Cells seen fewer times than this when passed or when kept are left at 0.
+MIN_SAMPLES = 30
+
+# File layout: magic, table shape, then SIZE little endian float32s.
+MAGIC = b'HPT1'
+_HEADER = struct.Struct(f'<4s{len(SHAPE)}B')
+
+_LOWER_SPADES = SPADES_MASK & (bit(QUEEN_OF_SPADES) - 1)
+
+
+class PassStats(NamedTuple):
+    """Totals gathered from simulated deals for every cell of the table."""
+
+    passed_points: list[float]
+    passed_count: list[int]
+    kept_points: list[float]
+    kept_count: list[int]
+
+
+def spade_state(hand: CardSet) -> int:
+    """Get whether a hand holds the queen of spades and if it's protected."""
+    if not hand & bit(QUEEN_OF_SPADES):
+        return NO_QUEEN
+    if count(hand & _LOWER_SPADES) >= PROTECTING_SPADES:
+        return QUEEN_PROTECTED
+    return QUEEN_UNPROTECTED
+
+
+def cell(direction: str, hand: CardSet, card: int, state: int) -> int:
+    """
+    Get the index of the table cell for passing a card from a hand.
+
+    Args:
+        direction (str): Direction the cards are passed.
+        hand (CardSet): Hand before passing, holding `card`.
+        card (int): Card being considered.
+        state (int): `spade_state` of the hand, passed in so it's only worked
+            out once per hand.
+    """
+    suit = card // SUIT_SIZE
+    length = min(count(hand & SUIT_MASKS[suit]), SUIT_LENGTHS) - 1
+    index = DIRECTIONS.index(direction)
+    index = index * len(SUIT_MASKS) + suit
+    index = index * SUIT_SIZE + rank_of(card)
+    index = index * SUIT_LENGTHS + length
+    return index * SPADE_STATES + state
+
+
+def empty_stats() -> PassStats:
+    """Get totals with nothing counted yet."""
+    return PassStats([0.0] * SIZE, [0] * SIZE, [0.0] * SIZE, [0] * SIZE)
+
+
+def collect(deals: int, seed: Optional[int] = None) -> PassStats:
+    """
+    Simulate deals with random passes and total up the points of each cell.
+
+    Every seat passes three random cards, then the deal is played out with the
+    policy of `hearts.engine.playout`. Each card of each hand counts towards
+    its cell as either passed or kept with the points the hand went on to
+    take. Directions are cycled so each gets the same number of deals.
+    """
+    rng = random.Random(seed)
+    stats = empty_stats()
+    deck = list(range(DECK_SIZE))
+    for number in range(deals):
+        direction = DIRECTIONS[number % len(DIRECTIONS)]
+        rng.shuffle(deck)
+        state = rules.new_deal(rules.deal_hands(deck), direction)
+        hands = state.hands
+        passes = [rng.sample(to_list(hand), 3) for hand in hands]
+        for seat, cards in enumerate(passes):
+            state = rules.select_pass(state, seat, cards)
+        state = rules.apply_passes(state)
+
+        points = finish(
+            list(state.hands),
+            [0] * SEATS,
+            state.leader,
+            [],
+            0,
+            False,
+        )
+        for seat, hand in enumerate(hands):
+            hand_state = spade_state(hand)
+            passed = passes[seat]
+            for card in iter_cards(hand):
+                index = cell(direction, hand, card, hand_state)
+                if card in passed:
+                    stats.passed_points[index] += points[seat]
+                    stats.passed_count[index] += 1
+                else:
+                    stats.kept_points[index] += points[seat]
+                    stats.kept_count[index] += 1
+    return stats
+
+
+def merge(results: list[PassStats]) -> PassStats:
+    """Add up totals gathered in parallel."""
+    stats = empty_stats()
+    for result in results:
+        for total, part in zip(stats, result):
+            for index, value in enumerate(part):
+                total[index] += value
+    return stats
+
+
+def values(stats: PassStats) -> array:
+    """
+    Work out the value of every cell from the totals.
+
+    A value is how many points fewer a hand took on average when the card was
+    passed rather than kept, so higher is a better pass.
+    """
+    table = array('f', bytes(4 * SIZE))
+    for index in range(SIZE):
+        passed = stats.passed_count[index]
+        kept = stats.kept_count[index]
+        if passed >= MIN_SAMPLES and kept >= MIN_SAMPLES:
+            table[index] = (
+                stats.kept_points[index] / kept
+                - stats.passed_points[index] / passed
+            )
+    return table
+
+
+def write_table(path: Union[str, Path], table: array) -> None:
+    """Write a table of values to a file for `PassTable`."""
+    data = array('f', table)
+    if data.itemsize != 4:
+        raise ValueError('float32 arrays are not supported on this platform')
+    # The file is always little endian.
+    if struct.pack('=H', 1) != struct.pack('<H', 1):
+        data.byteswap()
+    with open(path, 'wb') as table_file:
+        table_file.write(_HEADER.pack(MAGIC, *SHAPE))
+        table_file.write(data.tobytes())
+
+
+class PassTable:
+    """A table of pass values memory mapped from a file."""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map a table written by `write_table`.
+
+        Raises:
+            ValueError: If the file isn't a table or has a different layout.
+        """
+        with open(path, 'rb') as table_file:
+            self._mmap = mmap.mmap(
+                table_file.fileno(),
+                0,
+                access=mmap.ACCESS_READ,
+            )
+        magic, *shape = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or tuple(shape) != SHAPE:
+            raise ValueError(f'{path} is not a pass table with shape {SHAPE}')
+        self._values = memoryview(self._mmap)[_HEADER.size:].cast('f')
+        if len(self._values) != SIZE:
+            raise ValueError(f'{path} is truncated')
+
+    def value(self, direction: str, hand: CardSet, card: int) -> float:
+        """Get how good a card is to pass from a hand."""
+        return self._values[cell(direction, hand, card, spade_state(hand))]
+
+    def choose_pass(self, hand: CardSet, direction: str) -> list[int]:
+        """Get the three cards of a hand that are best to pass."""
+        state = spade_state(hand)
+        return sorted(
+            iter_cards(hand),
+            # Higher ranks first among cards of equal value.
+            key=lambda card: (
+                self._values[cell(direction, hand, card, state)],
+                rank_of(card),
+            ),
+            reverse=True,
+        )[:3]
+
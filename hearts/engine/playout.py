@@ -0,0 +1,297 @@
+"""
+Fast playouts of a deal for search based bots.
+
+Search bots can't see the other hands, so they guess them with `sample_hands`
+and play the rest of the deal out many times with `playout` to see how each
+move tends to turn out. Playouts run thousands of times per decision, so
+rather than going through `hearts.engine.rules` and building a new
+`HeartsState` for every card they keep the deal in a few local lists and pick
+cards with a simple fixed policy.
+"""
+import random
+from typing import Optional
+
+from hearts.engine.cards import (
+    FULL_DECK,
+    HEARTS_MASK,
+    POINTS_MASK,
+    QUEEN_OF_SPADES,
+    SUIT_MASKS,
+    SUIT_SIZE,
+    TWO_OF_CLUBS,
+    CardSet,
+    bit,
+    count,
+    highest,
+    lowest,
+    to_list,
+    total_points,
+)
+from hearts.engine.state import SEATS, TRICKS_PER_DEAL, HeartsState
+
+# Attempts at dealing the unseen cards around known voids before giving up on
+# the voids.
+MAX_SAMPLE_ATTEMPTS = 20
+
+_QUEEN_OF_SPADES_BIT = bit(QUEEN_OF_SPADES)
+_TWO_OF_CLUBS_BIT = bit(TWO_OF_CLUBS)
+
+# Hearts are the last suit, so every code from here up is a heart.
+_FIRST_HEART = lowest(HEARTS_MASK)
+
+
+def unseen_cards(state: HeartsState, seat: int) -> CardSet:
+    """Get the cards a seat can't see: everything held by the other seats."""
+    return FULL_DECK & ~state.played & ~state.hands[seat]
+
+
+def sample_hands(
+        state: HeartsState,
+        seat: int,
+        rng: random.Random = random,
+) -> tuple[CardSet, ...]:
+    """
+    Deal the cards unseen by a seat to the other seats at random.
+
+    Every other seat gets as many cards as it really holds and no cards of the
+    suits it has shown to be out of. Suits that only some seats can hold are
+    dealt first so a valid deal is almost always found on the first attempt.
+    If the voids can't be satisfied they are ignored.
+
+    Args:
+        state (HeartsState): The real state of the deal.
+        seat (int): Seat whose point of view the hands are sampled from. Its
+            own hand is kept as it is.
+        rng: Source of randomness.
+
+    Returns:
+        A hand for every seat.
+    """
+    others = [other for other in range(SEATS) if other != seat]
+    unseen = unseen_cards(state, seat)
+    voids = state.voids
+    if not any(voids[other] & unseen for other in others):
+        return _deal(state, others, to_list(unseen), rng)
+
+    suits = []
+    for suit in SUIT_MASKS:
+        if cards := to_list(unseen & suit):
+            allowed = [other for other in others if not voids[other] & suit]
+            suits.append((cards, allowed))
+    suits.sort(key=lambda suit: len(suit[1]))
+
+    for _ in range(MAX_SAMPLE_ATTEMPTS):
+        if hands := _deal_around_voids(state, others, suits, rng):
+            return hands
+
+    # The voids can't be satisfied, e.g. because a seat that took over from
+    # another played differently. Deal without them.
+    return _deal(state, others, to_list(unseen), rng)
+
+
+def _deal_around_voids(
+        state: HeartsState,
+        others: list[int],
+        suits: list[tuple[list[int], list[int]]],
+        rng: random.Random,
+) -> Optional[tuple[CardSet, ...]]:
+    """
+    Deal the unseen cards suit by suit to the seats allowed to hold them.
+
+    Returns:
+        A hand for every seat, or None if a seat filled up before the cards
+        only it could hold were dealt.
+    """
+    hands = list(state.hands)
+    remaining = [count(hand) for hand in state.hands]
+    for other in others:
+        hands[other] = 0
+
+    for cards, allowed in suits:
+        for card in cards:
+            # Pick a seat with a chance proportional to its free space, which
+            # keeps a seat from filling up before the cards only it can hold
+            # are dealt.
+            space = sum(remaining[other] for other in allowed)
+            if not space:
+                return None
+            pick = rng.randrange(space)
+            for other in allowed:
+                pick -= remaining[other]
+                if pick < 0:
+                    hands[other] |= 1 << card
+                    remaining[other] -= 1
+                    break
+    return tuple(hands)
+
+
+def _deal(
+        state: HeartsState,
+        others: list[int],
+        unseen: list[int],
+        rng: random.Random,
+) -> tuple[CardSet, ...]:
+    """Deal the unseen cards at random, ignoring voids."""
+    hands = list(state.hands)
+    rng.shuffle(unseen)
+    start = 0
+    for other in others:
+        end = start + count(state.hands[other])
+        cards = 0
+        for card in unseen[start:end]:
+            cards |= 1 << card
+        hands[other] = cards
+        start = end
+    return tuple(hands)
+
+
+def _lowest_rank(cards: CardSet) -> int:
+    """Get the lowest ranked card of a non-empty CardSet across suits."""
+    best = None
+    for suit in SUIT_MASKS:
+        if cards & suit:
+            card = lowest(cards & suit)
+            if best is None or card % SUIT_SIZE < best % SUIT_SIZE:
+                best = card
+    return best
+
+
+def _highest_rank(cards: CardSet) -> int:
+    """Get the highest ranked card of a non-empty CardSet across suits."""
+    best = None
+    for suit in SUIT_MASKS:
+        if cards & suit:
+            card = highest(cards & suit)
+            if best is None or card % SUIT_SIZE >= best % SUIT_SIZE:
+                best = card
+    return best
+
+
+def _winning_card(trick: list[int], lead_suit: CardSet) -> int:
+    """Get the highest card of the suit led played to a trick so far."""
+    winning = trick[0]
+    for card in trick:
+        if card > winning and (1 << card) & lead_suit:
+            winning = card
+    return winning
+
+
+def rollout_move(
+        hand: CardSet,
+        trick: list[int],
+        tricks_played: int,
+        hearts_broken: bool,
+) -> int:
+    """
+    Pick a card for a seat in a playout.
+
+    The policy is simple but always legal:
+    - Lead the lowest card, avoiding hearts until they're broken.
+    - Follow suit with the highest card that still loses the trick, or the
+      lowest card if every card would win. The last seat takes with its
+      highest card instead since it's winning either way.
+    - Without the suit led, throw away the queen of spades, then the highest
+      heart, then the highest card.
+    """
+    if not trick:
+        if tricks_played == 0 and hand & _TWO_OF_CLUBS_BIT:
+            return TWO_OF_CLUBS
+        moves = hand if hearts_broken else hand & ~HEARTS_MASK or hand
+        return _lowest_rank(moves)
+
+    lead_suit = SUIT_MASKS[trick[0] // SUIT_SIZE]
+    follow = hand & lead_suit
+    if follow:
+        winning = _winning_card(trick, lead_suit)
+        if len(trick) == SEATS - 1 and winning < lowest(follow):
+            return highest(follow)
+        under = follow & ((1 << winning) - 1)
+        if under:
+            return highest(under)
+        return lowest(follow)
+
+    moves = hand
+    if tricks_played == 0:
+        moves = hand & ~POINTS_MASK or hand
+    if moves & _QUEEN_OF_SPADES_BIT:
+        return QUEEN_OF_SPADES
+    if moves & HEARTS_MASK:
+        return highest(moves & HEARTS_MASK)
+    return _highest_rank(moves)
+
+
+def playout(state: HeartsState, move: Optional[int] = None) -> list[int]:
+    """
+    Play the rest of a deal with `rollout_move`.
+
+    Args:
+        state (HeartsState): Deal to play out. Every hand must be known, e.g.
+            sampled with `sample_hands`, and it must be someone's turn.
+        move (int): Card played by the seat whose turn it is. Any later cards
+            are picked by the policy.
+
+    Returns:
+        Points taken by each seat by the end of the deal.
+    """
+    return finish(
+        list(state.hands),
+        [total_points(taken) for taken in state.taken],
+        state.leader,
+        list(state.trick),
+        state.tricks_played,
+        state.hearts_broken,
+        move,
+    )
+
+
+def finish(
+        hands: list[CardSet],
+        points: list[int],
+        leader: int,
+        trick: list[int],
+        tricks_played: int,
+        hearts_broken: bool,
+        move: Optional[int] = None,
+) -> list[int]:
+    """
+    Play the rest of a deal given as plain values. See `playout`.
+
+    The lists passed in are changed as the deal is played, so callers that
+    need them afterwards should pass copies.
+    """
+    while tricks_played < TRICKS_PER_DEAL:
+        seat = (leader + len(trick)) % SEATS
+        hand = hands[seat]
+        if move is None:
+            card = rollout_move(hand, trick, tricks_played, hearts_broken)
+        else:
+            card, move = move, None
+        hands[seat] = hand & ~(1 << card)
+        trick.append(card)
+        if card >= _FIRST_HEART:
+            hearts_broken = True
+
+        if len(trick) == SEATS:
+            leader = trick_taker(leader, trick)
+            points[leader] += trick_points(trick)
+            trick = []
+            tricks_played += 1
+
+    return points
+
+
+def trick_taker(leader: int, trick: list[int]) -> int:
+    """Get the seat taking a complete trick."""
+    winning = _winning_card(trick, SUIT_MASKS[trick[0] // SUIT_SIZE])
+    return (leader + trick.index(winning)) % SEATS
+
+
+def trick_points(trick: list[int]) -> int:
+    """Get the points a trick is worth."""
+    total = 0
+    for card in trick:
+        if card >= _FIRST_HEART:
+            total += 1
+        elif card == QUEEN_OF_SPADES:
+            total += 13
+    return total
@@ -0,0 +1,349 @@
+"""
+Pure functions implementing the rules of Hearts.
+
+Every function here takes a `HeartsState` (and sometimes a seat and card) and
+either answers a question about it or returns a brand new state. None of these
+functions touch the database, which makes them cheap enough to call as often as
+needed while validating moves, running bots or simulating whole games.
+"""
+from typing import Iterable, Optional, Sequence
+
+from hearts.engine.cards import (
+    HEARTS_MASK,
+    POINTS_MASK,
+    QUEEN_OF_SPADES,
+    SUIT_MASKS,
+    SUIT_SIZE,
+    TWO_OF_CLUBS,
+    CardSet,
+    bit,
+    count,
+    highest,
+    to_set,
+    total_points,
+)
+from hearts.engine.state import (
+    PASS_DIRECTIONS,
+    PASS_OFFSETS,
+    SEATS,
+    TRICKS_PER_DEAL,
+    HeartsState,
+)
+
+# Once any player reaches this score the game is over.
+GAME_OVER_SCORE = 100
+
+_EMPTY_SEATS = (0,) * SEATS
+
+
+def pass_direction_for_deal(deal_number: int) -> Optional[str]:
+    """
+    Determine what direction players are passing.
+
+    Passing goes like this:
+    - First hand -> Pass left
+    - Second hand -> Pass right
+    - Third hand -> Pass forward
+    - Fourth hand -> Don't pass
+    - Repeat sequence...
+
+    Args:
+        deal_number (int): 1-based number of the deal within the game.
+    """
+    return PASS_DIRECTIONS[(deal_number - 1) % len(PASS_DIRECTIONS)]
+
+
+def pass_receiver(seat: int, direction: str) -> int:
+    """Get the seat receiving the cards passed by `seat`."""
+    return (seat + PASS_OFFSETS[direction]) % SEATS
+
+
+def deal_hands(deck: Sequence[int]) -> tuple[CardSet, ...]:
+    """Deal a shuffled deck one card at a time to each seat in turn."""
+    return tuple(to_set(deck[seat::SEATS]) for seat in range(SEATS))
+
+
+def new_deal(
+        hands: Sequence[CardSet],
+        pass_direction: Optional[str],
+        scores: Sequence[int] = (0,) * SEATS,
+) -> HeartsState:
+    """
+    Create the state for the start of a deal.
+
+    Args:
+        hands: The cards dealt to each seat.
+        pass_direction: Direction to pass cards this deal, if any.
+        scores: Points each seat scored in previous deals.
+    """
+    state = HeartsState(
+        hands=tuple(hands),
+        passing=_EMPTY_SEATS,
+        pass_direction=pass_direction,
+        has_passed=False,
+        leader=None,
+        trick=(),
+        taken=_EMPTY_SEATS,
+        tricks_played=0,
+        played=0,
+        hearts_broken=False,
+        scores=tuple(scores),
+        voids=_EMPTY_SEATS,
+    )
+    if pass_direction is None:
+        return _start_play(state)
+    return state
+
+
+def holder_of(state: HeartsState, card: int) -> Optional[int]:
+    """Get the seat holding a card, or None if it's not in anyone's hand."""
+    card_bit = bit(card)
+    for seat, hand in enumerate(state.hands):
+        if hand & card_bit:
+            return seat
+    return None
+
+
+def select_pass(
+        state: HeartsState,
+        seat: int,
+        cards: Iterable[int],
+) -> HeartsState:
+    """
+    Mark which cards a seat is going to pass.
+
+    Raises:
+        ValueError: If passing is over or the selection isn't three cards from
+            the seat's hand.
+    """
+    cards = to_set(cards)
+    if state.has_passed:
+        raise ValueError('Already passed this deal')
+    if (number_of_cards := count(cards)) != 3:
+        raise ValueError(f'{number_of_cards} cards given; expected 3')
+    if cards & ~state.hands[seat]:
+        raise ValueError('Can only pass cards in hand')
+
+    passing = list(state.passing)
+    passing[seat] = cards
+    return state._replace(passing=tuple(passing))
+
+
+def is_ready_to_pass(state: HeartsState) -> bool:
+    """Check if every seat has selected the cards they are passing."""
+    return all(count(cards) == 3 for cards in state.passing)
+
+
+def apply_passes(state: HeartsState) -> HeartsState:
+    """
+    Exchange the selected cards between all seats at once.
+
+    Raises:
+        ValueError: If a seat hasn't selected their cards yet.
+    """
+    if state.has_passed:
+        return state
+    if state.pass_direction is None:
+        return _start_play(state)
+    if not is_ready_to_pass(state):
+        raise ValueError('Not every seat has selected cards to pass')
+
+    offset = PASS_OFFSETS[state.pass_direction]
+    hands = tuple(
+        (state.hands[seat] & ~state.passing[seat])
+        | state.passing[(seat - offset) % SEATS]
+        for seat in range(SEATS)
+    )
+    return _start_play(state._replace(hands=hands, passing=_EMPTY_SEATS))
+
+
+def _start_play(state: HeartsState) -> HeartsState:
+    """Finish passing and hand the lead to the holder of the 2 of clubs."""
+    return state._replace(
+        has_passed=True,
+        leader=holder_of(state, TWO_OF_CLUBS),
+    )
+
+
+def current_turn(state: HeartsState) -> Optional[int]:
+    """
+    Get the seat whose turn it is to play.
+
+    Returns None while cards are still being passed, when the current trick
+    has all four cards and is waiting to be resolved, or when the deal is over.
+    """
+    if not state.has_passed or state.leader is None:
+        return None
+    if len(state.trick) == SEATS or is_deal_over(state):
+        return None
+    return (state.leader + len(state.trick)) % SEATS
+
+
+def legal_moves(state: HeartsState, seat: int) -> CardSet:
+    """
+    Get every card a seat is allowed to play right now.
+
+    The rules are:
+    - Only play when it's the correct turn.
+    - Follow suit if possible
+    - Lead first trick with 2 of clubs
+    - Can't play hearts or queen of spades on first trick unless the hand
+      holds nothing else
+    - Can't lead with a heart until they've been broken, unless the hand
+      holds nothing else
+
+    Returns:
+        CardSet of playable cards. Empty if it's not the seat's turn.
+    """
+    if current_turn(state) != seat:
+        return 0
+
+    hand = state.hands[seat]
+    if state.trick:
+        moves = hand & SUIT_MASKS[state.trick[0] // SUIT_SIZE] or hand
+    elif state.tricks_played == 0:
+        return hand & bit(TWO_OF_CLUBS)
+    elif state.hearts_broken:
+        moves = hand
+    else:
+        moves = hand & ~HEARTS_MASK or hand
+
+    if state.tricks_played == 0:
+        moves = moves & ~POINTS_MASK or moves
+    return moves
+
+
+def invalid_move_reason(
+        state: HeartsState,
+        seat: int,
+        card: int,
+) -> Optional[str]:
+    """
+    Determine why a card can't be played right now.
+
+    Returns:
+        Description of the broken rule, or None if the move is valid.
+    """
+    card_bit = bit(card)
+    if legal_moves(state, seat) & card_bit:
+        return None
+
+    if current_turn(state) != seat:
+        return 'Wrong turn'
+    if not state.hands[seat] & card_bit:
+        return 'Card not in hand'
+    if state.trick and not card_bit & SUIT_MASKS[state.trick[0] // SUIT_SIZE]:
+        return 'Must play in-suit card'
+    if state.tricks_played == 0 and not state.trick:
+        return 'First trick must lead with 2 of clubs'
+    if state.tricks_played == 0 and card == QUEEN_OF_SPADES:
+        return 'Can\'t start game with Queen of Spades'
+    if state.tricks_played == 0:
+        return 'Can\'t start game with Heart'
+    return 'Can\'t play hearts until broken'
+
+
+def is_valid_move(state: HeartsState, seat: int, card: int) -> bool:
+    """Determine if a seat can play a card right now."""
+    return bool(legal_moves(state, seat) & bit(card))
+
+
+def play_card(state: HeartsState, seat: int, card: int) -> HeartsState:
+    """
+    Play a card from a seat's hand to the current trick.
+
+    Raises:
+        ValueError: If the card can't be played right now.
+    """
+    if reason := invalid_move_reason(state, seat, card):
+        raise ValueError(reason)
+
+    card_bit = bit(card)
+    hands = list(state.hands)
+    hands[seat] &= ~card_bit
+
+    # Not following suit shows the seat has none of the suit left.
+    voids = state.voids
+    if state.trick:
+        lead_suit = SUIT_MASKS[state.trick[0] // SUIT_SIZE]
+        if not card_bit & lead_suit:
+            voids = list(voids)
+            voids[seat] |= lead_suit
+            voids = tuple(voids)
+
+    return state._replace(
+        hands=tuple(hands),
+        trick=state.trick + (card,),
+        played=state.played | card_bit,
+        hearts_broken=state.hearts_broken or bool(card_bit & HEARTS_MASK),
+        voids=voids,
+    )
+
+
+def trick_winner(leader: int, trick: Sequence[int]) -> int:
+    """
+    Determine which seat takes a trick.
+
+    The winner is whoever played the highest card in the suit that was led.
+    """
+    lead_suit = SUIT_MASKS[trick[0] // SUIT_SIZE]
+    best = highest(to_set(trick) & lead_suit)
+    return (leader + trick.index(best)) % SEATS
+
+
+def resolve_trick(state: HeartsState) -> tuple[HeartsState, int]:
+    """
+    Give a completed trick to its winner, who then leads the next trick.
+
+    Returns:
+        The new state and the seat that won the trick.
+
+    Raises:
+        ValueError: If the current trick doesn't have four cards yet.
+    """
+    if len(state.trick) != SEATS:
+        raise ValueError('Trick is not complete')
+
+    winner = trick_winner(state.leader, state.trick)
+    taken = list(state.taken)
+    taken[winner] |= to_set(state.trick)
+    state = state._replace(
+        leader=winner,
+        trick=(),
+        taken=tuple(taken),
+        tricks_played=state.tricks_played + 1,
+    )
+    return state, winner
+
+
+def is_deal_over(state: HeartsState) -> bool:
+    """Check if every trick in the deal has been played."""
+    return state.tricks_played == TRICKS_PER_DEAL
+
+
+def deal_points(state: HeartsState) -> tuple[int, ...]:
+    """Get the points each seat has taken so far this deal."""
+    return tuple(total_points(cards) for cards in state.taken)
+
+
+def game_scores(state: HeartsState) -> tuple[int, ...]:
+    """Get the total score of each seat including the current deal."""
+    return tuple(
+        score + taken
+        for score, taken in zip(state.scores, deal_points(state))
+    )
+
+
+def game_winner(scores: Sequence[int]) -> Optional[int]:
+    """
+    Determine the winning seat given the total scores.
+
+    The game ends when any seat reaches `GAME_OVER_SCORE`, at which point the
+    seat with the lowest score wins.
+
+    Returns:
+        The winning seat or None if the game isn't over.
+    """
+    if max(scores) < GAME_OVER_SCORE:
+        return None
+    return min(range(len(scores)), key=lambda seat: scores[seat])
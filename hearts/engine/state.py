@@ -0,0 +1,69 @@
+from typing import NamedTuple, Optional
+
+from hearts.engine.cards import CardSet
+
+# Number of players sitting at a table.
+SEATS = 4
+
+# Number of tricks played in a single deal.
+TRICKS_PER_DEAL = 13
+
+# Order in which pass directions rotate from one deal to the next. A deal with
+# no passing is represented with None.
+PASS_DIRECTIONS = ('left', 'right', 'top', None)
+
+# How many seats away (clockwise) the cards go when passing in a direction.
+PASS_OFFSETS = {
+    'left': 1,
+    'top': 2,
+    'right': 3,
+}
+
+
+class HeartsState(NamedTuple):
+    """
+    Immutable snapshot of a single deal.
+
+    Seats are numbered 0-3 and line up with `Game.player_1` through
+    `Game.player_4`. Single cards are stored as codes and collections of cards
+    as `CardSet` bitmasks from `hearts.engine.cards`.
+    Nothing in here knows about the database; the functions in
+    `hearts.engine.rules` take a state and return a new one.
+    """
+
+    # Cards still held by each seat.
+    hands: tuple[CardSet, ...]
+
+    # Cards each seat has selected to pass but which have not moved yet.
+    passing: tuple[CardSet, ...]
+
+    # Direction cards get passed this deal, or None when there is no passing.
+    pass_direction: Optional[str]
+
+    # True once the passed cards have been exchanged.
+    has_passed: bool
+
+    # Seat that leads the current trick. None until passing is complete.
+    leader: Optional[int]
+
+    # Cards played to the current trick, in the order they were played.
+    trick: tuple[int, ...]
+
+    # Cards taken in tricks by each seat this deal.
+    taken: tuple[CardSet, ...]
+
+    # Number of tricks already resolved this deal.
+    tricks_played: int
+
+    # Every card played this deal, including the current trick.
+    played: CardSet
+
+    # True once a heart has been played in any trick this deal.
+    hearts_broken: bool
+
+    # Points scored by each seat in previous deals of the game.
+    scores: tuple[int, ...]
+
+    # Suits each seat has shown to be out of by not following suit, as the
+    # CardSet of every card in those suits.
+    voids: tuple[CardSet, ...] = (0,) * SEATS
@@ -0,0 +1,50 @@
+"""
+What every seat at the table knows about the cards of a deal.
+
+As cards are played everyone sees which cards are gone, whether hearts have
+been broken and which seats failed to follow suit. `HeartsState` keeps this
+public knowledge in `played`, `hearts_broken` and `voids`, which
+`rules.play_card` updates as each card is played. `CardTracker` is a view of
+those fields, taken with `from_state` only when something asks, that answers
+questions like "which cards are still unseen" or "is this seat out of spades"
+with a couple of bitwise operations instead of a pass over the cards of the
+deal.
+"""
+from typing import NamedTuple
+
+from hearts.engine.cards import FULL_DECK, CardSet, suit_set
+from hearts.engine.state import SEATS, HeartsState
+
+
+class CardTracker(NamedTuple):
+    """Cards played so far in a deal and the suits each seat is out of."""
+
+    # Every card played this deal, including the current trick.
+    played: CardSet = 0
+
+    # True once a heart has been played in any trick this deal.
+    hearts_broken: bool = False
+
+    # Suits each seat has shown to be out of by not following suit, as the
+    # CardSet of every card in those suits.
+    voids: tuple[CardSet, ...] = (0,) * SEATS
+
+    @classmethod
+    def from_state(cls, state: HeartsState) -> 'CardTracker':
+        """Get the tracker of a deal."""
+        return cls(state.played, state.hearts_broken, state.voids)
+
+    def is_void(self, seat: int, suit: str) -> bool:
+        """Check if a seat has shown it's out of a suit."""
+        return bool(self.voids[seat] & suit_set(suit))
+
+    def unseen(self, hand: CardSet) -> CardSet:
+        """Get the cards the holder of `hand` can't see."""
+        return FULL_DECK & ~self.played & ~hand
+
+    def possible_cards(self, seat: int, hand: CardSet) -> CardSet:
+        """
+        Get the cards another seat could be holding as far as the holder of
+        `hand` knows.
+        """
+        return self.unseen(hand) & ~self.voids[seat]
@@ -0,0 +1,102 @@
+"""
+Actions players can take in a game.
+
+Actions arrive either as an HTTP POST to `GameTemplateView` or as a message on
+the game websocket handled by `GameConsumer`. Both end up here so the two
+paths always behave the same.
+"""
+from django.db import transaction
+
+from hearts.game.manager import GameManager
+from hearts.instrumentation import instrument
+from hearts.profiling import profile
+from hearts.models import Game, Player
+
+# Every action type a player can send.
+ACTION_TYPES = (
+    'deal-cards',
+    'pass-cards',
+    'play-card',
+    'leave-game',
+)
+
+
+class ActionError(Exception):
+    """Raised when a player's action can't be performed."""
+
+
+def perform_action(
+        game: Game,
+        player: Player,
+        action_type: str,
+        request_data: dict,
+) -> None:
+    """
+    Apply a player's action to a game.
+
+    This only applies the action itself and broadcasts the new game state. It
+    doesn't play any bot turns, callers should schedule the game to be played
+    on the game worker afterwards (see `hearts.game.scheduler`).
+
+    Args:
+        game (Game): Game the action is for.
+        player (Player): Player taking the action.
+        action_type (str): One of `ACTION_TYPES`.
+        request_data (dict): Extra data sent with the action, e.g. `card_id`
+            for `play-card` or `card_ids` for `pass-cards`.
+
+    Raises:
+        ActionError: If the action is unknown or can't be performed.
+    """
+    if action_type not in ACTION_TYPES:
+        raise ActionError(f'Unknown action: {action_type}')
+
+    # The game stays locked until the action's rows and events are committed,
+    # so concurrent actions can't interleave their events.
+    with (
+        instrument(f'action:{action_type}'),
+        profile(action_type, game.id),
+        transaction.atomic(),
+    ):
+        _perform_action(game, player, action_type, request_data)
+
+
+def _perform_action(
+        game: Game,
+        player: Player,
+        action_type: str,
+        request_data: dict,
+) -> None:
+    """Apply a player's action to a game. See `perform_action`."""
+    game_manager = GameManager(game)
+
+    try:
+        match action_type:
+            case 'deal-cards':
+                game_manager.new_deal()
+                game_manager.new_trick()
+            case 'pass-cards':
+                cards = game_manager.get_player_cards(
+                    player,
+                    request_data['card_ids'],
+                )
+                game_manager.set_cards_to_pass(cards)
+            case 'play-card':
+                cards = game_manager.get_player_cards(
+                    player,
+                    [request_data['card_id']],
+                )
+                if not cards:
+                    raise ActionError('Card not found')
+                if not game_manager.play_card(cards[0]):
+                    raise ActionError('Invalid move')
+            case 'leave-game':
+                game_manager.leave(player)
+                return
+            case _:
+                raise ActionError(f'Unknown action: {action_type}')
+    except KeyError as e:
+        raise ActionError(f'Missing field: {e}')
+
+    # Players only hear about the action once it's committed.
+    transaction.on_commit(game_manager.send_game_state_to_client)
@@ -0,0 +1,250 @@
+"""
+Append-only log of everything that happens in a game.
+
+The Card, Trick and Deal rows describe a game as it is right now and get
+rewritten as it goes, e.g. when a player leaves and a bot takes over their
+cards. Alongside them the game manager appends a `GameEvent` for every change:
+
+- deal_seeded: A deal was dealt. `data` has the deal `number` and the `hands`
+  dealt to each seat as `CardSet` ints.
+- pass_selected: `seat` selected the card codes in `data['cards']` to pass.
+- passes_executed: Passing is over and play can start.
+- card_played: `seat` played the card code in `data['card']`.
+- trick_won: `seat` took the completed trick.
+- seat_changed: The player with ID `data['player_id']` sat down in `seat`.
+
+Every `SNAPSHOT_INTERVAL` events a `GameSnapshot` of the rebuilt state is
+stored so `rebuild` only ever has to replay the events after the newest one.
+"""
+import logging
+from typing import NamedTuple, Optional
+
+from django.db.models import Max
+
+from hearts.engine import HeartsState, rules
+from hearts.engine.state import SEATS
+from hearts.models import Game, GameEvent, GameSnapshot
+
+logger = logging.getLogger('django')
+
+# Number of events between snapshots.
+SNAPSHOT_INTERVAL = 100
+
+
+class GameLogState(NamedTuple):
+    """State of a game rebuilt from its event log."""
+
+    # Sequence of the last event applied.
+    sequence: int
+
+    # ID of the player sitting in each seat.
+    players: tuple[Optional[str], ...]
+
+    # Number of the current deal, 0 until the first deal is seeded.
+    deal_number: int
+
+    # State of the current deal, None until the first deal is seeded.
+    deal: Optional[HeartsState]
+
+
+EMPTY_LOG_STATE = GameLogState(
+    sequence=0,
+    players=(None,) * SEATS,
+    deal_number=0,
+    deal=None,
+)
+
+
+def apply_event(
+        log_state: GameLogState,
+        sequence: int,
+        event_type: str,
+        seat: Optional[int],
+        data: dict,
+) -> GameLogState:
+    """
+    Apply a single event to a rebuilt game.
+
+    Raises:
+        ValueError: If the event can't follow the events already applied.
+    """
+    if sequence != log_state.sequence + 1:
+        raise ValueError(
+            f'Expected event {log_state.sequence + 1}, got {sequence}',
+        )
+    log_state = log_state._replace(sequence=sequence)
+
+    if event_type == GameEvent.Type.SEAT_CHANGED:
+        players = list(log_state.players)
+        players[seat] = data['player_id']
+        return log_state._replace(players=tuple(players))
+
+    if event_type == GameEvent.Type.DEAL_SEEDED:
+        scores = (
+            rules.game_scores(log_state.deal)
+            if log_state.deal is not None
+            else (0,) * SEATS
+        )
+        pass_direction = rules.pass_direction_for_deal(data['number'])
+        deal = rules.new_deal(data['hands'], pass_direction, scores)
+        # Play only starts once the passes have been executed, even on deals
+        # without passing.
+        deal = deal._replace(has_passed=False, leader=None)
+        return log_state._replace(deal_number=data['number'], deal=deal)
+
+    deal = log_state.deal
+    if deal is None:
+        raise ValueError(f'{event_type} event before the first deal')
+
+    match event_type:
+        case GameEvent.Type.PASS_SELECTED:
+            deal = rules.select_pass(deal, seat, data['cards'])
+        case GameEvent.Type.PASSES_EXECUTED:
+            deal = rules.apply_passes(deal)
+        case GameEvent.Type.CARD_PLAYED:
+            deal = rules.play_card(deal, seat, data['card'])
+        case GameEvent.Type.TRICK_WON:
+            deal, winner = rules.resolve_trick(deal)
+            if winner != seat:
+                raise ValueError(
+                    f'Trick logged for seat {seat} but seat {winner} won it',
+                )
+        case _:
+            raise ValueError(f'Unknown event type: {event_type}')
+    return log_state._replace(deal=deal)
+
+
+def to_snapshot(log_state: GameLogState) -> dict:
+    """Convert a rebuilt game into a JSON serializable dict."""
+    return {
+        'sequence': log_state.sequence,
+        'players': list(log_state.players),
+        'deal_number': log_state.deal_number,
+        'deal': log_state.deal._asdict() if log_state.deal else None,
+    }
+
+
+def from_snapshot(snapshot: dict) -> GameLogState:
+    """Convert a dict made with `to_snapshot` back into a rebuilt game."""
+    deal = None
+    if snapshot['deal'] is not None:
+        deal = HeartsState(**{
+            field: tuple(value) if isinstance(value, list) else value
+            for field, value in snapshot['deal'].items()
+        })
+    return GameLogState(
+        sequence=snapshot['sequence'],
+        players=tuple(snapshot['players']),
+        deal_number=snapshot['deal_number'],
+        deal=deal,
+    )
+
+
+def rebuild(game: Game) -> GameLogState:
+    """
+    Rebuild a game from its newest snapshot and the events after it.
+
+    Games created before the event log existed can't be rebuilt because their
+    first events are missing.
+
+    Raises:
+        ValueError: If the events don't describe a valid game.
+    """
+    snapshot = GameSnapshot.objects.filter(
+        game=game,
+    ).order_by(
+        '-sequence',
+    ).first()
+    log_state = from_snapshot(snapshot.state) if snapshot else EMPTY_LOG_STATE
+
+    events = GameEvent.objects.filter(
+        game=game,
+        sequence__gt=log_state.sequence,
+    ).order_by(
+        'sequence',
+    ).values_list(
+        'sequence',
+        'type',
+        'seat',
+        'data',
+    )
+    for sequence, event_type, seat, data in events:
+        log_state = apply_event(log_state, sequence, event_type, seat, data)
+    return log_state
+
+
+class EventLog:
+    """
+    Appends events to the log of a single game.
+
+    The sequence of the last event is read once and counted on from there, so
+    events must only be appended while holding the lock `GameManager` takes on
+    the game row, in the same transaction as the changes they describe.
+    Otherwise two processes could both take the next sequence.
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+        self._sequence: Optional[int] = None
+
+    @property
+    def sequence(self) -> int:
+        """Get the sequence of the last event in the log."""
+        if self._sequence is None:
+            self._sequence = GameEvent.objects.filter(
+                game=self.game,
+            ).aggregate(
+                sequence=Max('sequence'),
+            )['sequence'] or 0
+        return self._sequence
+
+    def append(
+            self,
+            event_type: str,
+            seat: Optional[int] = None,
+            **data,
+    ) -> GameEvent:
+        """
+        Append an event to the log.
+
+        This is a single insert except for every `SNAPSHOT_INTERVAL` events,
+        when a snapshot is taken as well.
+
+        Args:
+            event_type (str): One of `GameEvent.Type`.
+            seat (int): 0-based seat the event is about, if any.
+            data: Event specific values. See the module docstring.
+
+        Returns:
+            Newly created GameEvent object.
+        """
+        event = GameEvent.objects.create(
+            game=self.game,
+            sequence=self.sequence + 1,
+            type=event_type,
+            seat=seat,
+            data=data,
+        )
+        self._sequence = event.sequence
+        if event.sequence % SNAPSHOT_INTERVAL == 0:
+            self.snapshot()
+        return event
+
+    def snapshot(self) -> Optional[GameSnapshot]:
+        """
+        Store the current state of the game rebuilt from the log.
+
+        Returns:
+            Newly created GameSnapshot object or None if the log couldn't be
+            rebuilt.
+        """
+        try:
+            log_state = rebuild(self.game)
+        except ValueError as e:
+            logger.info(f'Skipping snapshot: {e}')
+            return None
+        return GameSnapshot.objects.create(
+            game=self.game,
+            sequence=log_state.sequence,
+            state=to_snapshot(log_state),
+        )
@@ -1,17 +1,53 @@
 import logging
 import random
-import time
 from typing import Optional
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db.models import Case, Q, Value, When
 from django.db.transaction import atomic
 
-from hearts.bots.utils import get_bot_from_strategy
-from hearts.models import Card, Deal, Game, Player, Trick
+from hearts.bots import cache
+from hearts.bots.utils import create_bot
+from hearts.engine import HeartsState, rules
+from hearts.engine.cards import (
+    DECK_SIZE,
+    HEARTS_MASK,
+    SUIT_MASKS,
+    SUIT_SIZE,
+    TWO_OF_CLUBS,
+    bit,
+    count,
+    decode,
+    encode,
+    iter_cards,
+    points,
+    to_set,
+    total_points,
+)
+from hearts.engine.state import SEATS
+from hearts.engine.tracker import CardTracker
+from hearts.game import packed
+from hearts.game.events import EventLog
+from hearts.instrumentation import instrumented
+from hearts.metrics import (
+    BOT_THINK_SECONDS,
+    BROADCAST_MESSAGES,
+    BROADCAST_SECONDS,
+    PLAY_STEP_SECONDS,
+    TRICK_RESOLUTION_SECONDS,
+    timed,
+)
+from hearts.models import Card, Deal, Game, GameEvent, Player, Trick
 
 logger = logging.getLogger('django')
 
+# Seconds to wait after a bot plays a card before the next step of the game.
+BOT_PLAY_DELAY = 0.2
+
+# Seconds to leave a completed trick on the table before starting the next.
+TRICK_DELAY = 1.0
+
 
 class GameManager:
     """
@@ -22,13 +58,48 @@ class GameManager:
     """
 
     @atomic
-    def __init__(self, game: Game):
-        """Initialize the game manager with a Game object."""
-        # Make the Game object accessible to instances of this class. Acquire
-        # lock on game object to prevent concurrent game updates.
-        self.game = Game.objects.select_for_update(nowait=True).get(id=game.id)
+    def __init__(self, game: Game, lock: bool = True):
+        """
+        Initialize the game manager with a Game object.
+
+        Args:
+            game (Game): Game to manage.
+            lock (bool): Lock the game row for the rest of the surrounding
+                transaction. Managers that only read the game, e.g. to get its
+                state for a client, should pass False so they don't wait on
+                an action or game worker step in progress.
+        """
+        # Make the Game object accessible to instances of this class. The
+        # players are needed by nearly every method so they're loaded along
+        # with it.
+        games = Game.objects.select_related(
+            'player_1',
+            'player_2',
+            'player_3',
+            'player_4',
+        )
+        if lock:
+            # Acquire lock on game object to prevent concurrent game updates.
+            # Callers run the whole action in a transaction so the lock is
+            # held until its changes and events are committed, and concurrent
+            # actions on the game wait for it rather than failing. Only the
+            # game row is locked.
+            games = games.select_for_update(of=('self',))
+        self.game = games.get(id=game.id)
+
+        # Card objects of the current deal keyed by card code. This is filled
+        # in by `load_state` so changes to the state can be persisted.
+        self.cards: dict[int, Card] = {}
+
+        # Rows and state loaded for the lifetime of this manager. See
+        # `invalidate_cache`.
+        self._cache: dict = {}
+
+        # Every change to the game is also appended to its event log.
+        self.events = EventLog(self.game)
 
     @staticmethod
+    @atomic
     def new_game(player: Player) -> Game:
         """
         Create a new Game.
@@ -54,10 +125,18 @@ class GameManager:
             player_3=bots[1],
             player_4=bots[2],
         )
+        events = EventLog(game)
+        for seat, seated_player in enumerate(game.players):
+            events.append(
+                GameEvent.Type.SEAT_CHANGED,
+                seat,
+                player_id=str(seated_player.id),
+            )
         logger.info('Created new game')
 
         return game
 
+    @instrumented
     def join(self, player: Player) -> None:
         """
         Join a game in progress.
@@ -89,12 +168,19 @@ class GameManager:
                     ).update(
                         player=player,
                     )
+                    self.events.append(
+                        GameEvent.Type.SEAT_CHANGED,
+                        i - 1,
+                        player_id=str(player.id),
+                    )
+                    self.invalidate_cache()
                     logger.info('Joined game. Took over from bot')
                     return
             logger.info('No empty spots in game')
         else:
             logger.info('Player already in game')
 
+    @instrumented
     def leave(self, player: Player) -> None:
         """
         The inverse of joining a game.
@@ -130,27 +216,57 @@ class GameManager:
             ).update(
                 player=bot,
             )
+            self.events.append(
+                GameEvent.Type.SEAT_CHANGED,
+                player_index - 1,
+                player_id=str(bot.id),
+            )
+            self.invalidate_cache()
             logger.info('Left game. Bot taking over')
 
-    def play(self) -> None:
+    @timed(PLAY_STEP_SECONDS)
+    @instrumented
+    def play(self) -> Optional[float]:
         """
-        Play through a trick, stopping for player input.
-
-        This is the main method that runs the entire game. It loops through all
-        players in order until everyone has taken their turn. For bots, it will
-        force them to play automatically. For players, the method will return
-        and then restart once the correct player has played a card.
-
-        Once a trick is complete, the trick will get assigned a winner and a
-        new trick will be delt.
+        Advance the game by a single step, stopping for player input.
+
+        This is the main method that runs the entire game. Each call does at
+        most one of the following:
+        - Start the next trick, or the next deal, once the last trick has been
+          shown to the players.
+        - Pass cards once every player has selected theirs.
+        - Make a bot play its card. For players, the method will return and
+          then get called again once the correct player has played a card.
+        - Assign the winner of a completed trick and check if the game is over.
+
+        Rather than sleeping between steps so the bots don't move too fast, the
+        caller is told how long to wait before the next step. The game worker
+        (see `hearts.consumers.GameWorkerConsumer`) uses this to pace many
+        games at once without holding a thread while it waits.
 
-        Once a deal is complete, a new deal is supposed to start. This is
-        really buggy though and something freezes up at that point. Need to
-        investigate.
+        Returns:
+            Seconds to wait before calling this method again, or None if the
+            game is waiting on a human player or is over.
         """
         if self.game.winning_player is not None:
             logger.info('Skipping playing game: Game already over')
-            return
+            return None
+
+        if self.current_deal is None:
+            logger.info('Skipping playing game: Nothing has been dealt')
+            return None
+
+        # If the last trick has been resolved then move on to the next trick,
+        # or to a new deal if that was the last trick of the deal.
+        trick = self.current_trick
+        if trick is not None and trick.winning_player_id is not None:
+            if rules.is_deal_over(self.load_state()):
+                logger.info('Deal over, starting next deal')
+                self.new_deal()
+                self.new_trick()
+                self.send_game_state_to_client()
+            else:
+                self.new_trick()
 
         logger.info('Starting game play')
         # If the pass has not happened yet, try to trigger it. Else return
@@ -159,63 +275,73 @@ class GameManager:
             self.pass_cards()
             if not self.current_deal.has_passed:
                 logger.info('Exiting play, waiting for pass')
-                return
-        self.send_game_state_to_client()
-
-        trick = self.current_trick
-
-        # Continuously loop until the trick has 4 cards associated with it.
-        while Card.objects.filter(trick=trick).count() < 4:
-            current_turn_player = self.get_current_turn()
-            # If the method to get the current turn returns None then just
-            # return. It's not clear exactly why this happens, but I believe
-            # it's caused by players trying to go out of turn. Breaking out of
-            # the method seems to work fine as the next player will start this
-            # loop again once they play.
-            if current_turn_player is None:
-                return
+                return None
+            self.send_game_state_to_client()
 
-            # Break out of the loop and method if a human player is up. The
-            # game is essentially now paused until the human player takes their
-            # turn. We should eventually add some kind of timer to this and
-            # kick a human player off if inactive for too long.
+        state = self.load_state()
+
+        # Play the next card until the trick has 4 cards associated with it.
+        if len(state.trick) < SEATS:
+            current_turn_seat = rules.current_turn(state)
+            # If there is no current turn then just return. This happens when
+            # the deal is over or the trick hasn't been created yet. The next
+            # action will start the game again.
+            if current_turn_seat is None:
+                return None
+            current_turn_player = self.game.players[current_turn_seat]
+
+            # Return if a human player is up. The game is essentially now
+            # paused until the human player takes their turn. We should
+            # eventually add some kind of timer to this and kick a human player
+            # off if inactive for too long.
             if not current_turn_player.bot:
                 logger.info('Awaiting human player card')
                 self.send_player_notification(
                     player=current_turn_player,
                     notification='Your up',
                 )
-                return
+                return None
 
             # Make the bot play their turn.
-            card = self.get_bot_card_to_play(current_turn_player)
+            card = self.get_bot_card_to_play(current_turn_player, state)
             logger.info('Playing bot card')
-            self.play_card(card)
+            self._play_card(state, card)
             self.send_game_state_to_client()
 
+            # Wait for a bit otherwise the bots move too fast.
+            return BOT_PLAY_DELAY
+
         # At this point the trick has just had the fourth card played.
-        # We determine the winner of the trick by finding the highest value
-        # card that followed suit.
-        cards_in_suit_played = list(Card.objects.filter(
-            trick=trick,
-            suit=trick.first_card.suit,
-        ))
-        cards_in_suit_played.sort(
-            key=lambda x: x.value if x.value > 1 else 99,
-            reverse=True
-        )
-        winner = cards_in_suit_played[0].player
+        return self._resolve_trick(state)
+
+    @timed(TRICK_RESOLUTION_SECONDS)
+    def _resolve_trick(self, state: HeartsState) -> Optional[float]:
+        """
+        Give the completed trick to its winner and check if the game is over.
+
+        Returns:
+            Seconds to wait before the next step of the game, or None if the
+            game is over.
+        """
+        # The engine determines the winner of the trick by finding the highest
+        # value card that followed suit.
+        trick_points = total_points(to_set(state.trick))
+        state, winner_seat = rules.resolve_trick(state)
+        winner = self.game.players[winner_seat]
+        trick = self.current_trick
         trick.winning_player = winner
-        trick.save()
-        logger.info(f'Player {self.game.get_player_index(winner.id)} takes the trick')
+        if self.current_deal.is_packed:
+            packed.save_trick_end(self.current_deal)
+        else:
+            trick.save()
+        self.events.append(GameEvent.Type.TRICK_WON, winner_seat)
+        self._cache['state'] = state
+        logger.info(f'Player {winner_seat + 1} takes the trick')
         for player in self.game.players:
             if player == winner:
-                points = sum(c.score for c in Card.objects.filter(
-                    trick=trick,
-                ))
                 notification_text = 'You take the trick'
-                if points > 0:
-                    notification_text += f'. +{points} points'
+                if trick_points > 0:
+                    notification_text += f'. +{trick_points} points'
                 self.send_player_notification(
                     player=player,
                     notification=notification_text,
@@ -225,32 +351,18 @@ class GameManager:
                     player=player,
                     notification=f'{winner.name} takes the trick',
                 )
-
-        # Sleep for a second to give the human players a chance to see how the
-        # trick played out.
-        time.sleep(1)
         self.send_game_state_to_client()
 
-        # If this was not the last trick in the game then create a new trick
-        # and restart this entire method.
-        if Trick.objects.filter(deal=self.current_deal).count() < 13:
-            self.new_trick()
-            self.play()
-
-        # If the last trick just finished then the game is over and a new deal
-        # should be created followed by a new trick. For some reason, this
-        # doesn't work as expected and sometimes freezes here. Need to dig
-        # further to figure out what is happening.
-        else:
-            player_scores = sorted([
-                (p, sum(c.score for c in Card.objects.filter(deal__game=self.game, trick__winning_player=p)))
-                for p in self.game.players
-            ], key=lambda x: x[1])
-            if player_scores[-1][1] >= 100:
-                winner, score = player_scores[0]
+        # If the last trick of the deal just finished then check if the game
+        # is over.
+        if rules.is_deal_over(state):
+            scores = rules.game_scores(state)
+            winner_seat = rules.game_winner(scores)
+            if winner_seat is not None:
+                winner = self.game.players[winner_seat]
                 self.game.winning_player = winner
                 self.game.save()
-                logger.info(f'Game over: Player {self.game.get_player_index(winner.id)} wins with a score of {score}')
+                logger.info(f'Game over: Player {winner_seat + 1} wins with a score of {scores[winner_seat]}')
                 for player in self.game.players:
                     notification_text = 'Game Over. '
                     if player == winner:
@@ -261,13 +373,14 @@ class GameManager:
                         player=player,
                         notification=notification_text,
                     )
-            else:
-                logger.info('Deal over, starting next deal')
-                self.new_deal()
-                self.new_trick()
-                self.play()
-        self.send_game_state_to_client()
+                self.send_game_state_to_client()
+                return None
+
+        # Wait for a second to give the human players a chance to see how the
+        # trick played out.
+        return TRICK_DELAY
 
+    @instrumented
     def set_cards_to_pass(self, cards: list[Card]) -> None:
         """
         Mark which cards a player is going to pass.
@@ -280,30 +393,83 @@ class GameManager:
         This method is the first step and the `pass_cards` method is the second
         step.
         """
+        state = self.load_state()
+        if state is None:
+            logger.info('Skipping passing: Nothing has been dealt')
+            return
+        self._set_cards_to_pass(state, cards)
+
+    def _set_cards_to_pass(
+            self,
+            state: HeartsState,
+            cards: list[Card],
+    ) -> HeartsState:
+        """
+        Validate and persist a player's pass selection against a loaded state.
+
+        Returns:
+            The state after the selection, which is unchanged if the selection
+            wasn't valid.
+        """
         # Validate the current deal hasn't passed yet.
-        if self.current_deal.has_passed:
+        if state.has_passed:
             logger.info('Skipping passing: Already passed this deal')
-            return
+            return state
 
         # Check if passing is necessary. On every 4th round we skip passing.
-        direction = self.get_pass_direction()
-        if direction is None:
-            self.current_deal.has_passed = True
-            self.current_deal.save()
+        if state.pass_direction is None:
+            deal = self.current_deal
+            deal.has_passed = True
+            deal.save()
+            self.events.append(GameEvent.Type.PASSES_EXECUTED)
             logger.info('Skipping passing: No passing this deal')
-            return
+            state = rules.apply_passes(state)
+            self._cache['state'] = state
+            return state
 
-        # Validate the correct number of cards are getting passed.
+        # Validate the correct number of cards from the player's hand are
+        # getting passed.
         if len(cards) != 3:
             logger.info(f'Skipping passing: {len(cards)} given; expected 3')
-            return
-
-        for card in cards:
-            card.to_pass = True
-            card.save()
-
-        logger.info(f'Player {self.game.get_player_index(cards[0].player_id)} set 3 cards to pass')
+            return state
+        seat = self.get_seat(cards[0].player_id)
+        try:
+            state = rules.select_pass(state, seat, [c.code for c in cards])
+        except ValueError as e:
+            logger.info(f'Skipping passing: {e}')
+            return state
+
+        # Mark the selected cards and clear any previous selection in a single
+        # query.
+        card_ids = [c.id for c in cards]
+        deal = self.current_deal
+        if deal.is_packed:
+            packed.save_pass(deal, seat, [c.code for c in cards])
+        else:
+            Card.objects.filter(
+                deal_id=cards[0].deal_id,
+                player_id=cards[0].player_id,
+                trick__isnull=True,
+            ).update(
+                to_pass=Case(
+                    When(id__in=card_ids, then=Value(True)),
+                    default=Value(False),
+                ),
+            )
+        for card in self.cards.values():
+            if card.player_id == cards[0].player_id and card.trick_id is None:
+                card.to_pass = card.id in card_ids
+
+        self.events.append(
+            GameEvent.Type.PASS_SELECTED,
+            seat,
+            cards=[c.code for c in cards],
+        )
+        logger.info(f'Player {seat + 1} set 3 cards to pass')
+        self._cache['state'] = state
+        return state
 
+    @instrumented
     def pass_cards(self) -> None:
         """
         Pass cards to adjacent players.
@@ -312,63 +478,51 @@ class GameManager:
         random cards.
         """
         deal = self.current_deal
-        direction = self.get_pass_direction()
+        state = self.load_state()
+        direction = state.pass_direction
         if direction is None:
             deal.has_passed = True
             deal.save()
+            self.events.append(GameEvent.Type.PASSES_EXECUTED)
+            self._cache['state'] = rules.apply_passes(state)
             logger.info('Skipping passing on 4th deal')
             return
 
-        for player in self.game.players:
-            cards_to_pass = Card.objects.filter(
-                player=player,
-                deal=deal,
-                to_pass=True,
-            ).count()
-            if cards_to_pass != 3:
+        players = self.game.players
+        for seat, player in enumerate(players):
+            if count(state.passing[seat]) != 3:
                 if not player.bot:
-                    logger.info(f'Waiting for player {self.game.get_player_index(player.id)} to pass')
+                    logger.info(f'Waiting for player {seat + 1} to pass')
                     return
 
-                cards = self.get_bot_cards_to_pass(player)
-                self.set_cards_to_pass(cards)
+                cards = self.get_bot_cards_to_pass(player, state)
+                state = self._set_cards_to_pass(state, cards)
 
-        pass_map = {
-            self.game.player_1_id: {
-                'left': self.game.player_2,
-                'right': self.game.player_4,
-                'top': self.game.player_3,
-            },
-            self.game.player_2_id: {
-                'left': self.game.player_3,
-                'right': self.game.player_1,
-                'top': self.game.player_4,
-            },
-            self.game.player_3_id: {
-                'left': self.game.player_4,
-                'right': self.game.player_2,
-                'top': self.game.player_1,
-            },
-            self.game.player_4_id: {
-                'left': self.game.player_1,
-                'right': self.game.player_3,
-                'top': self.game.player_2,
-            },
-        }
+        if not rules.is_ready_to_pass(state):
+            logger.info('Skipping passing: Not every player has selected cards')
+            return
 
-        for player in self.game.players:
-            receiving_player = pass_map[player.id][direction]
-            Card.objects.filter(
-                deal=self.current_deal,
-                player=player,
-                to_pass=True,
-            ).update(
-                player=receiving_player,
-                to_pass=False,
-            )
+        for seat, player in enumerate(players):
+            receiving_player = players[rules.pass_receiver(seat, direction)]
+            # Packed deals work out who holds the passed cards on load.
+            if not deal.is_packed:
+                Card.objects.filter(
+                    deal=deal,
+                    player=player,
+                    to_pass=True,
+                ).update(
+                    player=receiving_player,
+                    to_pass=False,
+                )
+            # Keep the loaded Card objects in line with the update.
+            for code in iter_cards(state.passing[seat]):
+                self.cards[code].player = receiving_player
+                self.cards[code].to_pass = False
 
         deal.has_passed = True
         deal.save()
+        self.events.append(GameEvent.Type.PASSES_EXECUTED)
+        self._cache['state'] = rules.apply_passes(state)
         logger.info('Passing complete')
 
     def get_pass_direction(self) -> Optional[str]:
@@ -382,17 +536,11 @@ class GameManager:
         - Fourth hand -> Don't pass
         - Repeat sequence...
         """
-        deal_number = Deal.objects.filter(
-            game=self.game,
-        ).count()
-        return [
-            'left',
-            'right',
-            'top',
-            None,
-        ][(deal_number - 1) % 4]
+        deal = self.current_deal
+        return rules.pass_direction_for_deal(deal.number if deal else 0)
 
-    def play_card(self, card: Card) -> None:
+    @instrumented
+    def play_card(self, card: Card) -> bool:
         """
         Play a card from a hand to the current trick.
 
@@ -406,108 +554,89 @@ class GameManager:
 
         Args:
              card (Card): The Card object to play on the current trick.
+
+        Returns:
+            True if the card was played; False if the move was invalid.
         """
-        trick = self.current_trick
+        state = self.load_state()
+        if state is None:
+            return False
+        return self._play_card(state, card) is not state
+
+    def _play_card(self, state: HeartsState, card: Card) -> HeartsState:
+        """
+        Play a card against an already loaded state and persist the change.
 
+        Returns:
+            The state after the card was played, which is unchanged if the
+            move was invalid.
+        """
         # As mentioned in the docstring, return if the card is not a valid
         # move.
-        if not self.is_valid_move(card):
-            return
+        if not self.is_valid_move(card, state):
+            return state
+
+        seat = self.get_seat(card.player_id)
+        new_state = rules.play_card(state, seat, card.code)
+
+        # Use the loaded Card object so the cached cards stay up to date.
+        card = self.cards.get(card.code, card)
 
         # If this is the first card in the trick to be played then set it as
         # the first card on the trick object.
-        if not Card.objects.filter(trick=trick).exists():
+        # Packed deals only record the card in the deal's play sequence, the
+        # trick and card objects are views built from it.
+        trick = self.current_trick
+        deal = self.current_deal
+        if not state.trick:
             trick.first_card = card
-            trick.save()
+            if not deal.is_packed:
+                trick.save()
 
         # "Play" the card.
         card.trick = trick
-        card.save()
+        if deal.is_packed:
+            packed.save_play(deal, card.code)
+        else:
+            card.save()
+        self.events.append(GameEvent.Type.CARD_PLAYED, seat, card=card.code)
 
-        logger.info(f'Player {self.game.get_player_index(card.player_id)} plays card {card.value}{card.suit}')
+        logger.info(f'Player {seat + 1} plays card {card.value}{card.suit}')
 
-        # Sleep for a bit otherwise the bots move too fast.
-        time.sleep(0.2)
+        self._cache['state'] = new_state
+        return new_state
 
-    def is_valid_move(self, card: Card) -> bool:
+    def is_valid_move(
+            self,
+            card: Card,
+            state: Optional[HeartsState] = None,
+    ) -> bool:
         """
         Determine if a given card can be played right now.
 
-        This method is called right before a card is to be played. We need to
-        make sure the card about to be played follows the rules of the game:
-        - Only play when it's the correct turn.
-        - Follow suit if possible
-        - Lead first trick with 2 of clubs
-        - Can't play hearts or queen of spades on first trick
-        - Can't lead with a heart until they've been broken
+        This method is called right before a card is to be played. The rules
+        themselves live in `hearts.engine.rules.legal_moves`.
 
         Args:
             card (Card): The Card object to check if can be played now.
+            state (HeartsState): State of the current deal. Loaded from the
+                database if not given.
 
         Returns:
             True of card can be played; False if card cannot be played.
         """
-        # Card is from a player trying to play out of turn.
-        current_turn = self.get_current_turn()
-        if not current_turn or current_turn != card.player:
-            print(f'Invalid move: Wrong turn, {current_turn=} player={card.player}')
+        if state is None:
+            state = self.load_state()
+        if state is None:
+            logger.info('Invalid move: Nothing has been dealt')
+            return False
+
+        seat = self.get_seat(card.player_id)
+        if not rules.is_valid_move(state, seat, card.code):
+            reason = rules.invalid_move_reason(state, seat, card.code)
+            logger.info(f'Invalid move: {reason}')
             return False
 
-        # Tried to play out-of-suit when the player has an in-suit card.
-        first_card = self.current_trick.first_card
-        if first_card:
-            if card.suit != first_card.suit:
-                has_suited_card = Card.objects.filter(
-                    suit=first_card.suit,
-                    deal=self.current_deal,
-                    trick__isnull=True,
-                    player=card.player,
-                ).exists()
-                if has_suited_card:
-                    print('Invalid move: Must play in-suit card')
-                    return False
-
-        is_first_trick = not Trick.objects.filter(
-            deal=self.current_deal,
-        ).exclude(id=self.current_trick.id).exists()
-        if is_first_trick:
-            # Trying to play hearts on first trick.
-            if card.suit == Card.Suit.HEARTS:
-                print('Invalid move: Can\'t start game with Heart')
-                return False
-            # Trying to play queen of spades on first trick.
-            if card.suit == Card.Suit.SPADES and card.value == 12:
-                print('Invalid move: Can\'t start game with Queen of Spades')
-                return False
-
-        # Force player to play 2 of clubs on first card of the first trick.
-        if is_first_trick and not first_card:
-            if card.suit != Card.Suit.CLUBS or card.value != 2:
-                print('Invalid move: First trick must lead with 2 of clubs')
-                return False
-
-        # Check if hearts have been broken. The only exception here is if the
-        # player only has hearts in their hand.
-        if not first_card and card.suit == Card.Suit.HEARTS:
-            is_hearts_broken = Card.objects.filter(
-                suit=Card.Suit.HEARTS,
-                deal=self.current_deal,
-                trick__isnull=False,
-            ).exists()
-            if not is_hearts_broken:
-                has_non_hearts = Card.objects.filter(
-                    deal=self.current_deal,
-                    trick__isnull=True,
-                    player=card.player,
-                ).exclude(
-                    suit=Card.Suit.HEARTS,
-                ).exists()
-                if has_non_hearts:
-                    print('Invalid move: Can\'t play hearts until broken')
-                    return False
-
-        # If none of the checks caught a bad move then we assume the move must
-        # be good.
         return True
 
     def get_game_state(self, player: Player, is_observer: bool = False) -> dict:
@@ -551,61 +680,46 @@ class GameManager:
                 }
             }
         """
-        # Initialize state with static values.
-        game_state = {
-            'game_id': str(self.game.id),
-            'player_id': str(player.id),
-            'trick': {},
-            'current_turn_relative_position': None,
-            'is_observer': is_observer,
-        }
+        player_index = self.game.get_player_index(player.id)
+        return self.get_game_states(is_observer)[player_index - 1]
+
+    @instrumented
+    def get_game_states(self, is_observer: bool = False) -> list[dict]:
+        """
+        Get the derived state of a Game for every player at once.
+
+        All cards of the current deal are loaded once and the parts of the
+        state every player sees are built once. The state of each player is
+        then derived from those in memory. See `get_game_state` for the format
+        of each state.
 
+        Returns:
+            List of game states ordered by the players' absolute position.
+        """
         current_deal = self.current_deal
         current_trick = self.current_trick
+        state = self.load_state()
 
-        # Determine next action required by player.
+        # Determine next action required by players.
         if not current_deal:
             action = 'deal-cards'
         elif not current_deal.has_passed:
             action = 'pass-cards'
         else:
             action = 'play-card'
-        game_state['action'] = action
-
-        # Check if passing has occurred already.
-        if current_deal:
-            game_state['has_passed'] = current_deal.has_passed
-        else:
-            game_state['has_passed'] = None
 
-        # Determine the players absolute and relative positions.
-        player_index = self.game.get_player_index(player.id)
-        player_positions = ['bottom', 'left', 'top', 'right']
-        player_position_map = {
-            index: player_positions[(index + (4 - player_index)) % 4]
-            for index in range(1, 5)
-        }
-
-        # Get the suit of the first card played in the suit if applicable.
-        game_state['trick_suit'] = None
-        if current_trick and current_trick.first_card:
-            game_state['trick_suit'] = current_trick.first_card.suit
-
-        current_turn = self.get_current_turn()
-
-        # Loop through each player and fill out the state for them individually.
-        for absolute_pos, relative_pos in player_position_map.items():
-            # Get the cards currently in the players hand.
-            current_player = getattr(self.game, f'player_{absolute_pos}')
-            hand = []
-            if current_deal:
-                cards = Card.objects.filter(
-                    player=current_player,
-                    deal=current_deal,
-                    trick__isnull=True,
+        # Get the cards in every player's hand as well as the cards played on
+        # the current trick.
+        hands = [[] for _ in range(SEATS)]
+        trick_cards = {}
+        trick_suit = None
+        if state is not None:
+            for seat, hand in enumerate(state.hands):
+                cards = sorted(
+                    (self.cards[code] for code in iter_cards(hand)),
+                    key=lambda x: x.sort_key,
                 )
-                cards = sorted(list(cards), key=lambda x: x.sort_key)
-                hand = [
+                hands[seat] = [
                     {
                         'id': str(card.id),
                         'suit': card.suit,
@@ -613,79 +727,123 @@ class GameManager:
                     }
                     for card in cards
                 ]
+        if current_trick:
+            for card in self.cards.values():
+                if card.trick_id != current_trick.id:
+                    continue
+                trick_cards[self.get_seat(card.player_id)] = {
+                    'suit': card.suit,
+                    'value': card.value,
+                }
+                if card.id == current_trick.first_card_id:
+                    trick_suit = card.suit
+
+        current_turn = rules.current_turn(state) if state else None
+        player_positions = ['bottom', 'left', 'top', 'right']
 
-            # Update the top-level current turn value if it's this players turn.
-            is_turn = current_player == current_turn
-            if is_turn:
-                game_state['current_turn_relative_position'] = relative_pos
-
-            # Add player's state to the top-level dict.
-            game_state[f'player_{relative_pos}'] = {
-                'player_id': str(current_player.id),
-                'relative_position': relative_pos,
-                'absolute_position': absolute_pos,
-                'is_turn': is_turn,
-                'hand': hand,
+        game_states = []
+        for seat, player in enumerate(self.game.players):
+            # Initialize state with the values shared by every player.
+            game_state = {
+                'game_id': str(self.game.id),
+                'player_id': str(player.id),
+                'trick': {},
+                'current_turn_relative_position': None,
+                'is_observer': is_observer,
+                'action': action,
+                'has_passed': current_deal.has_passed if current_deal else None,
+                'trick_suit': trick_suit,
             }
 
-            # Lastly, update the trick with this player's card if they've
-            # played on this trick already.
-            if current_trick:
-                card_played = Card.objects.filter(
-                    trick=current_trick,
-                    player=current_player,
-                ).last()
-                card = None
-                if card_played:
-                    card = {
-                        'suit': card_played.suit,
-                        'value': card_played.value,
-                    }
-                game_state['trick'][relative_pos] = card
+            # Loop through each player and fill out the state for them
+            # relative to this player's position.
+            for other_seat, other_player in enumerate(self.game.players):
+                relative_pos = player_positions[(other_seat - seat) % SEATS]
+
+                # Update the top-level current turn value if it's this
+                # players turn.
+                is_turn = other_seat == current_turn
+                if is_turn:
+                    game_state['current_turn_relative_position'] = relative_pos
+
+                # Add player's state to the top-level dict.
+                game_state[f'player_{relative_pos}'] = {
+                    'player_id': str(other_player.id),
+                    'relative_position': relative_pos,
+                    'absolute_position': other_seat + 1,
+                    'is_turn': is_turn,
+                    'hand': hands[other_seat],
+                }
+
+                # Lastly, update the trick with this player's card if they've
+                # played on this trick already.
+                if current_trick:
+                    game_state['trick'][relative_pos] = trick_cards.get(other_seat)
+
+            if self.game.winning_player:
+                game_state['trick'] = {}
 
-        if self.game.winning_player:
-            game_state['trick'] = {}
+            game_states.append(game_state)
 
-        return game_state
+        return game_states
 
+    @instrumented
+    @atomic
     def new_deal(self) -> Deal:
         """
         Create and start a new deal.
 
         This not only create a new Deal object but also creates a new deck of
-        cards, shuffles it, and deals it.
+        cards, shuffles it, and deals it. The deck is shuffled and assigned to
+        players in memory so the whole deal is written with a single bulk
+        insert. It doesn't send the game state, callers send players a single
+        update once the deal has been started.
 
         Returns:
             Newly created Deal object.
         """
-        # Create Deal.
-        deal = Deal.objects.create(game=self.game)
-        logger.info('Created new Deal')
-
-        # Create new deck of Cards.
-        cards = []
-        for suit in Card.Suit:
-            for value in range(1, 14):
-                card = Card.objects.create(
+        # Shuffle a new deck to deal one card at a time to each player.
+        previous_deal = self.current_deal
+        number = previous_deal.number + 1 if previous_deal else 1
+        deck = list(range(DECK_SIZE))
+        random.shuffle(deck)
+        hands = rules.deal_hands(deck)
+
+        if packed.use_packed_storage():
+            # Packed deals keep the hands on the Deal row, no cards needed.
+            deal = packed.create_deal(self.game.id, number, hands)
+            logger.info('Created new packed Deal')
+        else:
+            deal = Deal.objects.create(game=self.game, number=number)
+            logger.info('Created new Deal')
+
+            players = self.game.players
+            cards = []
+            for index, code in enumerate(deck):
+                suit, value = decode(code)
+                cards.append(Card(
                     deal=deal,
+                    player=players[index % len(players)],
                     suit=suit,
                     value=value,
-                )
-                cards.append(card)
-
-        # Shuffle cards.
-        random.shuffle(cards)
+                ))
+            Card.objects.bulk_create(cards)
+        self.events.append(
+            GameEvent.Type.DEAL_SEEDED,
+            number=number,
+            hands=list(hands),
+        )
 
-        # Deal cards.
-        players = self.game.players
-        for index, card in enumerate(cards):
-            card.player = players[index % len(players)]
-            card.save()
-            self.send_game_state_to_client()
+        # The new deal replaces everything cached about the previous one.
+        self.invalidate_cache()
+        self._cache['deal'] = deal
+        if not deal.is_packed:
+            self._cache['trick'] = None
 
         logger.info('Shuffled and dealt')
         return deal
 
+    @instrumented
     def new_trick(self) -> Optional[Trick]:
         """
         Create new trick.
@@ -698,18 +856,18 @@ class GameManager:
         if not deal:
             return
 
-        try:
-            latest_trick = Trick.objects.filter(
-                deal=deal,
-            ).latest('created_at')
-        except Trick.DoesNotExist:
-            pass
-        else:
-            if latest_trick.winning_player is None:
-                return
+        latest_trick = self.current_trick
+        if latest_trick and latest_trick.winning_player_id is None:
+            return
 
-        # Create and return new Trick.
-        trick = Trick.objects.create(deal=deal)
+        # Create and return new Trick. Tricks of packed deals only exist in
+        # memory until their first card is played.
+        number = latest_trick.number + 1 if latest_trick else 1
+        if deal.is_packed:
+            trick = packed.trick_view(deal, number)
+        else:
+            trick = Trick.objects.create(deal=deal, number=number)
+        self._cache['trick'] = trick
         logger.info('Created new trick')
         return trick
 
@@ -717,86 +875,261 @@ class GameManager:
         """
         Get the player whose turn it currently is.
 
-        This method basically follows the simple rules to determine who should
-        go next. If for some reason this method can't determine who should
-        go next, None will be returned. This method needs to be updated to not
-        ever return None because logically it never makes sense for it to be
-        nobody's turn.
+        If nobody can play right now, e.g. the cards haven't been passed yet
+        or the deal is over, None will be returned.
 
         Returns:
             Player who should play next.
         """
-        if not self.current_deal or not self.current_deal.has_passed:
+        state = self.load_state()
+        if state is None:
+            return None
+
+        seat = rules.current_turn(state)
+        if seat is None:
+            return None
+        return self.game.players[seat]
+
+    def get_player_cards(
+            self,
+            player: Player,
+            card_ids: list[str],
+    ) -> list[Card]:
+        """
+        Get cards of the current deal held by a player given their IDs.
+
+        Cards are looked up in the loaded deal rather than queried so this
+        works the same for deals stored as rows and packed deals.
+
+        Returns:
+            The matching cards. IDs that don't match a card held by the player
+            are left out.
+        """
+        self.load_state()
+        card_ids = {str(card_id) for card_id in card_ids}
+        return [
+            card
+            for card in self.cards.values()
+            if str(card.id) in card_ids and card.player_id == player.id
+        ]
+
+    def get_seat(self, player_id: str) -> Optional[int]:
+        """Get the 0-based engine seat of a player, or None if not in game."""
+        player_index = self.game.get_player_index(player_id)
+        if player_index is None:
+            return None
+        return player_index - 1
+
+    @instrumented
+    def load_state(self) -> Optional[HeartsState]:
+        """
+        Load the current deal into an in-memory engine state.
+
+        Every rule is answered by `hearts.engine` using this state, so rather
+        than running a query per rule we load all cards of the current deal
+        once and keep the state up to date in memory as actions are taken.
+        The Card objects are kept on `self.cards`, keyed by card code, so that
+        changes can be persisted afterwards.
+
+        Returns:
+            State of the current deal or None if nothing has been dealt.
+        """
+        if 'state' in self._cache:
+            return self._cache['state']
+
+        deal = self.current_deal
+        if deal is None:
+            self.cards = {}
             return None
 
-        cards_played = Card.objects.filter(
-            trick=self.current_trick,
+        if deal.is_packed:
+            state, self.cards, self._cache['trick'] = packed.load_deal(
+                deal,
+                self.game.players,
+                self.get_pass_direction(),
+                self._get_previous_scores(deal),
+            )
+            self._cache['state'] = state
+            return state
+
+        cards = list(Card.objects.filter(deal=deal).select_related('trick'))
+        self.cards = {card.code: card for card in cards}
+
+        hands = [0] * SEATS
+        passing = [0] * SEATS
+        taken = [0] * SEATS
+        played = 0
+        tricks = {}
+        for card in cards:
+            if card.trick_id is None:
+                if (seat := self.get_seat(card.player_id)) is not None:
+                    hands[seat] |= bit(card.code)
+                    if card.to_pass and not deal.has_passed:
+                        passing[seat] |= bit(card.code)
+            else:
+                played |= bit(card.code)
+                tricks.setdefault(card.trick_id, []).append(card)
+
+        # Split played cards into resolved tricks and the trick in progress.
+        leader = None
+        current_trick = ()
+        last_trick = None
+        voids = [0] * SEATS
+        for trick_cards in tricks.values():
+            trick = trick_cards[0].trick
+            trick_cards.sort(key=lambda c: (c.id != trick.first_card_id, c.created_at))
+
+            # Whoever didn't follow suit is out of the suit that was led.
+            lead_suit = SUIT_MASKS[trick_cards[0].code // SUIT_SIZE]
+            for card in trick_cards[1:]:
+                if not bit(card.code) & lead_suit:
+                    voids[self.get_seat(card.player_id)] |= lead_suit
+
+            if trick.winning_player_id is None:
+                current_trick = tuple(c.code for c in trick_cards)
+                leader = self.get_seat(trick_cards[0].player_id)
+            else:
+                winner = self.get_seat(trick.winning_player_id)
+                taken[winner] |= to_set(c.code for c in trick_cards)
+                if last_trick is None or trick.number > last_trick.number:
+                    last_trick = trick
+
+        # Whoever won the last trick leads the next one.
+        if leader is None and last_trick is not None:
+            leader = self.get_seat(last_trick.winning_player_id)
+
+        state = HeartsState(
+            hands=tuple(hands),
+            passing=tuple(passing),
+            pass_direction=self.get_pass_direction(),
+            has_passed=deal.has_passed,
+            leader=leader,
+            trick=current_trick,
+            taken=tuple(taken),
+            tricks_played=len(tricks) - bool(current_trick),
+            played=played,
+            hearts_broken=bool(played & HEARTS_MASK),
+            scores=self._get_previous_scores(deal),
+            voids=tuple(voids),
         )
 
-        # If no cards have been played in current trick, then it's the turn of
-        # the winner of the last trick.
-        if cards_played.count() == 0:
-            last_trick = Trick.objects.filter(
-                deal=self.current_deal,
-            ).exclude(
-                id=self.current_trick.id,
-            ).order_by('created_at').last()
-            if last_trick:
-                return last_trick.winning_player
-
-            # If this is the first card of the first trick, then the player who
-            # has the 2 of clubs will start.
-            two_of_clubs = Card.objects.get(
-                deal=self.current_deal,
-                value=2,
-                suit=Card.Suit.CLUBS,
-                trick__isnull=True,
+        # If no trick has been played yet then the 2 of clubs leads.
+        if state.has_passed and state.leader is None:
+            state = state._replace(
+                leader=rules.holder_of(state, TWO_OF_CLUBS),
             )
-            return two_of_clubs.player
 
-        # If a card has already been played then determine the next player in
-        # a clockwise rotation.
-        players_played = [
-            self.game.get_player_index(card.player_id)
-            for card in cards_played
-        ]
-        for i in [1, 2, 3, 4]:
-            if i in players_played:
-                for j in [(n + i - 1) % 4 + 1 for n in range(1, 5)]:
-                    if j not in players_played:
-                        return getattr(self.game, f'player_{j}')
+        self._cache['state'] = state
+        return state
+
+    def _get_previous_scores(self, deal: Deal) -> tuple[int, ...]:
+        """Get the points each seat took in the deals before `deal`."""
+        scores = [0] * SEATS
+        point_cards = Card.objects.filter(
+            Q(suit=Card.Suit.HEARTS) | Q(suit=Card.Suit.SPADES, value=12),
+            deal__game=self.game,
+            trick__winning_player__isnull=False,
+        ).exclude(
+            deal=deal,
+        ).values_list(
+            'trick__winning_player_id',
+            'suit',
+            'value',
+        )
+        for player_id, suit, value in point_cards:
+            if (seat := self.get_seat(player_id)) is not None:
+                scores[seat] += points(encode(suit, value))
+
+        # Packed deals have no cards to query, replay them instead.
+        packed_deals = Deal.objects.filter(
+            game=self.game,
+            number__lt=deal.number,
+            packed_hands__isnull=False,
+        )
+        for packed_deal in packed_deals:
+            state, _ = packed.replay(
+                packed_deal,
+                rules.pass_direction_for_deal(packed_deal.number),
+            )
+            for seat, deal_points in enumerate(rules.deal_points(state)):
+                scores[seat] += deal_points
+        return tuple(scores)
 
-    def get_bot_cards_to_pass(self, player: Player) -> list[Card]:
+    def get_bot_cards_to_pass(
+            self,
+            player: Player,
+            state: HeartsState,
+    ) -> list[Card]:
         """Interface with bot to determine cards to pass."""
-        BotImplementation = get_bot_from_strategy(player.bot_strategy)
-        bot = BotImplementation(player, self.game)
-        return bot.get_cards_to_pass()
+        bot = create_bot(player.bot_strategy, player, self.game, state, self.cards)
+        return cache.get_cards_to_pass(bot, player.bot_strategy)
 
-    def get_bot_card_to_play(self, player: Player) -> Card:
+    def get_bot_card_to_play(
+            self,
+            player: Player,
+            state: HeartsState,
+    ) -> Card:
         """Interface with bot to determine card to play."""
-        BotImplementation = get_bot_from_strategy(player.bot_strategy)
-        bot = BotImplementation(player, self.game)
-        return bot.get_card_to_play()
+        bot = create_bot(player.bot_strategy, player, self.game, state, self.cards)
+        with BOT_THINK_SECONDS.time(strategy=type(bot).__name__):
+            return cache.get_card_to_play(bot, player.bot_strategy)
+
+    @property
+    def tracker(self) -> Optional[CardTracker]:
+        """Get what every seat knows about the cards of the current deal."""
+        state = self.load_state()
+        if state is None:
+            return None
+        return CardTracker.from_state(state)
 
     @property
     def current_deal(self) -> Optional[Deal]:
         """Get and store current deal in memory."""
-        try:
-            return Deal.objects.filter(
-                game=self.game,
-            ).latest('created_at')
-        except Deal.DoesNotExist:
-            return None
+        if 'deal' not in self._cache:
+            try:
+                self._cache['deal'] = Deal.objects.filter(
+                    game=self.game,
+                ).latest('number')
+            except Deal.DoesNotExist:
+                self._cache['deal'] = None
+        return self._cache['deal']
 
     @property
     def current_trick(self) -> Optional[Trick]:
         """Get and store current trick in memory."""
-        try:
-            return Trick.objects.filter(
-                deal=self.current_deal,
-            ).latest('created_at')
-        except Trick.DoesNotExist:
-            return None
+        if 'trick' not in self._cache:
+            if self.current_deal is not None and self.current_deal.is_packed:
+                # Loading a packed deal builds its current trick.
+                self.load_state()
+                return self._cache['trick']
+            try:
+                self._cache['trick'] = Trick.objects.filter(
+                    deal=self.current_deal,
+                ).latest('number')
+            except Trick.DoesNotExist:
+                self._cache['trick'] = None
+        return self._cache['trick']
+
+    def invalidate_cache(self, *keys: str) -> None:
+        """
+        Forget rows and state loaded by this manager.
+
+        The current deal, current trick and deal state are loaded once and
+        then kept in memory. Methods that change them either update the cache
+        directly or call this so the next access reloads from the database.
+
+        Args:
+            keys: Any of 'deal', 'trick' or 'state'. Everything is forgotten
+                if no keys are given.
+        """
+        if not keys:
+            keys = ('deal', 'trick', 'state')
+        for key in keys:
+            self._cache.pop(key, None)
+        if 'state' in keys:
+            self.cards = {}
+            # The trick of a packed deal is built along with its state.
+            self._cache.pop('trick', None)
 
     def send_player_notification(
             self,
@@ -817,12 +1150,14 @@ class GameManager:
             },
         )
 
+    @timed(BROADCAST_SECONDS)
+    @instrumented
     def send_game_state_to_client(self) -> None:
         """Send the game state to all players via websockets."""
         channel_layer = get_channel_layer()
-        for player in self.game.players:
+        game_states = self.get_game_states()
+        for player, game_state in zip(self.game.players, game_states):
             group = f'game_{self.game.id}_player_{player.id}'
-            game_state = self.get_game_state(player)
             async_to_sync(channel_layer.group_send)(
                 group,
                 {
@@ -831,3 +1166,4 @@ class GameManager:
                     'payload': game_state,
                 },
             )
+        BROADCAST_MESSAGES.inc(len(game_states))
@@ -0,0 +1,166 @@
+"""
+Card and Trick views of deals stored in packed form.
+
+When `DEAL_STORAGE` is 'packed' a deal doesn't get any Card or Trick rows.
+Its hands, pass selections and plays are kept as bytes on the Deal row (see
+`hearts.engine.packing`) and unsaved Card and Trick objects are built from
+them whenever the deal is loaded. The rest of the game manager, the bots and
+the game state sent to players work with these objects exactly like they do
+with rows, they just must never be saved.
+"""
+from typing import Optional, Sequence
+from uuid import UUID, uuid5
+
+from django.conf import settings
+
+from hearts.engine import HeartsState, packing, rules
+from hearts.engine.cards import DECK_SIZE, bit, decode, iter_cards
+from hearts.engine.state import SEATS, TRICKS_PER_DEAL
+from hearts.models import Card, Deal, Player, Trick
+
+
+def use_packed_storage() -> bool:
+    """Check if new deals should be stored packed."""
+    return settings.DEAL_STORAGE == 'packed'
+
+
+def create_deal(
+        game_id: UUID,
+        number: int,
+        hands: Sequence[int],
+) -> Deal:
+    """Create a packed deal from the hands dealt to each seat."""
+    return Deal.objects.create(
+        game_id=game_id,
+        number=number,
+        packed_hands=packing.pack_hands(hands),
+        packed_passes=packing.EMPTY_PASSES,
+        packed_plays=b'',
+    )
+
+
+def card_id(deal: Deal, code: int) -> UUID:
+    """Get the stable ID of a card in a packed deal."""
+    return uuid5(deal.id, f'card-{code}')
+
+
+def trick_view(deal: Deal, number: int) -> Trick:
+    """Build an unsaved Trick standing in for a trick of a packed deal."""
+    return Trick(
+        id=uuid5(deal.id, f'trick-{number}'),
+        deal=deal,
+        number=number,
+    )
+
+
+def replay(
+        deal: Deal,
+        pass_direction: Optional[str],
+        scores: Sequence[int] = (0,) * SEATS,
+) -> tuple[HeartsState, list[packing.PackedTrick]]:
+    """Rebuild the engine state of a packed deal."""
+    return packing.replay(
+        hands=bytes(deal.packed_hands),
+        passes=bytes(deal.packed_passes or b''),
+        plays=bytes(deal.packed_plays or b''),
+        pass_direction=pass_direction,
+        has_passed=deal.has_passed,
+        scores=scores,
+    )
+
+
+def load_deal(
+        deal: Deal,
+        players: list[Player],
+        pass_direction: Optional[str],
+        scores: Sequence[int],
+) -> tuple[HeartsState, dict[int, Card], Trick]:
+    """
+    Load a packed deal along with Card and Trick views of it.
+
+    Args:
+        deal (Deal): Packed deal to load.
+        players (list): Player in each seat.
+        pass_direction (str): Direction cards get passed this deal, if any.
+        scores: Points each seat scored in previous deals.
+
+    Returns:
+        The state of the deal, a Card for every card keyed by code and the
+        current trick. Once a trick is resolved the next trick is started
+        right away unless the deal is over.
+    """
+    state, tricks = replay(deal, pass_direction, scores)
+
+    # Work out who holds each card. Passed cards belong to the receiver once
+    # passing is complete.
+    owners = [0] * DECK_SIZE
+    initial_hands = packing.unpack_hands(bytes(deal.packed_hands))
+    for seat, hand in enumerate(initial_hands):
+        for code in iter_cards(hand):
+            owners[code] = seat
+    selections = packing.unpack_passes(bytes(deal.packed_passes or b''))
+    to_pass = 0
+    for seat, selection in enumerate(selections):
+        if selection is None or pass_direction is None:
+            continue
+        if deal.has_passed:
+            receiver = rules.pass_receiver(seat, pass_direction)
+            for code in iter_cards(selection):
+                owners[code] = receiver
+        else:
+            to_pass |= selection
+
+    cards = {}
+    for code in range(DECK_SIZE):
+        suit, value = decode(code)
+        cards[code] = Card(
+            id=card_id(deal, code),
+            deal=deal,
+            player=players[owners[code]],
+            suit=suit,
+            value=value,
+            to_pass=bool(to_pass & bit(code)),
+        )
+
+    current_trick = None
+    for number, packed_trick in enumerate(tricks, 1):
+        current_trick = trick_view(deal, number)
+        current_trick.first_card = cards[packed_trick.cards[0]]
+        if packed_trick.winner is not None:
+            current_trick.winning_player = players[packed_trick.winner]
+        for code in packed_trick.cards:
+            cards[code].trick = current_trick
+
+    if current_trick is None:
+        current_trick = trick_view(deal, 1)
+    elif (
+        current_trick.winning_player_id is not None
+        and len(tricks) < TRICKS_PER_DEAL
+    ):
+        current_trick = trick_view(deal, len(tricks) + 1)
+    return state, cards, current_trick
+
+
+def save_pass(deal: Deal, seat: int, codes: Sequence[int]) -> None:
+    """Persist the cards a seat selected to pass."""
+    deal.packed_passes = packing.set_pass(
+        bytes(deal.packed_passes or b''),
+        seat,
+        codes,
+    )
+    deal.save(update_fields=['packed_passes'])
+
+
+def save_play(deal: Deal, code: int) -> None:
+    """Persist a card played to the current trick."""
+    deal.packed_plays = bytes(deal.packed_plays or b'') + bytes([code])
+    deal.save(update_fields=['packed_plays'])
+
+
+def save_trick_end(deal: Deal) -> None:
+    """Persist that the current trick has been resolved."""
+    deal.packed_plays = (
+        bytes(deal.packed_plays or b'') + bytes([packing.TRICK_END])
+    )
+    deal.save(update_fields=['packed_plays'])
+
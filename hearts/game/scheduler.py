@@ -0,0 +1,52 @@
+"""
+Scheduling of game steps on the background game worker.
+
+HTTP requests should never wait for bots to take their turns. Instead, after a
+player's action is applied the request asks the game worker to advance the game
+and returns straight away. The worker then calls `GameManager.play` one step at
+a time, waiting between steps with `asyncio.sleep` so that pacing the bots
+doesn't cost a thread.
+"""
+import logging
+from typing import Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from hearts.constants import GAME_WORKER_CHANNEL
+from hearts.game.manager import GameManager
+from hearts.models import Game
+from hearts.profiling import profile
+
+logger = logging.getLogger('django')
+
+
+def schedule_play(game_id: str) -> None:
+    """Ask the game worker to advance a game as far as it can."""
+    async_to_sync(schedule_play_async)(game_id)
+
+
+async def schedule_play_async(game_id: str) -> None:
+    """Async version of `schedule_play`."""
+    channel_layer = get_channel_layer()
+    await channel_layer.send(
+        GAME_WORKER_CHANNEL,
+        {
+            'type': 'play_game',
+            'game_id': str(game_id),
+        },
+    )
+
+
+def advance_game(game_id: str) -> Optional[float]:
+    """
+    Run a single step of a game.
+
+    Returns:
+        Seconds to wait before the next step, or None if the game is waiting
+        on a human player or is over.
+    """
+    with profile('play', game_id), transaction.atomic():
+        game = Game.objects.get(id=game_id)
+        return GameManager(game).play()
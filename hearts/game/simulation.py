@@ -0,0 +1,263 @@
+"""
+Play complete bot-only games in memory.
+
+Games are played directly against `hearts.engine` without touching the
+database, the channel layer or the game worker, so thousands of games can be
+played per second to compare bot strategies. Bots are given unsaved Player,
+Game and Card objects, which is all they need to pick their cards.
+"""
+import random
+import statistics
+from contextlib import contextmanager
+from itertools import combinations
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from django.conf import settings
+
+from hearts.bots import cache
+from hearts.bots.base import BaseBot
+from hearts.bots.utils import BotStrategy, create_bot
+from hearts.engine import HeartsState, rules
+from hearts.engine.cards import DECK_SIZE, POINTS_MASK, decode, total_points
+from hearts.engine.state import SEATS
+from hearts.models import Card, Game, Player
+
+# Give up on games that somehow don't finish after this many deals.
+MAX_DEALS = 100
+
+# Points taken by a seat that shoots the moon, i.e. takes every point card.
+MOON_POINTS = total_points(POINTS_MASK)
+
+# Strategies played when none are given. They decide in microseconds, so tens
+# of thousands of games can be played a minute.
+DEFAULT_STRATEGIES = (BotStrategy.RANDOM, BotStrategy.LOWEST)
+
+# Settings limiting how long a search bot may think about a move.
+SEARCH_TIME_BUDGETS = ('MONTE_CARLO_TIME_BUDGET', 'ISMCTS_TIME_BUDGET')
+
+_cards: dict[int, Card] = {}
+
+
+class SimulatedGame(NamedTuple):
+    """Result of a single simulated game."""
+
+    # Strategy of the bot in each seat.
+    strategies: tuple[str, ...]
+
+    # Final score of each seat.
+    scores: tuple[int, ...]
+
+    # Seat that won the game or None if it was abandoned after `MAX_DEALS`.
+    winner: Optional[int]
+
+    # Number of deals played.
+    deals: int
+
+    # Number of deals in which each seat took every point card.
+    moon_shots: tuple[int, ...]
+
+
+class StrategySummary(NamedTuple):
+    """Distribution of the final scores of one strategy."""
+
+    strategy: str
+    games: int
+    wins: int
+    mean: float
+    stdev: float
+    min: int
+    p10: float
+    median: float
+    p90: float
+    max: int
+
+
+def get_cards() -> dict[int, Card]:
+    """Get an unsaved Card for every card code, shared by every game."""
+    if not _cards:
+        for code in range(DECK_SIZE):
+            suit, value = decode(code)
+            _cards[code] = Card(suit=suit, value=value)
+    return _cards
+
+
+def lineups(strategies: Sequence[str]) -> list[tuple[str, ...]]:
+    """
+    Get the strategies to seat at the table together.
+
+    Up to four strategies make a single lineup, repeated to fill the table,
+    e.g. two strategies play two seats each. With more than four strategies
+    every combination of four of them is a lineup.
+    """
+    if len(strategies) <= SEATS:
+        return [tuple(strategies[i % len(strategies)] for i in range(SEATS))]
+    return list(combinations(strategies, SEATS))
+
+
+def rotate(strategies: Sequence[str], game_index: int) -> tuple[str, ...]:
+    """Rotate strategies around the table so every strategy sits everywhere."""
+    offset = game_index % SEATS
+    return tuple(strategies[offset:]) + tuple(strategies[:offset])
+
+
+@contextmanager
+def iteration_budgets() -> Iterator[None]:
+    """
+    Turn off the search bots' time budgets inside the block.
+
+    Searches then always run for their `MONTE_CARLO_ROLLOUTS` or
+    `ISMCTS_ITERATIONS`, so how they play only depends on the random seed and
+    not on how busy the machine is.
+    """
+    budgets = {
+        name: getattr(settings, name) for name in SEARCH_TIME_BUDGETS
+    }
+    for name in SEARCH_TIME_BUDGETS:
+        setattr(settings, name, None)
+    try:
+        yield
+    finally:
+        for name, budget in budgets.items():
+            setattr(settings, name, budget)
+
+
+def simulate_game(
+        strategies: Sequence[str],
+        seed: Optional[int] = None,
+) -> SimulatedGame:
+    """
+    Play a complete game between bots.
+
+    Search bots play without their time budgets, see `iteration_budgets`.
+
+    Args:
+        strategies: Bot strategy of each seat.
+        seed (int): Seed for shuffling and for the bots. The same seed and
+            strategies always play out the same game.
+
+    Returns:
+        The result of the game.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    with iteration_budgets():
+        return _play_game(strategies)
+
+
+def _play_game(strategies: Sequence[str]) -> SimulatedGame:
+    """Play a complete game between bots. See `simulate_game`."""
+    players = [
+        Player(name=f'Bot {seat + 1}', bot=True, bot_strategy=strategy)
+        for seat, strategy in enumerate(strategies)
+    ]
+    game = Game(
+        player_1=players[0],
+        player_2=players[1],
+        player_3=players[2],
+        player_4=players[3],
+    )
+    # Bots only look at the state they were given, so rather than creating a
+    # bot for every decision each seat's bot is reused with the latest state.
+    bots = []
+    for seat, strategy in enumerate(strategies):
+        bots.append(
+            create_bot(strategy, players[seat], game, None, get_cards()),
+        )
+
+    def get_bot(state: HeartsState, seat: int) -> BaseBot:
+        bot = bots[seat]
+        bot.state = state
+        return bot
+
+    scores = (0,) * SEATS
+    moon_shots = [0] * SEATS
+    for number in range(1, MAX_DEALS + 1):
+        deck = list(range(DECK_SIZE))
+        random.shuffle(deck)
+        state = rules.new_deal(
+            rules.deal_hands(deck),
+            rules.pass_direction_for_deal(number),
+            scores,
+        )
+
+        # Every bot picks their cards before any cards move.
+        if not state.has_passed:
+            selected = state
+            for seat in range(SEATS):
+                passing = cache.get_cards_to_pass(
+                    get_bot(state, seat),
+                    strategies[seat],
+                )
+                selected = rules.select_pass(
+                    selected,
+                    seat,
+                    [card.code for card in passing],
+                )
+            state = rules.apply_passes(selected)
+
+        while not rules.is_deal_over(state):
+            if len(state.trick) == SEATS:
+                state, _ = rules.resolve_trick(state)
+                continue
+            seat = rules.current_turn(state)
+            card = cache.get_card_to_play(
+                get_bot(state, seat),
+                strategies[seat],
+            )
+            state = rules.play_card(state, seat, card.code)
+
+        for seat, points in enumerate(rules.deal_points(state)):
+            if points == MOON_POINTS:
+                moon_shots[seat] += 1
+
+        scores = rules.game_scores(state)
+        winner = rules.game_winner(scores)
+        if winner is not None:
+            return SimulatedGame(
+                tuple(strategies),
+                scores,
+                winner,
+                number,
+                tuple(moon_shots),
+            )
+
+    return SimulatedGame(
+        tuple(strategies),
+        scores,
+        None,
+        MAX_DEALS,
+        tuple(moon_shots),
+    )
+
+
+def summarize(results: Sequence[SimulatedGame]) -> list[StrategySummary]:
+    """Summarize the final scores of every strategy across many games."""
+    scores = {}
+    wins = {}
+    for result in results:
+        for seat, strategy in enumerate(result.strategies):
+            scores.setdefault(strategy, []).append(result.scores[seat])
+            wins.setdefault(strategy, 0)
+            if seat == result.winner:
+                wins[strategy] += 1
+
+    summaries = []
+    for strategy, strategy_scores in sorted(scores.items()):
+        if len(strategy_scores) > 1:
+            deciles = statistics.quantiles(strategy_scores, n=10)
+        else:
+            deciles = strategy_scores * 9
+        summaries.append(StrategySummary(
+            strategy=strategy,
+            games=len(strategy_scores),
+            wins=wins[strategy],
+            mean=statistics.fmean(strategy_scores),
+            stdev=statistics.pstdev(strategy_scores),
+            min=min(strategy_scores),
+            p10=deciles[0],
+            median=statistics.median(strategy_scores),
+            p90=deciles[-1],
+            max=max(strategy_scores),
+        ))
+    return summaries
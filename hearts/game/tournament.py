@@ -0,0 +1,166 @@
+"""
+Round-robin tournaments between bot strategies.
+
+A tournament seats the strategies in every distinct seat permutation so no
+strategy benefits from where it sits, plays each permutation a number of
+rounds using `hearts.game.simulation`, and summarizes how every strategy did
+with 95% confidence intervals. Results are aggregated as they arrive rather
+than kept around, so the summary of a large tournament stays small.
+"""
+import math
+from itertools import permutations
+from typing import Iterable, NamedTuple, Sequence
+
+from hearts.game.simulation import SimulatedGame, lineups, simulate_game
+
+# z-score of a two-sided 95% confidence interval.
+Z_95 = 1.96
+
+
+class Match(NamedTuple):
+    """A single game to play in a tournament."""
+
+    # Position of the match in the tournament, starting at 0.
+    index: int
+
+    # Strategy of the bot in each seat.
+    strategies: tuple[str, ...]
+
+    # Seed the game is played with.
+    seed: int
+
+
+class StrategyResult(NamedTuple):
+    """How a strategy did over a whole tournament."""
+
+    strategy: str
+    games: int
+    deals: int
+    mean_score: float
+    mean_score_ci: tuple[float, float]
+    win_rate: float
+    win_rate_ci: tuple[float, float]
+    moon_shot_rate: float
+    moon_shot_rate_ci: tuple[float, float]
+
+
+def seatings(strategies: Sequence[str]) -> list[tuple[str, ...]]:
+    """
+    Get every distinct way of seating the strategies at the table.
+
+    Fewer than four strategies are repeated to fill the table, e.g. two
+    strategies play two seats each. With more than four strategies every
+    combination of four is seated in every way.
+    """
+    return sorted({
+        seating
+        for lineup in lineups(strategies)
+        for seating in permutations(lineup)
+    })
+
+
+def schedule(
+        strategies: Sequence[str],
+        rounds: int,
+        seed: int = 0,
+) -> Iterable[Match]:
+    """Yield the matches of a tournament, every seating once per round."""
+    index = 0
+    for _ in range(rounds):
+        for seating in seatings(strategies):
+            yield Match(index, seating, seed + index)
+            index += 1
+
+
+def play_match(match: Match) -> SimulatedGame:
+    """Play a match. Module level so it can be sent to worker processes."""
+    return simulate_game(match.strategies, seed=match.seed)
+
+
+def mean_interval(
+        total: float,
+        total_squares: float,
+        n: int,
+) -> tuple[float, float]:
+    """Get the normal approximation 95% confidence interval of a mean."""
+    if n < 2:
+        mean = total / n if n else 0.0
+        return mean, mean
+    mean = total / n
+    variance = max(total_squares / n - mean ** 2, 0.0) * n / (n - 1)
+    margin = Z_95 * math.sqrt(variance / n)
+    return mean - margin, mean + margin
+
+
+def proportion_interval(successes: int, n: int) -> tuple[float, float]:
+    """Get the Wilson score 95% confidence interval of a proportion."""
+    if not n:
+        return 0.0, 0.0
+    p = successes / n
+    denominator = 1 + Z_95 ** 2 / n
+    center = (p + Z_95 ** 2 / (2 * n)) / denominator
+    margin = Z_95 * math.sqrt(
+        p * (1 - p) / n + Z_95 ** 2 / (4 * n ** 2),
+    ) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+class TournamentStats:
+    """Aggregates the results of a tournament as games finish."""
+
+    def __init__(self):
+        self.games = 0
+        self.deals = 0
+        self.abandoned = 0
+        self._totals: dict[str, dict] = {}
+
+    def add(self, result: SimulatedGame) -> None:
+        """Add the result of a single game."""
+        self.games += 1
+        self.deals += result.deals
+        if result.winner is None:
+            self.abandoned += 1
+
+        for seat, strategy in enumerate(result.strategies):
+            totals = self._totals.setdefault(strategy, {
+                'games': 0,
+                'deals': 0,
+                'score': 0,
+                'score_squares': 0,
+                'wins': 0,
+                'moon_shots': 0,
+            })
+            score = result.scores[seat]
+            totals['games'] += 1
+            totals['deals'] += result.deals
+            totals['score'] += score
+            totals['score_squares'] += score ** 2
+            totals['wins'] += seat == result.winner
+            totals['moon_shots'] += result.moon_shots[seat]
+
+    def results(self) -> list[StrategyResult]:
+        """Get how every strategy did, best mean score first."""
+        results = []
+        for strategy, totals in self._totals.items():
+            games = totals['games']
+            deals = totals['deals']
+            results.append(StrategyResult(
+                strategy=strategy,
+                games=games,
+                deals=deals,
+                mean_score=totals['score'] / games,
+                mean_score_ci=mean_interval(
+                    totals['score'],
+                    totals['score_squares'],
+                    games,
+                ),
+                win_rate=totals['wins'] / games,
+                win_rate_ci=proportion_interval(totals['wins'], games),
+                moon_shot_rate=totals['moon_shots'] / deals,
+                moon_shot_rate_ci=proportion_interval(
+                    totals['moon_shots'],
+                    deals,
+                ),
+            ))
+        return sorted(results, key=lambda result: result.mean_score)
+
@@ -0,0 +1,163 @@
+"""
+Instrumentation of the SQL queries made while handling a game.
+
+Queries are recorded with Django's `connection.execute_wrapper` hook so every
+query made inside a block counts, no matter where it comes from. Recording
+blocks can be nested, e.g. a `play-card` action records the queries of the
+whole action as well as those of each `GameManager` method it calls.
+
+When `LOG_QUERY_STATS` is enabled the query count, total database time and
+the slowest statements of every action, `GameManager` method and request are
+logged as JSON. In tests, `assert_query_budget` fails if a block makes more
+queries than expected.
+"""
+import heapq
+import json
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger('django')
+
+# Number of statements included in the logs of each block.
+SLOWEST_STATEMENTS = 3
+
+
+class QueryStats:
+    """Queries made inside a single block of code."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.statements: list[tuple[float, str]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Record a query. Called by Django for every query executed."""
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started_at
+            self.statements.append((duration, sql))
+
+    @property
+    def count(self) -> int:
+        """Get the number of queries made."""
+        return len(self.statements)
+
+    @property
+    def duration(self) -> float:
+        """Get the total time spent running queries in seconds."""
+        return sum(duration for duration, _ in self.statements)
+
+    def slowest(self, n: int = SLOWEST_STATEMENTS) -> list[tuple[float, str]]:
+        """Get the slowest statements along with their durations."""
+        return heapq.nlargest(n, self.statements, key=lambda s: s[0])
+
+    def as_dict(self) -> dict:
+        """Get the stats in a JSON serializable form."""
+        return {
+            'label': self.label,
+            'queries': self.count,
+            'db_time_ms': round(self.duration * 1000, 3),
+            'slowest': [
+                {'sql': sql, 'ms': round(duration * 1000, 3)}
+                for duration, sql in self.slowest()
+            ],
+        }
+
+
+@contextmanager
+def record_queries(label: str) -> Iterator[QueryStats]:
+    """Record every query made inside the block."""
+    stats = QueryStats(label)
+    with connection.execute_wrapper(stats):
+        yield stats
+
+
+def log_query_stats(stats: QueryStats) -> None:
+    """Log the queries of a block in structured form."""
+    data = stats.as_dict()
+    logger.info(f'Query stats: {json.dumps(data)}', extra={'query_stats': data})
+
+
+@contextmanager
+def instrument(label: str) -> Iterator[Optional[QueryStats]]:
+    """Record and log the queries made inside the block, if enabled."""
+    if not settings.LOG_QUERY_STATS:
+        yield None
+        return
+
+    with record_queries(label) as stats:
+        try:
+            yield stats
+        finally:
+            # Skip blocks answered from memory, e.g. a cached `load_state`.
+            if stats.count:
+                log_query_stats(stats)
+
+
+def instrumented(method: Callable) -> Callable:
+    """Record and log the queries made by a method, if enabled."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with instrument(f'{type(self).__name__}.{method.__name__}'):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def assert_query_budget(
+        budget: int,
+        label: str = 'Block',
+) -> Iterator[QueryStats]:
+    """
+    Fail if the block makes more queries than the budget allows.
+
+    For example, to check an action stays within its budget:
+
+        with assert_query_budget(8, 'play-card'):
+            perform_action(game, player, 'play-card', {'card_id': card_id})
+
+    Raises:
+        AssertionError: If more than `budget` queries were made. The message
+            lists every statement.
+    """
+    with record_queries(label) as stats:
+        yield stats
+
+    if stats.count > budget:
+        statements = '\n'.join(
+            f'{number}. {sql}'
+            for number, (_, sql) in enumerate(stats.statements, 1)
+        )
+        raise AssertionError(
+            f'{label} made {stats.count} queries, budget is {budget}:\n'
+            f'{statements}',
+        )
+
+
+class QueryStatsMiddleware:
+    """Log the queries made by every request, if enabled."""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.LOG_QUERY_STATS:
+            return self.get_response(request)
+
+        with record_queries(request.path) as stats:
+            response = self.get_response(request)
+
+        if request.resolver_match is not None:
+            stats.label = (
+                f'{request.method} {request.resolver_match.view_name}'
+            )
+        log_query_stats(stats)
+        return response
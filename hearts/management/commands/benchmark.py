@@ -0,0 +1,101 @@
+import json
+import platform
+import random
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from hearts.benchmarks.suite import BENCHMARKS, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the game manager hot paths and count their queries. Runs '
+        'against a throwaway test database, use '
+        '--settings=hearts.benchmarks.settings to run without Postgres '
+        'and Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmarks',
+            nargs='*',
+            help=f'Benchmarks to run. One of: {", ".join(BENCHMARKS)}. '
+                 f'Defaults to all of them.',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=50,
+            help='Number of timed runs of each benchmark.',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='File to write the results to.',
+        )
+        parser.add_argument(
+            '--compare',
+            default=None,
+            help='Results file of an earlier run to compare against.',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help=(
+                'Fail the comparison if a median is slower by more than this '
+                'fraction, e.g. 0.2 for 20%%.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        names = options['benchmarks'] or list(BENCHMARKS)
+        if unknown := set(names) - set(BENCHMARKS):
+            raise CommandError(f'Unknown benchmarks: {", ".join(unknown)}')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)['benchmarks']
+
+        random.seed(0)
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            results = {}
+            for name in names:
+                result = BENCHMARKS[name](options['runs'])
+                results[name] = result._asdict()
+                self.stdout.write(
+                    f'{name:<28}median {result.median_ms:>8.3f}ms  '
+                    f'p95 {result.p95_ms:>8.3f}ms  '
+                    f'queries {result.queries:>3}'
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        with open(options['output'], 'w') as output:
+            json.dump(
+                {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'benchmarks': results,
+                },
+                output,
+                indent=2,
+            )
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Benchmarks regressed:\n' + '\n'.join(regressions),
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions'))
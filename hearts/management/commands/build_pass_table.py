@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hearts.engine import passing
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate deals with random passes and write the table of pass values '
+        'used by the passtable strategy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'deals',
+            nargs='?',
+            type=int,
+            default=1000000,
+            help='Number of deals to simulate.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes to simulate deals in.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the first worker, each worker after adds 1 to it.',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='File to write the table to. Defaults to PASS_TABLE_PATH.',
+        )
+
+    def handle(self, *args, **options):
+        deals = options['deals']
+        workers = options['workers']
+        seed = options['seed']
+        output = options['output'] or settings.PASS_TABLE_PATH
+
+        started_at = time.perf_counter()
+        if workers > 1:
+            # Split the deals as evenly as possible.
+            shares = [
+                deals // workers + (worker < deals % workers)
+                for worker in range(workers)
+            ]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                stats = passing.merge(list(executor.map(
+                    passing.collect,
+                    shares,
+                    range(seed, seed + workers),
+                )))
+        else:
+            stats = passing.collect(deals, seed)
+        elapsed = time.perf_counter() - started_at
+
+        table = passing.values(stats)
+        passing.write_table(output, table)
+        filled = sum(1 for value in table if value)
+        self.stdout.write(
+            f'Simulated {deals} deals in {elapsed:.2f}s '
+            f'({deals / elapsed:.0f} deals/sec, {workers} workers)'
+        )
+        self.stdout.write(
+            f'Wrote {output}: {filled} of {passing.SIZE} cells have enough '
+            f'samples'
+        )
@@ -0,0 +1,128 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from hearts.bots.utils import BOT_CLASS_MAP
+from hearts.game.simulation import DEFAULT_STRATEGIES
+from hearts.game.tournament import (
+    TournamentStats,
+    play_match,
+    schedule,
+    seatings,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Play a tournament between bot strategies in every seat permutation, '
+        'write every game to a JSONL file and report how each strategy did.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strategies',
+            nargs='+',
+            default=None,
+            help=(
+                'Strategies to play. Defaults to the random and lowest '
+                'strategies. Search bots play without their time budgets so '
+                'results can be reproduced from the seed.'
+            ),
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=10,
+            help='Number of times every seat permutation is played.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes to play games in.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the first game, each game after adds 1 to it.',
+        )
+        parser.add_argument(
+            '--output',
+            default='tournament.jsonl',
+            help='File to write the result of every game to.',
+        )
+
+    def handle(self, *args, **options):
+        strategies = options['strategies'] or list(DEFAULT_STRATEGIES)
+        if unknown := set(strategies) - set(BOT_CLASS_MAP):
+            raise CommandError(f'Unknown strategies: {", ".join(unknown)}')
+
+        workers = options['workers']
+        games = options['rounds'] * len(seatings(strategies))
+        matches = schedule(strategies, options['rounds'], options['seed'])
+        stats = TournamentStats()
+
+        started_at = time.perf_counter()
+        with open(options['output'], 'w') as output:
+            if workers > 1:
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=django.setup,
+                )
+                results = executor.map(
+                    play_match,
+                    matches,
+                    chunksize=max(1, games // (workers * 16)),
+                )
+            else:
+                executor = None
+                results = map(play_match, matches)
+
+            try:
+                for index, result in enumerate(results):
+                    stats.add(result)
+                    output.write(json.dumps({
+                        'match': index,
+                        'seed': options['seed'] + index,
+                        'strategies': result.strategies,
+                        'scores': result.scores,
+                        'winner': result.winner,
+                        'deals': result.deals,
+                        'moon_shots': result.moon_shots,
+                    }) + '\n')
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(
+            f'Played {stats.games} games ({stats.deals} deals) in '
+            f'{elapsed:.2f}s ({stats.deals / elapsed:.0f} deals/sec, '
+            f'{workers} workers). Results written to {options["output"]}'
+        )
+        if stats.abandoned:
+            self.stdout.write(f'{stats.abandoned} games were abandoned')
+
+        self.stdout.write(
+            f'{"strategy":<12}{"seats":>8}'
+            f'{"mean score (95% CI)":>26}'
+            f'{"win % (95% CI)":>24}'
+            f'{"moon % (95% CI)":>24}'
+        )
+        for result in stats.results():
+            self.stdout.write(
+                f'{result.strategy:<12}{result.games:>8}'
+                f'{result.mean_score:>10.2f} '
+                f'({result.mean_score_ci[0]:>6.2f}-'
+                f'{result.mean_score_ci[1]:<6.2f})'
+                f'{100 * result.win_rate:>9.2f} '
+                f'({100 * result.win_rate_ci[0]:>5.2f}-'
+                f'{100 * result.win_rate_ci[1]:<5.2f})'
+                f'{100 * result.moon_shot_rate:>9.2f} '
+                f'({100 * result.moon_shot_rate_ci[0]:>5.2f}-'
+                f'{100 * result.moon_shot_rate_ci[1]:<5.2f})'
+            )
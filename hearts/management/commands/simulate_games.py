@@ -0,0 +1,120 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from hearts.bots.utils import BOT_CLASS_MAP
+from hearts.game.simulation import (
+    DEFAULT_STRATEGIES,
+    SimulatedGame,
+    lineups,
+    rotate,
+    simulate_game,
+    summarize,
+)
+
+
+def play_game(
+        strategy_lineups: list[tuple[str, ...]],
+        seed: int,
+        game_index: int,
+) -> SimulatedGame:
+    """
+    Play a single game of a run. Module level so it can be pickled.
+
+    Games cycle through the lineups, rotating the seats each time round.
+    """
+    lineup = strategy_lineups[game_index % len(strategy_lineups)]
+    return simulate_game(
+        rotate(lineup, game_index // len(strategy_lineups)),
+        seed=seed + game_index,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Play complete bot-only games in memory and report how each strategy '
+        'scored. Nothing is written to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'games',
+            nargs='?',
+            type=int,
+            default=1000,
+            help='Number of games to play.',
+        )
+        parser.add_argument(
+            '--strategies',
+            nargs='+',
+            default=None,
+            help=(
+                'Strategies of the bots at the table. Seats are rotated every '
+                'game and with more than four strategies every combination of '
+                'four takes turns. Defaults to the random and lowest '
+                'strategies. Search bots play without their time budgets so '
+                'games can be reproduced from the seed.'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes to play games in.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the first game, each game after adds 1 to it.',
+        )
+
+    def handle(self, *args, **options):
+        strategies = options['strategies'] or list(DEFAULT_STRATEGIES)
+        if unknown := set(strategies) - set(BOT_CLASS_MAP):
+            raise CommandError(f'Unknown strategies: {", ".join(unknown)}')
+        strategy_lineups = lineups(strategies)
+
+        games = options['games']
+        workers = options['workers']
+        play = partial(play_game, strategy_lineups, options['seed'])
+
+        started_at = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=django.setup,
+            ) as executor:
+                results = list(executor.map(
+                    play,
+                    range(games),
+                    chunksize=max(1, games // (workers * 4)),
+                ))
+        else:
+            results = [play(game_index) for game_index in range(games)]
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(
+            f'Played {games} games in {elapsed:.2f}s '
+            f'({games / elapsed:.0f} games/sec, {workers} workers)'
+        )
+        abandoned = sum(result.winner is None for result in results)
+        if abandoned:
+            self.stdout.write(f'{abandoned} games were abandoned')
+
+        self.stdout.write(
+            f'{"strategy":<12}{"seats":>8}{"wins":>8}{"win %":>8}'
+            f'{"mean":>8}{"stdev":>8}{"min":>6}{"p10":>8}{"median":>8}'
+            f'{"p90":>8}{"max":>6}'
+        )
+        for summary in summarize(results):
+            self.stdout.write(
+                f'{summary.strategy:<12}{summary.games:>8}{summary.wins:>8}'
+                f'{100 * summary.wins / summary.games:>8.1f}'
+                f'{summary.mean:>8.1f}{summary.stdev:>8.1f}{summary.min:>6}'
+                f'{summary.p10:>8.1f}{summary.median:>8.1f}'
+                f'{summary.p90:>8.1f}{summary.max:>6}'
+            )
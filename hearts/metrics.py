@@ -0,0 +1,431 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Metrics are kept in plain Python objects in the process that records them
+and rendered on demand by the `/metrics` endpoint. Recording a value never
+takes a lock: counters are ints bumped under the GIL and histograms have
+their buckets fixed up front, so an observation is a bisect and two
+additions. Under heavy threading an increment can very occasionally be lost,
+which is an acceptable trade for metrics that are always on.
+
+Each process only knows about its own metrics. The game worker isn't serving
+HTTP, so it serves its metrics on `METRICS_WORKER_PORT` instead, see
+`serve_metrics`. Both only serve scrapers sending `METRICS_TOKEN`, see
+`is_authorized`.
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, Optional, Sequence
+
+from django.conf import settings
+
+logger = logging.getLogger('django')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Default histogram buckets in seconds, from 1ms to 10s.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label names and values as `{name="value",...}`."""
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return (
+        str(value)
+        .replace('\\', r'\\')
+        .replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+class Metric:
+    """Base class of every metric."""
+
+    type = ''
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        """Get the values of the labels in the order they were declared."""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        """Yield every sample line of the metric."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the metric in the text format."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+            *self.samples(),
+        ]
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the counter."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in list(self._values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    type = 'gauge'
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge to a value."""
+        self._values[self._key(labels)] = value
+
+
+class CallbackGauge(Metric):
+    """A gauge whose value is read when metrics are rendered."""
+
+    type = 'gauge'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], float],
+    ):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def samples(self) -> Iterator[str]:
+        try:
+            yield f'{self.name} {self.callback()}'
+        except Exception as e:
+            logger.error(f'Could not collect metric {self.name}: {e}')
+
+
+class Histogram(Metric):
+    """Counts of observed values in fixed buckets."""
+
+    type = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: a count per bucket plus one for +Inf, and the sum.
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record an observed value."""
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the block takes in seconds."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def samples(self) -> Iterator[str]:
+        bucket_labelnames = self.labelnames + ('le',)
+        for key, counts in list(self._counts.items()):
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(bucket_labelnames, key + (bound,))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {self._sums.get(key, 0.0)}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorator observing how long each call of a function takes."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Every metric of the process."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, or get the existing metric with the same name."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        """Register a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        """Register a gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def callback_gauge(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], float],
+    ) -> CallbackGauge:
+        """Register a gauge read from `callback` whenever it's rendered."""
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames=(),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Register a histogram."""
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets),
+        )
+
+    def render(self) -> str:
+        """Render every metric in the text format."""
+        return '\n'.join(
+            metric.render() for metric in self._metrics.values()
+        ) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+ACTION_SECONDS = REGISTRY.histogram(
+    'hearts_action_seconds',
+    'Time taken to handle a game action posted over HTTP.',
+    ['action', 'status'],
+)
+PLAY_STEP_SECONDS = REGISTRY.histogram(
+    'hearts_play_step_seconds',
+    'Time taken by a single step of GameManager.play.',
+)
+TRICK_RESOLUTION_SECONDS = REGISTRY.histogram(
+    'hearts_trick_resolution_seconds',
+    'Time taken to resolve a completed trick and notify the players.',
+)
+BOT_THINK_SECONDS = REGISTRY.histogram(
+    'hearts_bot_think_seconds',
+    'Time taken by a bot to choose the card to play.',
+    ['strategy'],
+)
+SEARCH_ITERATIONS = REGISTRY.histogram(
+    'hearts_search_iterations',
+    'Iterations run by a search bot to choose a card.',
+    ['strategy'],
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+)
+SEARCH_VISIT_SHARE = REGISTRY.histogram(
+    'hearts_search_visit_share',
+    'Share of the root visits that went to the card a search bot chose.',
+    ['strategy'],
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+BOT_CACHE_HITS = REGISTRY.counter(
+    'hearts_bot_cache_hits_total',
+    'Bot decisions found in the decision cache.',
+    ['strategy'],
+)
+BOT_CACHE_MISSES = REGISTRY.counter(
+    'hearts_bot_cache_misses_total',
+    'Bot decisions not found in the decision cache and worked out.',
+    ['strategy'],
+)
+BOT_CACHE_EVICTIONS = REGISTRY.counter(
+    'hearts_bot_cache_evictions_total',
+    'Bot decisions dropped from the full decision cache.',
+)
+BOT_STRATEGY_LOAD_SECONDS = REGISTRY.gauge(
+    'hearts_bot_strategy_load_seconds',
+    'Time taken to import and warm up a bot strategy on first use.',
+    ['strategy'],
+)
+BROADCAST_SECONDS = REGISTRY.histogram(
+    'hearts_broadcast_seconds',
+    'Time taken to build and send the game state to every player.',
+)
+BROADCAST_MESSAGES = REGISTRY.counter(
+    'hearts_broadcast_messages_total',
+    'Game state messages sent to player groups.',
+)
+WEBSOCKET_CONNECTIONS = REGISTRY.gauge(
+    'hearts_websocket_connections',
+    'Game websockets currently connected to this process.',
+)
+WEBSOCKET_CONNECTS = REGISTRY.counter(
+    'hearts_websocket_connects_total',
+    'Game websockets connected to this process.',
+)
+WORKER_RUNNING_GAMES = REGISTRY.gauge(
+    'hearts_worker_running_games',
+    'Games currently being played by this game worker.',
+)
+WORKER_STEP_FAILURES = REGISTRY.counter(
+    'hearts_worker_step_failures_total',
+    'Game steps that raised an error on this game worker.',
+)
+
+
+# Seconds a count of the active games is reused for, so scrapes don't each run
+# a COUNT over every game.
+ACTIVE_GAMES_TTL = 30
+
+# Time the active games were last counted and the count.
+_active_games: Optional[tuple[float, int]] = None
+
+
+def count_active_games() -> int:
+    """
+    Count the games that haven't been won yet.
+
+    The count is at most `ACTIVE_GAMES_TTL` seconds old.
+    """
+    global _active_games
+    now = time.monotonic()
+    if _active_games is None or now - _active_games[0] >= ACTIVE_GAMES_TTL:
+        from hearts.models import Game
+        count = Game.objects.filter(winning_player__isnull=True).count()
+        _active_games = (now, count)
+    return _active_games[1]
+
+
+ACTIVE_GAMES = REGISTRY.callback_gauge(
+    'hearts_active_games',
+    'Games that have not been won yet.',
+    count_active_games,
+)
+
+
+def count_cached_decisions() -> int:
+    """Count the bot decisions in the decision cache."""
+    from hearts.bots.cache import get_decision_cache
+    return len(get_decision_cache())
+
+
+BOT_CACHE_SIZE = REGISTRY.callback_gauge(
+    'hearts_bot_cache_size',
+    'Bot decisions in the decision cache.',
+    count_cached_decisions,
+)
+
+
+def is_authorized(authorization: Optional[str]) -> bool:
+    """
+    Check the Authorization header of a request for metrics.
+
+    Scrapers must send `Bearer <METRICS_TOKEN>`. Nobody is authorized while
+    `METRICS_TOKEN` isn't set.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or authorization is None:
+        return False
+    return hmac.compare_digest(
+        authorization.encode(),
+        f'Bearer {token}'.encode(),
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the metrics of the process on every authorized GET."""
+
+    def do_GET(self):
+        if not is_authorized(self.headers.get('Authorization')):
+            self.send_response(401)
+            self.send_header('WWW-Authenticate', 'Bearer')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def serve_metrics(port: int) -> None:
+    """
+    Serve the metrics of this process over HTTP in a background thread.
+
+    Used by processes that don't serve Django, i.e. the game worker. Only the
+    first call starts a server.
+    """
+    global _server
+    if _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(('', port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f'Could not serve metrics on port {port}: {e}')
+        return
+    thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    thread.start()
+    logger.info(f'Serving metrics on port {port}')
@@ -0,0 +1,67 @@
+# Generated by Django 4.1 on 2026-10-18 04:26
+
+from django.db import migrations, models
+
+
+def number_deals_and_tricks(apps, schema_editor):
+    """
+    Backfill `number` on existing deals and tricks.
+
+    Rows are numbered in `created_at` order. That field is updated on every
+    save, but a deal or trick is never saved again once the next one has been
+    created, so the order is still correct.
+    """
+    Deal = apps.get_model('hearts', 'Deal')
+    Trick = apps.get_model('hearts', 'Trick')
+
+    deals = []
+    numbers = {}
+    for deal in Deal.objects.order_by('game_id', 'created_at').only('id', 'game_id'):
+        numbers[deal.game_id] = numbers.get(deal.game_id, 0) + 1
+        deal.number = numbers[deal.game_id]
+        deals.append(deal)
+    Deal.objects.bulk_update(deals, ['number'], batch_size=1000)
+
+    tricks = []
+    numbers = {}
+    for trick in Trick.objects.order_by('deal_id', 'created_at').only('id', 'deal_id'):
+        numbers[trick.deal_id] = numbers.get(trick.deal_id, 0) + 1
+        trick.number = numbers[trick.deal_id]
+        tricks.append(trick)
+    Trick.objects.bulk_update(tricks, ['number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hearts', '0003_player_bot_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deal',
+            name='number',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='trick',
+            name='number',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(
+            number_deals_and_tricks,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['deal', 'player', 'trick'], name='card_deal_player_trick_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['game', 'number'], name='deal_game_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trick',
+            index=models.Index(fields=['deal', 'number'], name='trick_deal_number_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hearts', '0004_deal_number_trick_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deal',
+            name='packed_hands',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deal',
+            name='packed_passes',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deal',
+            name='packed_plays',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1 on 2026-10-18 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hearts', '0005_deal_packed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('sequence', models.PositiveIntegerField()),
+                ('state', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='hearts.game')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GameEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('sequence', models.PositiveIntegerField()),
+                ('type', models.CharField(choices=[('deal_seeded', 'Deal seeded'), ('pass_selected', 'Pass selected'), ('passes_executed', 'Passes executed'), ('card_played', 'Card played'), ('trick_won', 'Trick won'), ('seat_changed', 'Seat changed')], max_length=20)),
+                ('seat', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='hearts.game')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='gamesnapshot',
+            index=models.Index(fields=['game', 'sequence'], name='game_snapshot_sequence_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gameevent',
+            constraint=models.UniqueConstraint(fields=('game', 'sequence'), name='game_event_game_sequence_unique'),
+        ),
+    ]
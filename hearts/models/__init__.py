@@ -1,5 +1,7 @@
 from hearts.models.card import Card
 from hearts.models.deal import Deal
 from hearts.models.game import Game
+from hearts.models.game_event import GameEvent
+from hearts.models.game_snapshot import GameSnapshot
 from hearts.models.player import Player
 from hearts.models.trick import Trick
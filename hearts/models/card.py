@@ -3,6 +3,8 @@ from uuid import uuid4
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from hearts.engine import cards
+
 
 class Card(models.Model):
     """
@@ -51,6 +53,14 @@ class Card(models.Model):
 
     created_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deal', 'player', 'trick'],
+                name='card_deal_player_trick_idx',
+            ),
+        ]
+
     @property
     def sort_key(self) -> int:
         base_value = {
@@ -72,3 +82,8 @@ class Card(models.Model):
             return 1
         else:
             return 0
+
+    @property
+    def code(self) -> int:
+        """Get the compact code used to represent this card in the engine."""
+        return cards.encode(self.suit, self.value)
@@ -19,6 +19,25 @@ class Deal(models.Model):
         related_name='deals',
     )
 
+    # Position of the deal within the game, starting at 1.
+    number = models.PositiveIntegerField(default=1)
+
     has_passed = models.BooleanField(default=False)
 
+    # Compact storage used instead of Card and Trick rows when the deal was
+    # created with `DEAL_STORAGE = 'packed'`. See `hearts.engine.packing`.
+    packed_hands = models.BinaryField(null=True, blank=True)
+    packed_passes = models.BinaryField(null=True, blank=True)
+    packed_plays = models.BinaryField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'number'], name='deal_game_number_idx'),
+        ]
+
+    @property
+    def is_packed(self) -> bool:
+        """Check if this deal is stored packed rather than as Card rows."""
+        return self.packed_hands is not None
@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class GameEvent(models.Model):
+    """
+    A single thing that happened in a game.
+
+    Events are only ever appended. Replaying a game's events in order rebuilds
+    the game from scratch, see `hearts.game.events`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid4)
+
+    game = models.ForeignKey(
+        'hearts.Game',
+        on_delete=models.CASCADE,
+        related_name='events',
+    )
+
+    # Position of the event within the game, starting at 1.
+    sequence = models.PositiveIntegerField()
+
+    class Type(models.TextChoices):
+        DEAL_SEEDED = 'deal_seeded', _('Deal seeded')
+        PASS_SELECTED = 'pass_selected', _('Pass selected')
+        PASSES_EXECUTED = 'passes_executed', _('Passes executed')
+        CARD_PLAYED = 'card_played', _('Card played')
+        TRICK_WON = 'trick_won', _('Trick won')
+        SEAT_CHANGED = 'seat_changed', _('Seat changed')
+
+    type = models.CharField(
+        max_length=20,
+        choices=Type.choices,
+    )
+
+    # 0-based seat the event is about, if any.
+    seat = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    # Event specific values, e.g. the card codes of a pass selection.
+    data = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['game', 'sequence'],
+                name='game_event_game_sequence_unique',
+            ),
+        ]
@@ -0,0 +1,34 @@
+from uuid import uuid4
+
+from django.db import models
+
+
+class GameSnapshot(models.Model):
+    """
+    State of a game as of one of its events.
+
+    Snapshots are taken periodically so a game can be rebuilt without
+    replaying every event since the game started.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid4)
+
+    game = models.ForeignKey(
+        'hearts.Game',
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+    )
+
+    # Sequence of the last event included in the snapshot.
+    sequence = models.PositiveIntegerField()
+
+    state = models.JSONField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['game', 'sequence'],
+                name='game_snapshot_sequence_idx',
+            ),
+        ]
@@ -35,4 +35,12 @@ class Trick(models.Model):
         related_name='tricks_as_first_card',
     )
 
+    # Position of the trick within the deal, starting at 1.
+    number = models.PositiveIntegerField(default=1)
+
     created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deal', 'number'], name='trick_deal_number_idx'),
+        ]
@@ -0,0 +1,228 @@
+"""
+Opt-in profiling of live game actions.
+
+Profiling is off by default. When `PROFILE_SAMPLE_RATE` is set, one in every
+that many actions and game worker steps is profiled, and every action of the
+games listed in `PROFILE_GAME_IDS` is profiled. Two profilers are available:
+
+- 'cprofile' records every function call with `cProfile`. Exact, but slows the
+  profiled action down noticeably.
+- 'sampling' records the stack of the profiled thread every
+  `PROFILE_SAMPLING_INTERVAL` seconds from a background thread. Much cheaper,
+  at the cost of only seeing where time is usually spent.
+
+Results are aggregated per action type, e.g. every profiled 'play-card' adds to
+the same profile. Each process writes its aggregates to `PROFILE_DIR` after
+every profiled action so the profiles of the web processes and the game worker
+can be merged and downloaded together from the admin, as pstats files for
+cProfile or as collapsed stacks (the input of flamegraph.pl and speedscope) for
+the sampling profiler.
+"""
+import cProfile
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger('django')
+
+PROFILERS = ('cprofile', 'sampling')
+
+# File extension of the profiles written by each profiler.
+PSTATS_EXTENSION = 'prof'
+COLLAPSED_EXTENSION = 'collapsed'
+
+# Aggregated results of this process, keyed by label.
+_stats: dict[str, pstats.Stats] = {}
+_stacks: dict[str, Counter] = {}
+_lock = threading.Lock()
+
+
+def should_profile(game_id: str) -> bool:
+    """Decide whether to profile an action of a game."""
+    if str(game_id) in settings.PROFILE_GAME_IDS:
+        return True
+    rate = settings.PROFILE_SAMPLE_RATE
+    return bool(rate) and random.randrange(rate) == 0
+
+
+def collapse(frame: FrameType) -> str:
+    """Get a stack as `outermost;...;innermost` with a `module:function` each."""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples the stack of the current thread from a background thread.
+
+    The sampler needs the GIL to take a sample, so while the profiled thread is
+    busy running Python samples are taken every switch interval (5ms by
+    default) at most. Time spent waiting on the database releases the GIL and
+    is sampled at the full rate.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def __enter__(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+@contextmanager
+def profile(label: str, game_id: str) -> Iterator[None]:
+    """
+    Profile the block if the action is picked for profiling.
+
+    Args:
+        label (str): What the block does, e.g. the action type. Profiles are
+            aggregated by label and it's used in file names.
+        game_id (str): Game the action is for.
+    """
+    if not should_profile(game_id):
+        yield
+        return
+
+    if settings.PROFILER == 'sampling':
+        with StackSampler(settings.PROFILE_SAMPLING_INTERVAL) as sampler:
+            yield
+        _add_stacks(label, sampler.stacks)
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already running on this thread.
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+    _add_stats(label, profiler)
+
+
+def _path(label: str, extension: str) -> Path:
+    """Get the file this process writes the profile of a label to."""
+    return Path(settings.PROFILE_DIR) / f'{label}.{os.getpid()}.{extension}'
+
+
+def _add_stats(label: str, profiler: cProfile.Profile) -> None:
+    """Add a cProfile run to the profile of a label and write it out."""
+    with _lock:
+        if label in _stats:
+            _stats[label].add(profiler)
+        else:
+            _stats[label] = pstats.Stats(profiler)
+        data = marshal.dumps(_stats[label].stats)
+        _write(_path(label, PSTATS_EXTENSION), data)
+
+
+def _add_stacks(label: str, stacks: Counter) -> None:
+    """Add sampled stacks to the profile of a label and write it out."""
+    with _lock:
+        aggregate = _stacks.setdefault(label, Counter())
+        aggregate.update(stacks)
+        data = format_stacks(aggregate).encode()
+        _write(_path(label, COLLAPSED_EXTENSION), data)
+
+
+def _write(path: Path, data: bytes) -> None:
+    """Replace a profile file, logging rather than failing the action."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix('.tmp')
+        temporary_path.write_bytes(data)
+        temporary_path.replace(path)
+    except OSError as e:
+        logger.error(f'Could not write profile {path}: {e}')
+
+
+def format_stacks(stacks: Counter) -> str:
+    """Format stacks in the collapsed format, one `stack count` per line."""
+    return ''.join(
+        f'{stack} {count}\n' for stack, count in sorted(stacks.items())
+    )
+
+
+def labels() -> dict[str, list[str]]:
+    """Get every profiled label along with the formats it can be loaded in."""
+    formats = {PSTATS_EXTENSION: 'pstats', COLLAPSED_EXTENSION: 'collapsed'}
+    found: dict[str, set[str]] = {}
+    profile_dir = Path(settings.PROFILE_DIR)
+    if not profile_dir.is_dir():
+        return {}
+    for path in profile_dir.iterdir():
+        label, _, extension = path.name.rpartition('.')
+        label = label.rpartition('.')[0]
+        if label and extension in formats:
+            found.setdefault(label, set()).add(formats[extension])
+    return {label: sorted(found[label]) for label in sorted(found)}
+
+
+def load_pstats(label: str) -> Optional[bytes]:
+    """
+    Merge the cProfile profiles of a label written by every process.
+
+    Returns:
+        The merged profile in the format written by `pstats.Stats.dump_stats`,
+        or None if the label was never profiled with cProfile.
+    """
+    paths = sorted(Path(settings.PROFILE_DIR).glob(
+        f'{label}.*.{PSTATS_EXTENSION}',
+    ))
+    if not paths:
+        return None
+    stats = pstats.Stats(*(str(path) for path in paths))
+    return marshal.dumps(stats.stats)
+
+
+def load_stacks(label: str) -> Optional[str]:
+    """
+    Merge the sampled stacks of a label written by every process.
+
+    Returns:
+        The merged stacks in the collapsed format, or None if the label was
+        never profiled with the sampling profiler.
+    """
+    paths = sorted(Path(settings.PROFILE_DIR).glob(
+        f'{label}.*.{COLLAPSED_EXTENSION}',
+    ))
+    if not paths:
+        return None
+    stacks: Counter = Counter()
+    for path in paths:
+        for line in path.read_text().splitlines():
+            stack, _, count = line.rpartition(' ')
+            stacks[stack] += int(count)
+    return format_stacks(stacks)
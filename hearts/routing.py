@@ -1,7 +1,17 @@
-from django.urls import path, re_path
+from channels.sessions import CookieMiddleware
+from django.urls import path
 
 from hearts import consumers
+from hearts.constants import GAME_WORKER_CHANNEL
+
+http_urlpatterns = [
+    path('game/<str:game_id>/state/stream/', CookieMiddleware(consumers.GameStateStreamConsumer.as_asgi()), name='game_state_stream'),
+]
 
 websocket_urlpatterns = [
     path('game/<str:game_id>/socket/', consumers.GameConsumer.as_asgi(), name='game_socket'),
 ]
+
+channel_name_routes = {
+    GAME_WORKER_CHANNEL: consumers.GameWorkerConsumer.as_asgi(),
+}
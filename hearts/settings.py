@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hearts.instrumentation.QueryStatsMiddleware',
 ]
 
 ROOT_URLCONF = 'hearts.urls'
@@ -138,3 +139,68 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Hearts
+
+# How new deals are stored. 'rows' creates a Card row for every card and a
+# Trick row for every trick. 'packed' stores the dealt hands, pass selections
+# and plays as a few bytes on the Deal row (see `hearts.engine.packing`).
+# Existing deals keep the storage they were created with.
+DEAL_STORAGE = 'rows'
+
+# Log the number of queries, database time and slowest statements of every
+# request, action and game manager method (see `hearts.instrumentation`).
+LOG_QUERY_STATS = DEBUG
+
+# Times the game worker retries a failed step of a game before giving up and
+# telling the players, and the seconds it waits before the first retry. The
+# wait doubles with every retry.
+GAME_WORKER_MAX_RETRIES = 3
+GAME_WORKER_RETRY_DELAY = 1.0
+
+# Port the game worker serves its metrics on. Web processes serve theirs on
+# `/metrics`. Set to None to turn it off.
+METRICS_WORKER_PORT = 9101
+
+# Token scrapers must send as `Authorization: Bearer <token>` to read metrics,
+# from both `/metrics` and the game worker. No metrics are served while it's
+# None.
+METRICS_TOKEN = None
+
+# Profile one in every PROFILE_SAMPLE_RATE game actions and worker steps, and
+# every action of the games in PROFILE_GAME_IDS (see `hearts.profiling`).
+# 0 turns sampling off. PROFILER is 'cprofile' or 'sampling'.
+PROFILE_SAMPLE_RATE = 0
+PROFILE_GAME_IDS = []
+PROFILER = 'cprofile'
+PROFILE_SAMPLING_INTERVAL = 0.001
+PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Most playouts and seconds the Monte Carlo bot spends choosing a card. With
+# the time budget set to None the bot is repeatable for a given random seed.
+# With NumPy installed, guesses of the hidden hands are played out in batches
+# of MONTE_CARLO_BATCH_SIZE.
+MONTE_CARLO_ROLLOUTS = 20000
+MONTE_CARLO_TIME_BUDGET = 0.2
+MONTE_CARLO_BATCH_SIZE = 512
+
+# Most iterations and seconds the ISMCTS bot searches for a card, the number
+# of processes the search is split across and the UCB1 exploration weight.
+ISMCTS_ITERATIONS = 5000
+ISMCTS_TIME_BUDGET = 0.5
+ISMCTS_WORKERS = 1
+ISMCTS_EXPLORATION = 0.7
+
+# Most bot decisions kept in each process's decision cache, 0 to turn it off.
+# Deterministic bots are always cached; other strategies listed here are
+# cached too and then always choose the same way in the same situation.
+BOT_DECISION_CACHE_SIZE = 100000
+BOT_DECISION_CACHE_STRATEGIES = []
+
+# Warm bot strategies up when they're first loaded, e.g. start search worker
+# processes or map data files, rather than during their first decision.
+BOT_WARM_UP = True
+
+# Table of pass values used by the passtable bot, built with the
+# `build_pass_table` command.
+PASS_TABLE_PATH = BASE_DIR / 'hearts' / 'data' / 'pass_table.bin'
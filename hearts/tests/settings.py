@@ -0,0 +1,9 @@
+"""
+Settings for running the tests locally.
+
+Like the benchmarks, the tests run against an in-memory SQLite database and
+channel layer so neither Postgres nor Redis are needed:
+
+    python manage.py test --settings=hearts.tests.settings
+"""
+from hearts.benchmarks.settings import *  # noqa: F401,F403
@@ -0,0 +1,81 @@
+from django.test import TestCase
+
+from hearts.game.actions import perform_action
+from hearts.game.manager import GameManager
+from hearts.instrumentation import assert_query_budget
+from hearts.models import Game, Player
+from hearts.tests.utils import (
+    create_game,
+    create_game_in_play,
+    hand,
+    legal_card,
+)
+
+# Most queries each action may make on SQLite, including the savepoints of its
+# transaction and the broadcast made once it's committed.
+QUERY_BUDGETS = {
+    'deal-cards': 16,
+    'pass-cards': 13,
+    'play-card': 13,
+    'leave-game': 11,
+}
+
+# Most queries getting the game state may make, whether for one player or for
+# every player at once.
+GAME_STATE_BUDGET = 8
+
+
+class ActionQueryBudgetTests(TestCase):
+    """Actions stay within their query budgets."""
+
+    def perform_action(
+            self,
+            game: Game,
+            player: Player,
+            action_type: str,
+            request_data: dict,
+    ) -> None:
+        with (
+            assert_query_budget(QUERY_BUDGETS[action_type], action_type),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            perform_action(game, player, action_type, request_data)
+
+    def test_deal_cards(self):
+        game, human = create_game()
+        self.perform_action(game, human, 'deal-cards', {})
+
+    def test_pass_cards(self):
+        game, human = create_game()
+        perform_action(game, human, 'deal-cards', {})
+        cards = hand(game, human)[:3]
+        self.perform_action(game, human, 'pass-cards', {
+            'card_ids': [str(card.id) for card in cards],
+        })
+
+    def test_play_card(self):
+        game, human = create_game_in_play()
+        card = legal_card(game)
+        self.perform_action(game, human, 'play-card', {
+            'card_id': str(card.id),
+        })
+
+    def test_leave_game(self):
+        game, human = create_game_in_play()
+        self.perform_action(game, human, 'leave-game', {})
+
+
+class GameStateQueryBudgetTests(TestCase):
+    """Getting the game state doesn't query once per seat."""
+
+    def setUp(self):
+        self.game, self.human = create_game_in_play()
+
+    def test_get_game_state(self):
+        for player in self.game.players:
+            with assert_query_budget(GAME_STATE_BUDGET, 'get_game_state'):
+                GameManager(self.game, lock=False).get_game_state(player)
+
+    def test_get_game_states(self):
+        with assert_query_budget(GAME_STATE_BUDGET, 'get_game_states'):
+            GameManager(self.game, lock=False).get_game_states()
@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from hearts.game.actions import perform_action
+from hearts.game.manager import GameManager
+from hearts.tests.utils import create_game_in_play, legal_card
+
+# Queries made by a play-card action on SQLite, including the savepoints of
+# its transaction. The current deal and trick are only loaded once however
+# often the action looks at them.
+PLAY_CARD_QUERIES = 13
+
+
+class GameManagerCacheTests(TestCase):
+    """The current deal and trick are loaded once per manager."""
+
+    def setUp(self):
+        self.game, self.human = create_game_in_play()
+
+    def test_play_card_queries(self):
+        card = legal_card(self.game)
+        with (
+            self.assertNumQueries(PLAY_CARD_QUERIES),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            perform_action(
+                self.game,
+                self.human,
+                'play-card',
+                {'card_id': str(card.id)},
+            )
+
+        card.refresh_from_db()
+        self.assertIsNotNone(card.trick_id)
+
+    def test_current_deal_is_loaded_once(self):
+        game_manager = GameManager(self.game)
+        with self.assertNumQueries(1):
+            deal = game_manager.current_deal
+        with self.assertNumQueries(0):
+            self.assertEqual(game_manager.current_deal, deal)
+
+    def test_current_trick_is_loaded_once(self):
+        game_manager = GameManager(self.game)
+        game_manager.current_deal
+        with self.assertNumQueries(1):
+            trick = game_manager.current_trick
+        with self.assertNumQueries(0):
+            self.assertEqual(game_manager.current_trick, trick)
+
+    def test_invalidated_trick_is_reloaded(self):
+        game_manager = GameManager(self.game)
+        trick = game_manager.current_trick
+        game_manager.invalidate_cache('trick')
+        with self.assertNumQueries(1):
+            self.assertEqual(game_manager.current_trick, trick)
@@ -0,0 +1,63 @@
+"""Games set up in the states the tests need."""
+import random
+
+from hearts.engine import rules
+from hearts.engine.cards import lowest, to_list
+from hearts.game.actions import perform_action
+from hearts.game.manager import GameManager
+from hearts.game.scheduler import advance_game
+from hearts.models import Card, Game, Player
+
+
+def create_game(seed: int = 0) -> tuple[Game, Player]:
+    """
+    Create a game of a human player against three bots.
+
+    Returns:
+        The game, which hasn't been dealt yet, and its human player.
+    """
+    random.seed(seed)
+    for seat in range(3):
+        Player.objects.create(
+            name=f'Test Bot {seat + 1}',
+            bot=True,
+            bot_strategy='lowest',
+        )
+    human = Player.objects.create(name='Test Player')
+    return GameManager.new_game(human), human
+
+
+def play_bots(game: Game) -> None:
+    """Let the bots take their turns until the human player is up."""
+    while advance_game(game.id) is not None:
+        pass
+
+
+def create_game_in_play(seed: int = 0) -> tuple[Game, Player]:
+    """
+    Create a game in which the cards have been passed and it's the human
+    player's turn to play.
+    """
+    game, human = create_game(seed)
+    perform_action(game, human, 'deal-cards', {})
+    perform_action(game, human, 'pass-cards', {
+        'card_ids': [str(card.id) for card in hand(game, human)[:3]],
+    })
+    play_bots(game)
+    return game, human
+
+
+def hand(game: Game, player: Player) -> list[Card]:
+    """Get the cards a player holds, lowest first."""
+    game_manager = GameManager(game)
+    state = game_manager.load_state()
+    seat = game_manager.get_seat(player.id)
+    return [game_manager.cards[code] for code in to_list(state.hands[seat])]
+
+
+def legal_card(game: Game) -> Card:
+    """Get the lowest card the player whose turn it is can play."""
+    game_manager = GameManager(game)
+    state = game_manager.load_state()
+    seat = rules.current_turn(state)
+    return game_manager.cards[lowest(rules.legal_moves(state, seat))]
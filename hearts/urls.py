@@ -32,7 +32,17 @@ urlpatterns = [
     path('game/', views.NewGameView.as_view(), name='new_game'),
     path('game/<str:game_id>/', views.GameTemplateView.as_view(), name='game'),
     path('game/<str:game_id>/state/', views.GameStateView.as_view(), name='game_state'),
-    path('game/<str:game_id>/state/stream/', views.stream_game_state, name='game_state_stream'),
+
+    # Metrics.
+    path('metrics', views.metrics, name='metrics'),
+
+    # Profiles, admin only.
+    path('admin/profiles/', views.profiles, name='profiles'),
+    path(
+        'admin/profiles/<slug:label>.<str:profile_format>',
+        views.download_profile,
+        name='download_profile',
+    ),
 
     # Django Admin.
     path('admin/', admin.site.urls),
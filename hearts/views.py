@@ -4,13 +4,16 @@ import time
 from datetime import datetime, timezone
 from uuid import uuid4
 
-from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
 from django.http import (
+    Http404,
     HttpRequest,
     HttpResponse,
     HttpResponseRedirect,
-    JsonResponse, StreamingHttpResponse,
+    JsonResponse,
 )
+from django.db.models import Max
 from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views import View
@@ -20,8 +23,17 @@ from django.views.generic import FormView, TemplateView
 from hearts.constants import PLAYER_ID_COOKIE_KEY
 from hearts.decorators import require_player
 from hearts.forms import NewPlayerForm
+from hearts.game.actions import ACTION_TYPES, ActionError, perform_action
 from hearts.game.manager import GameManager
-from hearts.models import Card, Deal, Game, Player
+from hearts.game.scheduler import schedule_play
+from hearts.metrics import (
+    ACTION_SECONDS,
+    CONTENT_TYPE,
+    REGISTRY,
+    is_authorized,
+)
+from hearts.models import Game, Player
+from hearts.profiling import labels, load_pstats, load_stacks
 
 
 class NewPlayerFormView(FormView):
@@ -93,6 +105,8 @@ class GameBrowserTemplateView(TemplateView):
             'player_4',
         ).filter(
             winning_player__isnull=True,
+        ).annotate(
+            deal_number=Max('deals__number'),
         ).order_by('-created_at')
 
         my_games_to_display = []
@@ -112,7 +126,7 @@ class GameBrowserTemplateView(TemplateView):
             game_info = {
                 'id': str(game.id),
                 'seats': f'{len([p for p in game.players if p.bot])} / 4',
-                'deal': Deal.objects.filter(game=game).count(),
+                'deal': game.deal_number or 0,
                 'time_elapsed': time_elapsed,
             }
             if self.request.player in game.players:
@@ -163,7 +177,10 @@ class GameTemplateView(TemplateView):
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         """Join a game in progress."""
         game = Game.objects.get(id=kwargs['game_id'])
-        GameManager(game).join(request.player)
+        with transaction.atomic():
+            GameManager(game).join(request.player)
+        # Pick the game back up in case the game worker gave up on it.
+        schedule_play(game.id)
         return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs) -> dict:
@@ -172,36 +189,43 @@ class GameTemplateView(TemplateView):
         return context
 
     def post(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        started_at = time.perf_counter()
         request_data = json.loads(request.body)
+        action_type = request_data['action_type']
+        response = self.handle_action(
+            request,
+            kwargs['game_id'],
+            action_type,
+            request_data,
+        )
 
-        game = Game.objects.get(id=kwargs['game_id'])
-        game_manager = GameManager(game)
+        # Only label known actions so bad requests can't create new series.
+        ACTION_SECONDS.observe(
+            time.perf_counter() - started_at,
+            action=action_type if action_type in ACTION_TYPES else 'unknown',
+            status=response.status_code,
+        )
+        return response
 
-        action_type = request_data['action_type']
-        match action_type:
-            case 'deal-cards':
-                game_manager.new_deal()
-                game_manager.new_trick()
-            case 'pass-cards':
-                cards = list(Card.objects.filter(
-                    id__in=request_data['card_ids'],
-                    player=request.player,
-                ))
-                game_manager.set_cards_to_pass(cards)
-            case 'play-card':
-                card = Card.objects.get(
-                    id=request_data['card_id'],
-                    player=request.player,
-                )
-                game_manager.play_card(card)
-            case 'leave-game':
-                game_manager.leave(request.player)
-                return HttpResponse(status=200)
-            case _:
-                return HttpResponse(status=400)
-
-        game_manager.play()
-        game_manager.send_game_state_to_client()
+    def handle_action(
+            self,
+            request: HttpRequest,
+            game_id: str,
+            action_type: str,
+            request_data: dict,
+    ) -> HttpResponse:
+        """Perform a player's action and schedule the bots to play."""
+        game = Game.objects.get(id=game_id)
+        try:
+            perform_action(game, request.player, action_type, request_data)
+        except ActionError:
+            return HttpResponse(status=400)
+
+        # Bots take their turns on the game worker so the request can return
+        # straight away. When leaving, this lets the bot taking over carry on.
+        schedule_play(game.id)
+        if action_type == 'leave-game':
+            return HttpResponse(status=200)
         return HttpResponse(status=204)
 
 
@@ -217,29 +241,65 @@ class GameStateView(View):
             player = game.player_1
             is_observer = True
 
-        game_manager = GameManager(game)
+        game_manager = GameManager(game, lock=False)
         game_state = game_manager.get_game_state(player, is_observer)
 
         return JsonResponse(game_state)
 
 
-@require_player
-def stream_game_state(request, *args, **kwargs):
-    game = Game.objects.get(id=kwargs['game_id'])
-
-    def game_state_stream():
-        while True:
-            time.sleep(0.5)
-            player = request.player
-            is_observer = False
-            if player.id not in [p.id for p in game.players]:
-                player = game.player_1
-                is_observer = True
-
-            game_state = GameManager(game).get_game_state(player, is_observer)
-            yield 'data: %s\n\n' % json.dumps(game_state)
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Expose the metrics of this process in the Prometheus text format."""
+    if not is_authorized(request.headers.get('Authorization')):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@staff_member_required
+def profiles(request: HttpRequest) -> JsonResponse:
+    """List the profiled actions and where to download their profiles."""
+    return JsonResponse({
+        label: {
+            profile_format: reverse('download_profile', kwargs={
+                'label': label,
+                'profile_format': profile_format,
+            })
+            for profile_format in formats
+        }
+        for label, formats in labels().items()
+    })
+
+
+@staff_member_required
+def download_profile(
+        request: HttpRequest,
+        label: str,
+        profile_format: str,
+) -> HttpResponse:
+    """
+    Download the profile of an action merged across every process.
 
-    return StreamingHttpResponse(
-        sync_to_async(game_state_stream)(),
-        content_type='text/event-stream'
+    'pstats' profiles can be loaded with `pstats.Stats` or snakeviz and
+    'collapsed' stacks can be fed to flamegraph.pl or speedscope.
+    """
+    match profile_format:
+        case 'pstats':
+            data = load_pstats(label)
+            content_type = 'application/octet-stream'
+            extension = 'prof'
+        case 'collapsed':
+            data = load_stacks(label)
+            content_type = 'text/plain'
+            extension = 'collapsed'
+        case _:
+            raise Http404('Unknown profile format')
+
+    if data is None:
+        raise Http404('Action has not been profiled')
+
+    response = HttpResponse(data, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{label}.{extension}"'
     )
+    return response